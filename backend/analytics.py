@@ -0,0 +1,272 @@
+"""
+Provider analytics, maintained incrementally.
+
+Write paths report what changed (a listing added, a booking cancelled, a
+review's rating edited) as per-provider deltas. record() only adds the
+delta to an in-memory dict, so the request never waits on it; a
+background thread folds all pending deltas into Provider_Analytics in a
+single transaction every couple of seconds, or sooner when many are
+pending. Without the thread (ANALYTICS_ASYNC off) record() writes the
+delta with the caller's own writes instead, in the same transaction:
+
+    ANALYTICS.record(provider_id, services=1)
+    record_booking_status(listing_id, old_status=None, new_status='pending')
+    record_review(listing_id, old_rating=3, new_rating=5)
+
+Readers get the precomputed row from get_provider_analytics(). Counters
+cover a provider's current listings: total_services, total_bookings (not
+cancelled) and the rating sum/count behind average_rating.
+
+Deltas still pending when a process is killed are lost; `flask
+rebuild-analytics` recomputes every row from the source tables.
+"""
+import atexit
+import threading
+from collections import defaultdict
+
+import click
+from flask.cli import with_appcontext
+
+from backend.db import get_db
+from backend.transactions import after_commit, commit
+
+FLUSH_INTERVAL = 2.0   # seconds between background flushes
+FLUSH_BATCH = 500      # pending deltas that trigger an early flush
+COUNTERS = ("services", "bookings", "rating_sum", "rating_count")
+
+UPSERT_SQL = """
+    INSERT INTO Provider_Analytics
+        (provider_id, total_services, total_bookings, rating_sum, rating_count, average_rating, last_updated)
+    VALUES (?, ?, ?, ?, ?, CASE WHEN ? > 0 THEN CAST(? AS REAL) / ? ELSE 0 END, CURRENT_TIMESTAMP)
+    ON CONFLICT(provider_id) DO UPDATE SET
+        total_services = total_services + excluded.total_services,
+        total_bookings = total_bookings + excluded.total_bookings,
+        rating_sum = rating_sum + excluded.rating_sum,
+        rating_count = rating_count + excluded.rating_count,
+        average_rating = CASE WHEN rating_count + excluded.rating_count > 0
+            THEN CAST(rating_sum + excluded.rating_sum AS REAL) / (rating_count + excluded.rating_count)
+            ELSE 0 END,
+        last_updated = CURRENT_TIMESTAMP
+"""
+
+REBUILD_SQL = """
+    DELETE FROM Provider_Analytics;
+    INSERT INTO Provider_Analytics
+        (provider_id, total_services, total_bookings, rating_sum, rating_count, average_rating)
+    SELECT provider_id, total_services, total_bookings, rating_sum, rating_count,
+           CASE WHEN rating_count > 0 THEN CAST(rating_sum AS REAL) / rating_count ELSE 0 END
+    FROM (
+        SELECT p.provider_id,
+               COUNT(l.listing_id) AS total_services,
+               COALESCE(SUM(l.rating_sum), 0) AS rating_sum,
+               COALESCE(SUM(l.rating_count), 0) AS rating_count,
+               (SELECT COUNT(*) FROM Bookings b JOIN Listings bl ON bl.listing_id = b.listing_id
+                WHERE bl.provider_id = p.provider_id AND b.status != 'cancelled') AS total_bookings
+        FROM Providers p
+        LEFT JOIN Listings l ON l.provider_id = p.provider_id
+        GROUP BY p.provider_id
+    );
+"""
+
+
+class AnalyticsQueue:
+    """Pending per-provider deltas and the thread that flushes them."""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, flush_batch=FLUSH_BATCH):
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.app = None
+        self._pending = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self._count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def init_app(self, app):
+        """
+        Start the flush worker for an app.
+
+        Config:
+            ANALYTICS_FLUSH_INTERVAL: Seconds between flushes (default 2)
+            ANALYTICS_ASYNC: Set False to write each delta inside record(),
+                in the caller's transaction, instead
+        """
+        self.app = app
+        self.flush_interval = app.config.get("ANALYTICS_FLUSH_INTERVAL", self.flush_interval)
+        if app.config.get("ANALYTICS_ASYNC", True):
+            self.start()
+            atexit.register(self.stop)
+
+    def record(self, provider_id, **deltas):
+        """
+        Add counter deltas (services, bookings, rating_sum, rating_count) for
+        a provider, once the write they describe is committed.
+        """
+        if provider_id is None or not any(deltas.values()):
+            return
+        if self._worker is None:
+            # No flush thread: write the delta alongside the caller's writes,
+            # so it commits (or rolls back) with them rather than on its own
+            counters = dict.fromkeys(COUNTERS, 0)
+            counters.update(deltas)
+            db = get_db()
+            db.execute(UPSERT_SQL, _upsert_params(provider_id, counters))
+            commit(db)
+            return
+        after_commit(lambda: self._add(provider_id, deltas))
+
+    def _add(self, provider_id, deltas):
+        with self._lock:
+            counters = self._pending[provider_id]
+            for name, value in deltas.items():
+                counters[name] += value
+            self._count += 1
+            full = self._count >= self.flush_batch
+        if full:
+            self._wake.set()
+
+    def record_for_listing(self, listing_id, **deltas):
+        """record() for the provider that owns a listing."""
+        if not any(deltas.values()):
+            return
+        row = get_db().execute(
+            "SELECT provider_id FROM Listings WHERE listing_id = ?", (listing_id,)
+        ).fetchone()
+        if row is not None:
+            self.record(row["provider_id"], **deltas)
+
+    def flush(self, db=None):
+        """Write every pending delta in one transaction. Returns the number of providers updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+                self._count = 0
+            if not pending:
+                return 0
+            db = db or get_db()
+            rows = [_upsert_params(pid, c) for pid, c in pending.items()]
+            try:
+                db.executemany(UPSERT_SQL, rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._requeue(pending)
+                raise
+            return len(rows)
+
+    def discard(self):
+        """Drop all pending deltas."""
+        with self._lock:
+            self._pending.clear()
+            self._count = 0
+
+    def _requeue(self, pending):
+        with self._lock:
+            for provider_id, counters in pending.items():
+                merged = self._pending[provider_id]
+                for name, value in counters.items():
+                    merged[name] += value
+
+    def start(self):
+        """Start the background flush thread (once per process)."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="analytics-flush", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """Stop the worker after a final flush."""
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception as e:
+                print(f"[Analytics] Flush failed, will retry: {e}")
+            if self._stop.is_set():
+                return
+
+
+def _upsert_params(provider_id, c):
+    return (provider_id, c["services"], c["bookings"], c["rating_sum"], c["rating_count"],
+            c["rating_count"], c["rating_sum"], c["rating_count"])
+
+
+ANALYTICS = AnalyticsQueue()
+
+
+def _active_booking(status):
+    return status is not None and status != "cancelled"
+
+
+def record_booking_status(listing_id, old_status=None, new_status=None, provider_id=None):
+    """
+    A booking was created (old_status=None), changed status, or deleted
+    (new_status=None). Pass provider_id if known to skip looking it up.
+    """
+    delta = _active_booking(new_status) - _active_booking(old_status)
+    if provider_id is not None:
+        ANALYTICS.record(provider_id, bookings=delta)
+    else:
+        ANALYTICS.record_for_listing(listing_id, bookings=delta)
+
+
+def record_review(listing_id, old_rating=None, new_rating=None, provider_id=None):
+    """
+    A review was added (old_rating=None), re-rated, or deleted
+    (new_rating=None). Pass provider_id if known to skip looking it up.
+    """
+    deltas = {
+        "rating_sum": (new_rating or 0) - (old_rating or 0),
+        "rating_count": (new_rating is not None) - (old_rating is not None),
+    }
+    if provider_id is not None:
+        ANALYTICS.record(provider_id, **deltas)
+    else:
+        ANALYTICS.record_for_listing(listing_id, **deltas)
+
+
+def get_provider_analytics(provider_id):
+    """Precomputed analytics for a provider (all zero before their first activity)."""
+    row = get_db().execute(
+        """SELECT total_services, total_bookings, average_rating, rating_count, last_updated
+           FROM Provider_Analytics WHERE provider_id = ?""",
+        (provider_id,),
+    ).fetchone()
+    if row is None:
+        return {"provider_id": provider_id, "total_services": 0, "total_bookings": 0,
+                "average_rating": None, "review_count": 0, "last_updated": None}
+    return {
+        "provider_id": provider_id,
+        "total_services": row["total_services"],
+        "total_bookings": row["total_bookings"],
+        "average_rating": round(row["average_rating"], 2) if row["rating_count"] else None,
+        "review_count": row["rating_count"],
+        "last_updated": row["last_updated"],
+    }
+
+
+def rebuild_provider_analytics(db):
+    """Recompute every Provider_Analytics row from Listings and Bookings."""
+    # Pending deltas describe writes the source tables already contain
+    ANALYTICS.discard()
+    db.executescript(REBUILD_SQL)
+    db.commit()
+
+
+@click.command('rebuild-analytics')
+@with_appcontext
+def rebuild_analytics_command():
+    """Recompute provider analytics from the source tables."""
+    rebuild_provider_analytics(get_db())
+    click.echo('Provider analytics rebuilt.')
@@ -12,10 +12,17 @@ from backend.controllers.bookmark_controller import bookmark_bp
 from backend.controllers.booking_controller import booking_bp
 from backend.models.user import User
 from backend.db import get_db
+from backend import queries
+from backend.factory.database_factory import SQLiteDatabase
+from backend.snapshots import SNAPSHOTS
+from backend.json_provider import FastJSONProvider
+from backend.auth import VERIFIER, verify_id_token
+from backend.identity import invalidate_identity
+from backend.transactions import after_commit, commit, transaction
+from backend.analytics import ANALYTICS
 import os
 
-from backend.db import init_app, init_db, seed_db_command # import db initializer and init function
-import time
+from backend.db import init_app, ensure_schema, seed_db_command # import db initializer and startup schema check
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -29,6 +36,12 @@ firebase_admin.initialize_app(cred)
 
 app = Flask(__name__)
 
+# JSON encoding for jsonify()/get_json(): orjson when installed, stdlib
+# json otherwise. Set FAST_JSON=0 to force the stdlib encoder; dates stay
+# ISO 8601 either way.
+app.json = FastJSONProvider(app, use_orjson=os.getenv('FAST_JSON', '1') == '1')
+print(f"[JSON] Using {app.json.backend} encoder")
+
 # =============================================================================
 # Database Configuration - Factory Pattern Implementation
 # =============================================================================
@@ -41,6 +54,26 @@ app.config['DB_TYPE'] = os.getenv('DB_TYPE', 'sqlite')  # Default: SQLite
 app.config['DATABASE'] = os.path.join(app.instance_path, 'localconnectusers.sqlite')
 os.makedirs(app.instance_path, exist_ok=True)
 
+# Connection pool shared by all request threads in this process
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))
+app.config['DB_POOL_TIMEOUT'] = float(os.getenv('DB_POOL_TIMEOUT', 10))
+
+# SQLite PRAGMA overrides (merged over SQLiteDatabase.DEFAULT_PRAGMAS: WAL,
+# synchronous=NORMAL, mmap, 16 MB cache, in-memory temp store, busy timeout)
+app.config['SQLITE_PRAGMAS'] = {
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 134217728)),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -16000)),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+}
+# Opt-in: preload the hot tables into each pooled connection's page cache.
+# It reads every row of Listings on each new connection, and with mmap the
+# OS page cache is already shared across connections
+if os.getenv('SQLITE_WARMUP', '0') == '1':
+    app.config['SQLITE_WARMUP_QUERIES'] = SQLiteDatabase.HOT_TABLE_WARMUP
+# Compiled statements kept per connection; room for every named query in
+# backend/queries.py plus the request-shaped ones (IN lists, filters)
+app.config['SQLITE_CACHED_STATEMENTS'] = int(os.getenv('SQLITE_CACHED_STATEMENTS', 256))
+
 # Future: MongoDB Configuration (uncomment when ready to switch)
 # app.config['MONGO_URI'] = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
 # app.config['MONGO_DB_NAME'] = os.getenv('MONGO_DB_NAME', 'localconnect')
@@ -56,10 +89,36 @@ os.makedirs(app.instance_path, exist_ok=True)
 init_app(app)
 
 with app.app_context():
-    # Ensure tables are created before seeding
-    init_db()
+    # Only a schema version check when the database is current; creates the
+    # schema on a fresh database and applies pending migrations otherwise.
+    # Use `flask init-db` to wipe and rebuild.
+    ensure_schema()
     app.cli.add_command(seed_db_command)
 app.config["GOOGLE_MAPS_API_KEY"] = os.getenv("GOOGLE_MAPS_API_KEY")  
+
+# Large government datasets are refreshed by a background thread and kept
+# on disk under instance/snapshots; requests are served from memory
+app.config['SNAPSHOT_REFRESH'] = os.getenv('SNAPSHOT_REFRESH', '1') == '1'
+SNAPSHOTS.init_app(app)
+
+# ID tokens are verified against Google's signing keys, which a
+# background thread keeps fresh
+app.config['AUTH_KEY_REFRESH'] = os.getenv('AUTH_KEY_REFRESH', '1') == '1'
+VERIFIER.init_app(app)
+
+# Each request's writes are committed once, when the view returns a
+# response below 400, and rolled back otherwise
+app.config['UNIT_OF_WORK'] = os.getenv('UNIT_OF_WORK', '1') == '1'
+
+# Write paths queue per-provider counter deltas; a background thread
+# folds them into Provider_Analytics every couple of seconds
+app.config['ANALYTICS_ASYNC'] = os.getenv('ANALYTICS_ASYNC', '1') == '1'
+ANALYTICS.init_app(app)
+
+# How long a booking occupies its listing, and how many bookings a
+# listing takes at the same time
+app.config['BOOKING_SLOT_MINUTES'] = int(os.getenv('BOOKING_SLOT_MINUTES', 60))
+app.config['BOOKING_SLOT_CAPACITY'] = int(os.getenv('BOOKING_SLOT_CAPACITY', 1))
 CORS(app, supports_credentials=True)
 
 # Configure Swagger/OpenAPI documentation
@@ -120,7 +179,6 @@ def create_user_if_not_exists(firebase_uid, email, display_name, phone=None, rol
     - If frontend provides 'provider', create as provider (with business details if any).
     - Otherwise, default to 'customer'.
     """
-    db = get_db()
     existing_user = User.get_by_id(firebase_uid)
     if existing_user:
         return existing_user
@@ -137,55 +195,55 @@ def create_user_if_not_exists(firebase_uid, email, display_name, phone=None, rol
     email_lower = email.lower()
 
     try:
-        # Backend-only admin creation
-        if email_lower in admin_emails:
-            print(f"[User Creation] Creating admin user: {email_lower}")
-            user = User.create_admin(
-                email=email,
-                display_name=display_name,
-                phone=phone,
-                user_id=firebase_uid
-            )
-
-        # Backend-only provider creation
-        elif email_lower in provider_emails:
-            print(f"[User Creation] Creating provider user (predefined email): {email_lower}")
-            user = User.create_provider(
-                email=email,
-                display_name=display_name,
-                phone=phone,
-                user_id=firebase_uid,
-                business_name=business_name,
-                business_description=business_description
-            )
-
-        # Frontend-requested provider creation
-        elif role == 'provider':
-            print(f"[User Creation] Creating provider user: {email_lower}")
-            user = User.create_provider(
-                email=email,
-                display_name=display_name,
-                phone=phone,
-                user_id=firebase_uid,
-                business_name=business_name,
-                business_description=business_description
-            )
-
-        # Default: customer
-        else:
-            print(f"[User Creation] Creating customer user: {email_lower}")
-            user = User.create_consumer(
-                email=email,
-                display_name=display_name,
-                phone=phone,
-                user_id=firebase_uid
-            )
-
-        db.commit()
+        with transaction():
+            # Backend-only admin creation
+            if email_lower in admin_emails:
+                print(f"[User Creation] Creating admin user: {email_lower}")
+                user = User.create_admin(
+                    email=email,
+                    display_name=display_name,
+                    phone=phone,
+                    user_id=firebase_uid
+                )
+
+            # Backend-only provider creation
+            elif email_lower in provider_emails:
+                print(f"[User Creation] Creating provider user (predefined email): {email_lower}")
+                user = User.create_provider(
+                    email=email,
+                    display_name=display_name,
+                    phone=phone,
+                    user_id=firebase_uid,
+                    business_name=business_name,
+                    business_description=business_description
+                )
+
+            # Frontend-requested provider creation
+            elif role == 'provider':
+                print(f"[User Creation] Creating provider user: {email_lower}")
+                user = User.create_provider(
+                    email=email,
+                    display_name=display_name,
+                    phone=phone,
+                    user_id=firebase_uid,
+                    business_name=business_name,
+                    business_description=business_description
+                )
+
+            # Default: customer
+            else:
+                print(f"[User Creation] Creating customer user: {email_lower}")
+                user = User.create_consumer(
+                    email=email,
+                    display_name=display_name,
+                    phone=phone,
+                    user_id=firebase_uid
+                )
+
+        invalidate_identity(firebase_uid)
         return user
 
     except Exception as e:
-        db.rollback()
         print("[User Creation] Error:", e)
         return None
 
@@ -228,19 +286,9 @@ def api_login():
         return jsonify({'error': 'Missing Authorization token'}), 401
 
     try:
-        # Retry verify briefly to mitigate rare clock skew or propagation timing issues
-        last_err = None
-        for attempt in range(3):
-            try:
-                decoded_token = auth.verify_id_token(token)
-                break
-            except Exception as ve:
-                last_err = ve
-                # For first two attempts, sleep briefly then retry
-                if attempt < 2:
-                    time.sleep(0.3)
-                else:
-                    raise ve
+        # Verified locally with a few seconds of clock-skew leeway, so
+        # there is no need to retry on "token used too early"
+        decoded_token = verify_id_token(token)
         firebase_uid = decoded_token.get('uid')
         email = decoded_token.get('email')
 
@@ -301,7 +349,7 @@ def api_login():
 def api_logout():
     token = request.headers.get('Authorization', '').split('Bearer ')[-1]
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = verify_id_token(token)
         print(f"User logged out: {decoded_token['uid']}")
         return jsonify({'message': 'Logout logged'}), 200
     except Exception as e:
@@ -377,7 +425,7 @@ def get_user_profile():
         return jsonify({'error': 'Missing Authorization token'}), 401
 
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = verify_id_token(token)
         firebase_uid = decoded_token.get('uid')
 
         if not firebase_uid:
@@ -404,7 +452,7 @@ def delete_user_account():
         return jsonify({'error': 'Missing Authorization token'}), 401
 
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = verify_id_token(token)
         firebase_uid = decoded_token.get('uid')
 
         if not firebase_uid:
@@ -418,19 +466,25 @@ def delete_user_account():
             return jsonify({'error': 'User not found'}), 404
 
         # Delete user from database
-        result = db.execute("DELETE FROM Users WHERE user_id = ?", (firebase_uid,))
-        db.commit()
+        result = queries.execute("User.delete", (firebase_uid,), db=db)
+        commit(db)
+        invalidate_identity(firebase_uid)
 
         if result.rowcount == 0:
             return jsonify({'error': 'Failed to delete user'}), 500
 
-        # Also delete the user from Firebase Authentication
-        try:
-            auth.delete_user(firebase_uid)
-            print(f"[delete_user_account] Deleted Firebase user: {firebase_uid}")
-        except Exception as firebase_err:
-            print(f"[delete_user_account] Warning: Could not delete Firebase user: {firebase_err}")
-            # Continue anyway since DB deletion succeeded
+        # Also delete the user from Firebase Authentication, once the
+        # database delete is committed: the network call must not run
+        # while the request still holds the write lock
+        def delete_firebase_user():
+            try:
+                auth.delete_user(firebase_uid)
+                print(f"[delete_user_account] Deleted Firebase user: {firebase_uid}")
+            except Exception as firebase_err:
+                print(f"[delete_user_account] Warning: Could not delete Firebase user: {firebase_err}")
+                # Continue anyway since DB deletion succeeded
+
+        after_commit(delete_firebase_user)
 
         return jsonify({
             'success': True,
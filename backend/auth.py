@@ -0,0 +1,269 @@
+"""
+Firebase ID token verification for every protected route.
+
+Tokens are verified locally: the signature is checked against Google's
+published signing certificates, which are cached and refreshed by a
+background thread according to the Cache-Control max-age Google sends
+(usually several hours). Decoded tokens are kept in an LRU keyed by a
+hash of the token until they expire, so a client repeating the same
+token costs one dict lookup. Nothing on the request path sleeps, and the
+only network call a request can make is a key fetch when a token is
+signed with a key id we have never seen (rate limited).
+
+    from backend.auth import AuthError, current_uid
+    try:
+        user_id = current_uid()
+    except AuthError as e:
+        return jsonify({'error': str(e)}), 401
+
+When no Firebase project id is known the verifier falls back to
+firebase_admin.auth.verify_id_token (still behind the same LRU).
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+import requests
+from cryptography import x509
+from flask import request
+
+from backend import http_client
+
+GOOGLE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+ISSUER_PREFIX = "https://securetoken.google.com/"
+
+DEFAULT_KEY_TTL = 60 * 60       # when the response has no max-age
+REFRESH_AHEAD = 5 * 60          # refresh this long before the keys expire
+RETRY_INTERVAL = 60             # after a failed background refresh
+UNKNOWN_KID_INTERVAL = 60       # min seconds between refreshes for unknown key ids
+CLOCK_SKEW = 10                 # seconds of leeway on iat/exp/auth_time
+TOKEN_CACHE_SIZE = 10000
+
+
+class AuthError(ValueError):
+    """Missing, malformed, expired or otherwise invalid ID token."""
+
+
+def _max_age(cache_control):
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_KEY_TTL
+
+
+class PublicKeyCache:
+    """Google's token signing keys by key id, refreshed in the background."""
+
+    def __init__(self, url=GOOGLE_CERTS_URL):
+        self.url = url
+        self._keys = {}
+        self.expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stop = threading.Event()
+
+    def refresh(self):
+        """Fetch the current certificates and swap them in."""
+        with self._lock:
+            self._fetch()
+
+    def _fetch(self):
+        self._last_fetch = time.time()
+        resp = http_client.get(self.url)
+        resp.raise_for_status()
+        keys = {
+            kid: x509.load_pem_x509_certificate(pem.encode("utf8")).public_key()
+            for kid, pem in resp.json().items()
+        }
+        self._keys = keys
+        self.expires_at = time.time() + _max_age(resp.headers.get("Cache-Control"))
+
+    def get(self, kid):
+        """
+        Public key for a key id, or None if Google does not publish it.
+
+        Fetches in the calling thread only before the first successful
+        fetch, or (at most once a minute) when kid is unknown, which
+        happens for a short window after Google rotates its keys.
+        """
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        with self._lock:
+            # Another thread may have fetched while this one waited
+            stale = time.time() - self._last_fetch >= UNKNOWN_KID_INTERVAL
+            if kid not in self._keys and (not self._keys or stale):
+                try:
+                    self._fetch()
+                except (requests.RequestException, ValueError) as e:
+                    print(f"[Auth] Fetching signing keys failed: {e}")
+        return self._keys.get(kid)
+
+    def start(self):
+        """Start the background refresh thread (once per process)."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="auth-key-refresh", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+                wait = max(RETRY_INTERVAL, self.expires_at - time.time() - REFRESH_AHEAD)
+            except (requests.RequestException, ValueError) as e:
+                print(f"[Auth] Background key refresh failed: {e}")
+                wait = RETRY_INTERVAL
+            self._stop.wait(wait)
+
+
+class TokenVerifier:
+    """Verifies Firebase ID tokens and memoises the decoded claims."""
+
+    def __init__(self, project_id=None, keys=None, cache_size=TOKEN_CACHE_SIZE):
+        self.project_id = project_id
+        self.keys = keys or PublicKeyCache()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Resolve the Firebase project id and start the key refresh worker.
+
+        Config:
+            FIREBASE_PROJECT_ID: Project the tokens are issued for (default:
+                the initialised firebase_admin app's project)
+            AUTH_KEY_REFRESH: Set False to skip the background worker
+        """
+        self.project_id = app.config.get("FIREBASE_PROJECT_ID") or self.project_id or _firebase_project_id()
+        if self.project_id is None:
+            print("[Auth] No Firebase project id; verifying tokens through firebase_admin")
+        elif app.config.get("AUTH_KEY_REFRESH", True):
+            self.keys.start()
+
+    def verify(self, token):
+        """
+        Decoded claims of a valid ID token, with 'uid' set like firebase_admin does.
+
+        The returned dict is shared between requests; treat it as read-only.
+
+        Raises:
+            AuthError: If the token is invalid or expired
+        """
+        if not token:
+            raise AuthError("Missing token")
+        if isinstance(token, str):
+            token = token.encode("utf8")
+        digest = hashlib.sha256(token).digest()
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(digest)
+            if entry is not None:
+                claims, expires_at = entry
+                if now < expires_at:
+                    self._cache.move_to_end(digest)
+                    self.hits += 1
+                    return claims
+                del self._cache[digest]
+            self.misses += 1
+
+        claims = self._decode(token)
+        with self._lock:
+            self._cache[digest] = (claims, claims["exp"] + CLOCK_SKEW)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    def _decode(self, token):
+        if self.project_id is None:
+            return _verify_with_firebase_admin(token)
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise AuthError(f"Invalid token: {e}")
+        if header.get("alg") != "RS256":
+            raise AuthError("Invalid token: unexpected signing algorithm")
+        key = self.keys.get(header.get("kid"))
+        if key is None:
+            raise AuthError("Invalid token: unknown signing key")
+        try:
+            claims = jwt.decode(
+                token, key, algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=ISSUER_PREFIX + self.project_id,
+                leeway=CLOCK_SKEW,
+                options={"require": ["exp", "iat", "sub"]},
+            )
+        except jwt.ExpiredSignatureError:
+            raise AuthError("Token expired")
+        except jwt.PyJWTError as e:
+            raise AuthError(f"Invalid token: {e}")
+
+        sub = claims.get("sub")
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise AuthError("Invalid token: bad subject")
+        if claims.get("auth_time", 0) > time.time() + CLOCK_SKEW:
+            raise AuthError("Invalid token: auth_time is in the future")
+        claims["uid"] = sub
+        return claims
+
+    def stats(self):
+        with self._lock:
+            return {"cached_tokens": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+def _firebase_project_id():
+    try:
+        import firebase_admin
+        return firebase_admin.get_app().project_id
+    except (ImportError, ValueError):
+        return None
+
+
+def _verify_with_firebase_admin(token):
+    from firebase_admin import auth as firebase_auth
+    try:
+        return firebase_auth.verify_id_token(token, clock_skew_seconds=CLOCK_SKEW)
+    except Exception as e:
+        raise AuthError(f"Invalid token: {e}")
+
+
+VERIFIER = TokenVerifier()
+
+
+def bearer_token():
+    """The token from the request's 'Authorization: Bearer ...' header, or None."""
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None
+    return header[len("Bearer "):].strip() or None
+
+
+def verify_id_token(token):
+    """Decoded claims of a Firebase ID token. See TokenVerifier.verify."""
+    return VERIFIER.verify(token)
+
+
+def current_uid():
+    """
+    Firebase uid of the caller.
+
+    Raises:
+        AuthError: If the Authorization header is missing or the token is invalid
+    """
+    token = bearer_token()
+    if token is None:
+        raise AuthError("Missing or invalid Authorization header")
+    return VERIFIER.verify(token)["uid"]
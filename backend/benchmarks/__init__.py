@@ -0,0 +1,79 @@
+"""
+Standalone performance benchmarks.
+
+Each module builds its own throwaway database and prints timings, e.g.
+
+    python -m backend.benchmarks.search_benchmark
+
+Run them from the repository root. They do not need Firebase credentials.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+from flask import Flask
+
+from backend.db import init_app, init_db
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_app():
+    """Create a bare Flask app wired to a fresh temporary database."""
+    app = Flask("backend.app", root_path=BACKEND_DIR)
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    app.config.update({"DATABASE": path, "SQLITE_WARMUP_QUERIES": ()})
+    init_app(app)
+    with app.app_context():
+        init_db()
+    return app
+
+
+def cleanup(app):
+    """Remove the temporary database (and its WAL files) behind an app."""
+    path = app.config["DATABASE"]
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+def seed_provider(db, user_id="p0", business_name="Bench Pte Ltd"):
+    """Insert an approved provider (and its user) for seeded listings to belong to."""
+    db.execute("INSERT INTO Users (user_id, email, role) VALUES (?, ?, 'provider')",
+               (user_id, f"{user_id}@example.com"))
+    db.execute("INSERT INTO Providers (user_id, business_name, approved) VALUES (?, ?, 1)",
+               (user_id, business_name))
+
+
+def seed_listings(db, n, columns, make_row, batch=10000):
+    """
+    Insert n approved listings, committing every `batch` rows.
+
+    make_row(i) returns the values of `columns` for the i-th listing; the
+    providers and categories it refers to must already exist.
+    """
+    sql = (f"INSERT INTO Listings ({', '.join(columns)}, status) "
+           f"VALUES ({', '.join('?' * len(columns))}, 'approved')")
+    for start in range(0, n, batch):
+        db.executemany(sql, [make_row(i) for i in range(start, min(n, start + batch))])
+        db.commit()
+
+
+def time_calls(fn, repeat):
+    """Call fn() `repeat` times and return per-call timings in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(label, timings):
+    """Print p50/p95/max for a list of millisecond timings."""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:<40} p50={statistics.median(ordered):8.3f}ms  "
+          f"p95={p95:8.3f}ms  max={ordered[-1]:8.3f}ms")
@@ -0,0 +1,105 @@
+"""
+JSON serialisation benchmark: Flask's default provider vs FastJSONProvider.
+
+Seeds a temporary database with N listings (default 50k) and times
+  - encoding every listing's to_dict() in one document,
+  - GET /api/services?limit=500 through the test client,
+  - encoding N bookings whose dates are datetime objects, comparing the
+    old to_dict() (isoformat() per row, stdlib encoder) with raw values
+    handed to FastJSONProvider.
+Both providers must produce the same JSON.
+
+    python -m backend.benchmarks.json_benchmark [N]
+"""
+import datetime
+import json
+import random
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from backend.benchmarks import cleanup, make_app, seed_listings, seed_provider, summarize, time_calls
+from backend.controllers.service_controller import service_bp
+from backend.db import get_db
+from backend.json_provider import FastJSONProvider
+from backend.models.booking import Booking
+from backend.models.service import Service
+
+WORDS = ("home cleaning tutoring aircon repair plumbing catering photography "
+         "pet grooming yoga massage delivery laundry renovation").split()
+
+
+def seed(db, n):
+    rng = random.Random(2016)
+    seed_provider(db)
+    seed_listings(
+        db, n,
+        ("provider_id", "title", "description", "price", "latitude", "longitude", "created_at"),
+        lambda i: (1, f"Listing {i}", " ".join(rng.choices(WORDS, k=25)), rng.randint(20, 300),
+                   rng.uniform(1.22, 1.47), rng.uniform(103.6, 104.05),
+                   f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00"),
+    )
+
+
+def make_bookings(n):
+    base = datetime.datetime(2025, 10, 1, 9, 0)
+    return [
+        Booking(i, i % 500 + 1, f"u{i % 1000}", base + datetime.timedelta(hours=i),
+                created_at=base + datetime.timedelta(minutes=i))
+        for i in range(n)
+    ]
+
+
+def old_booking_dict(b):
+    """Booking.to_dict() as it was before dates were left to the encoder."""
+    return {
+        'booking_id': b.booking_id,
+        'listing_id': b.listing_id,
+        'user_id': b.user_id,
+        'booking_date': b.booking_date.isoformat() if isinstance(b.booking_date, datetime.datetime) else b.booking_date,
+        'status': b.status,
+        'created_at': b.created_at.isoformat() if isinstance(b.created_at, datetime.datetime) else b.created_at,
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    app = make_app()
+    app.register_blueprint(service_bp, url_prefix="/api")
+    default, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+    try:
+        with app.app_context():
+            print(f"Seeding {n:,} listings...")
+            start = time.perf_counter()
+            seed(get_db(), n)
+            print(f"  seeded in {time.perf_counter() - start:.1f}s")
+
+            items = [s.to_dict() for s in Service.list_all(status="approved")]
+            if json.loads(default.dumps(items)) != json.loads(fast.dumps(items)):
+                raise SystemExit("providers disagree on listings")
+            print(f"Encoding all {n:,} listings ({fast.backend}):")
+            summarize("DefaultJSONProvider.dumps", time_calls(lambda: default.dumps(items), 5))
+            summarize("FastJSONProvider.dumps_bytes", time_calls(lambda: fast.dumps_bytes(items), 5))
+
+            bookings = make_bookings(n)
+            if (json.loads(default.dumps([old_booking_dict(b) for b in bookings]))
+                    != json.loads(fast.dumps([b.to_dict() for b in bookings]))):
+                raise SystemExit("providers disagree on bookings")
+            print(f"{n:,} bookings, to_dict() + encode:")
+            summarize("isoformat() per row + default",
+                      time_calls(lambda: default.dumps([old_booking_dict(b) for b in bookings]), 5))
+            summarize("raw datetimes + FastJSONProvider",
+                      time_calls(lambda: fast.dumps_bytes([b.to_dict() for b in bookings]), 5))
+
+        client = app.test_client()
+        print("GET /api/services?limit=500:")
+        for label, provider in (("DefaultJSONProvider", default), ("FastJSONProvider", fast)):
+            app.json = provider
+            summarize(label, time_calls(lambda: client.get("/api/services?limit=500").data, 50))
+    finally:
+        cleanup(app)
+
+
+if __name__ == "__main__":
+    main()
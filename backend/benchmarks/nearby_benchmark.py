@@ -0,0 +1,81 @@
+"""
+Nearby-listings benchmark: R*Tree pruning vs a brute-force scan.
+
+Seeds a temporary database with N listings (default 200k) spread over
+Singapore, then times Service.nearby() against reading every approved
+listing and computing haversine for each. Both must return the same ids.
+
+    python -m backend.benchmarks.nearby_benchmark [N]
+"""
+import random
+import sys
+import time
+
+from backend.benchmarks import cleanup, make_app, seed_listings, seed_provider, summarize, time_calls
+from backend.db import get_db
+from backend.geo import haversine
+from backend.models.service import Service
+
+# Singapore's bounding box
+MIN_LAT, MAX_LAT = 1.22, 1.47
+MIN_LNG, MAX_LNG = 103.60, 104.05
+
+# (label, lat, lng, radius_km)
+QUERIES = [
+    ("Orchard 1km", 1.3048, 103.8318, 1.0),
+    ("Jurong East 3km", 1.3331, 103.7423, 3.0),
+    ("Tampines 5km", 1.3540, 103.9450, 5.0),
+    ("City centre 10km", 1.2903, 103.8520, 10.0),
+]
+
+
+def seed(db, n):
+    rng = random.Random(2007)
+    seed_provider(db)
+    seed_listings(
+        db, n,
+        ("provider_id", "title", "price", "latitude", "longitude"),
+        lambda i: (1, f"Listing {i}", rng.randint(20, 300),
+                   rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LNG, MAX_LNG)),
+    )
+
+
+def brute_force(lat, lng, radius_km, limit=20):
+    rows = get_db().execute(
+        "SELECT * FROM Listings WHERE status = 'approved' AND latitude IS NOT NULL"
+    ).fetchall()
+    hits = []
+    for row in rows:
+        distance = haversine(lat, lng, row["latitude"], row["longitude"])
+        if distance <= radius_km:
+            hits.append((distance, row))
+    hits.sort(key=lambda hit: hit[0])
+    return [row["listing_id"] for _, row in hits[:limit]]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app = make_app()
+    try:
+        with app.app_context():
+            db = get_db()
+            print(f"Seeding {n:,} listings...")
+            start = time.perf_counter()
+            seed(db, n)
+            print(f"  seeded in {time.perf_counter() - start:.1f}s")
+
+            for label, lat, lng, radius in QUERIES:
+                indexed = [s["listing_id"] for s in Service.nearby(lat, lng, radius)]
+                if indexed != brute_force(lat, lng, radius):
+                    raise SystemExit(f"{label}: R*Tree and brute-force results differ")
+                print(f"{label}:")
+                summarize("Service.nearby (R*Tree)",
+                          time_calls(lambda: Service.nearby(lat, lng, radius), 20))
+                summarize("brute-force scan",
+                          time_calls(lambda: brute_force(lat, lng, radius), 3))
+    finally:
+        cleanup(app)
+
+
+if __name__ == "__main__":
+    main()
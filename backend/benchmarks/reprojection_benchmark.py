@@ -0,0 +1,66 @@
+"""
+SVY21 -> WGS84 reprojection benchmark: per-row vs batched.
+
+Generates N synthetic HDB carpark records (default 5,000, about the size
+of the real dataset) with string x_coord/y_coord values, a few of them
+missing or malformed, and times the old per-record transform loop
+against svy21_to_wgs84() on the whole column. Both must agree.
+
+    python -m backend.benchmarks.reprojection_benchmark [N]
+"""
+import random
+import sys
+
+import numpy as np
+
+from backend.benchmarks import summarize, time_calls
+from backend.geo import svy21_to_wgs84, svy21_transformer
+
+
+def make_records(n):
+    rng = random.Random(2013)
+    records = []
+    for i in range(n):
+        x, y = f"{rng.uniform(2000, 50000):.4f}", f"{rng.uniform(20000, 50000):.4f}"
+        if i % 500 == 0:
+            x = ""
+        elif i % 777 == 0:
+            y = "n/a"
+        records.append({"car_park_no": f"C{i}", "x_coord": x, "y_coord": y})
+    return records
+
+
+def per_row(records):
+    transformer = svy21_transformer()
+    out = []
+    for r in records:
+        try:
+            lon, lat = transformer.transform(float(r.get("x_coord")), float(r.get("y_coord")))
+        except (TypeError, ValueError):
+            lat, lon = None, None
+        out.append((lat, lon))
+    return out
+
+
+def batched(records):
+    return svy21_to_wgs84([r.get("x_coord") for r in records],
+                          [r.get("y_coord") for r in records])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    records = make_records(n)
+
+    rows = per_row(records)
+    lats, lngs = batched(records)
+    expected = np.array([np.nan if lat is None else lat for lat, _ in rows])
+    if not np.allclose(expected, lats, equal_nan=True):
+        raise SystemExit("per-row and batched reprojection differ")
+
+    print(f"Reprojecting {n:,} carparks:")
+    summarize("per-row transformer.transform", time_calls(lambda: per_row(records), 10))
+    summarize("batched svy21_to_wgs84", time_calls(lambda: batched(records), 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Row mapping benchmark: sqlite3.Row + from_row() vs tuple rows + RowMapper.
+
+Seeds a temporary database with N listings (default 100k) and materialises
+all of them as Service objects, comparing
+  - the old path: sqlite3.Row rows, a from_row() that checks row.keys()
+    for the optional columns, and a model with a per-instance __dict__,
+  - Service.list_all(): plain tuples mapped by column index into the
+    __slots__ Service.
+For each it prints the time (best of R runs), the peak traced memory
+while materialising, and the memory blocks still allocated for the
+result list. Both must produce the same to_dict() output.
+
+    python -m backend.benchmarks.row_mapping_benchmark [N] [R]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from backend.benchmarks import cleanup, make_app
+from backend.benchmarks.json_benchmark import seed
+from backend.db import get_db
+from backend.models.service import Service
+
+
+class LegacyService:
+    """Service as it was before __slots__ and RowMapper, kept for comparison."""
+
+    def __init__(self, listing_id, provider_id, title, price, category_id=None, description=None,
+                 status='pending', image_url=None, location=None, latitude=None, longitude=None, created_at=None,
+                 rating_sum=0, rating_count=0):
+        self.listing_id = listing_id
+        self.provider_id = provider_id
+        self.category_id = category_id
+        self.title = title
+        self.description = description
+        self.price = float(price)
+        self.status = status
+        self.image_url = image_url
+        self.location = location
+        self.latitude = latitude
+        self.longitude = longitude
+        self.created_at = created_at
+        self.rating_sum = rating_sum
+        self.rating_count = rating_count
+
+    to_dict = Service.to_dict
+    avg_rating = Service.avg_rating
+
+    @staticmethod
+    def from_row(row):
+        if row is None:
+            return None
+        return LegacyService(
+            listing_id=row["listing_id"],
+            provider_id=row["provider_id"],
+            category_id=row["category_id"],
+            title=row["title"],
+            description=row["description"],
+            price=row["price"],
+            status=row["status"],
+            image_url=row["image_url"],
+            location=row['location'] if 'location' in row.keys() else None,
+            latitude=row['latitude'] if 'latitude' in row.keys() else None,
+            longitude=row['longitude'] if 'longitude' in row.keys() else None,
+            created_at=row["created_at"],
+            rating_sum=row["rating_sum"] if "rating_sum" in row.keys() else 0,
+            rating_count=row["rating_count"] if "rating_count" in row.keys() else 0,
+        )
+
+
+def legacy_list_all():
+    rows = get_db().execute("SELECT * FROM Listings ORDER BY created_at DESC").fetchall()
+    return [LegacyService.from_row(r) for r in rows]
+
+
+def measure(label, fn, repeat):
+    """Print best time, peak traced memory and retained blocks for fn()."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks_before
+    print(f"  {label:<34} {best * 1000:9.1f}ms  peak={peak / 2**20:7.1f}MB  "
+          f"blocks={blocks:>9,} ({blocks / len(result):.1f}/row)")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    app = make_app()
+    try:
+        with app.app_context():
+            seed(get_db(), n)
+            print(f"Materialising {n} Listings rows:")
+            old = measure("sqlite3.Row + from_row()", legacy_list_all, repeat)
+            new = measure("tuples + RowMapper (__slots__)", Service.list_all, repeat)
+            if [s.to_dict() for s in old] != [s.to_dict() for s in new]:
+                raise SystemExit("Mapped services differ")
+    finally:
+        cleanup(app)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Full-text search benchmark.
+
+Seeds a temporary database with N listings (default 500k) through the
+normal INSERT path, so the FTS triggers do the indexing, then times
+Service.search() for a mix of full-word and prefix queries.
+
+    python -m backend.benchmarks.search_benchmark [N]
+"""
+import itertools
+import random
+import sys
+import time
+
+from backend.benchmarks import cleanup, make_app, seed_listings, summarize, time_calls
+from backend.db import get_db
+from backend.models.service import Service
+
+CATEGORIES = ["Private Tutoring", "Home Cleaning", "Plumbing Services", "Auto Mechanic",
+              "Beauty Salon", "Tech Support", "Personal Chef", "Package Delivery"]
+WORDS = ["home", "tutor", "math", "science", "english", "deep", "clean", "office", "pipe",
+         "leak", "drain", "engine", "battery", "tyre", "hair", "colour", "laptop", "network",
+         "chef", "dinner", "parcel", "express", "repair", "install", "weekly", "premium",
+         "budget", "emergency", "certified", "friendly", "fast", "local", "expert"]
+# Description text follows a Zipf distribution over a 5,000-word vocabulary,
+# the domain words spread through its head, rather than a uniform draw from a
+# handful of words: real listings are mostly distinct text, so a common term
+# matches a few percent of the corpus, not half of it.
+VOCABULARY_SIZE = 5000
+QUERIES = ["home tutor", "emergency plumbing", "laptop repair", "deep clean office",
+           "tut", "plum", "hair colour", "certified electr", "weekly math tutor", "chef"]
+
+
+def build_vocabulary():
+    vocabulary = [f"w{i:04d}" for i in range(VOCABULARY_SIZE - len(WORDS))]
+    for i, word in enumerate(WORDS):
+        vocabulary.insert(50 + i * 40, word)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    return vocabulary, cum_weights
+
+
+def seed(db, n):
+    rng = random.Random(2006)
+    vocabulary, cum_weights = build_vocabulary()
+    db.executemany("INSERT INTO Categories (name) VALUES (?)", [(c,) for c in CATEGORIES])
+    db.executemany(
+        "INSERT INTO Users (user_id, email, role) VALUES (?, ?, 'provider')",
+        [(f"p{i}", f"p{i}@example.com") for i in range(1000)],
+    )
+    db.executemany(
+        "INSERT INTO Providers (user_id, business_name, approved) VALUES (?, ?, 1)",
+        [(f"p{i}", f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Pte Ltd") for i in range(1000)],
+    )
+    seed_listings(
+        db, n,
+        ("provider_id", "category_id", "title", "description", "price"),
+        lambda i: (
+            rng.randint(1, 1000),
+            rng.randint(1, len(CATEGORIES)),
+            " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=3)).title(),
+            " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=20)),
+            rng.randint(20, 300),
+        ),
+    )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    app = make_app()
+    try:
+        with app.app_context():
+            db = get_db()
+            print(f"Seeding {n:,} listings...")
+            start = time.perf_counter()
+            seed(db, n)
+            db.execute("INSERT INTO Listings_fts(Listings_fts) VALUES ('optimize')")
+            db.commit()
+            print(f"  seeded in {time.perf_counter() - start:.1f}s")
+
+            print("Service.search(limit=20):")
+            for query in QUERIES:
+                Service.search(query)  # warm the page cache
+                summarize(repr(query), time_calls(lambda: Service.search(query), 20))
+    finally:
+        cleanup(app)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Write path benchmark: insert/update-then-SELECT vs one RETURNING statement.
+
+For each model write it runs N calls of the old pattern (the write, then
+a SELECT of the row just written, as the models used to do) and N calls
+of the current model method, and prints the SQL statements per call
+(counted with sqlite3's trace callback, BEGIN/COMMIT included, trigger
+bodies excluded) and the timings.
+
+    python -m backend.benchmarks.write_benchmark [N]
+"""
+import io
+import sys
+from contextlib import contextmanager, redirect_stdout
+
+from backend.analytics import ANALYTICS
+from backend.benchmarks import cleanup, make_app, summarize, time_calls
+from backend.db import get_db
+from backend.models.booking import Booking
+from backend.models.bookmark import Bookmark
+from backend.models.provider import Provider
+from backend.models.service import Service
+from backend.models.user import User
+
+
+@contextmanager
+def count_statements(db):
+    """Yield a list that collects every SQL statement db runs inside the block."""
+    statements = []
+
+    def trace(sql):
+        # Trigger bodies are reported as '-- TRIGGER name', and a trigger
+        # with a WHEN clause repeats the statement that fired it; neither
+        # is a statement of its own
+        if not sql.startswith("--") and (not statements or statements[-1] != sql):
+            statements.append(sql)
+
+    db.set_trace_callback(trace)
+    try:
+        yield statements
+    finally:
+        db.set_trace_callback(None)
+
+
+# The pre-RETURNING implementations, kept here for comparison
+
+def old_service_create(provider_id, title, price):
+    db = get_db()
+    db.execute(
+        """INSERT INTO Listings (provider_id, category_id, title, description, price, status, image_url,
+           location, latitude, longitude, created_at)
+           VALUES (?, NULL, ?, NULL, ?, 'pending', NULL, NULL, NULL, NULL, datetime('now'))""",
+        (provider_id, title, float(price)),
+    )
+    db.commit()
+    listing_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return Service.get_by_id(listing_id)
+
+
+def old_service_update(listing_id, price):
+    db = get_db()
+    result = db.execute("UPDATE Listings SET price = ? WHERE listing_id = ?", (float(price), listing_id))
+    db.commit()
+    if result.rowcount == 0:
+        return None
+    return Service.get_by_id(listing_id)
+
+
+def old_bookmark_create(user_id, listing_id):
+    db = get_db()
+    cursor = db.execute("INSERT INTO Bookmarks (user_id, listing_id) VALUES (?, ?)", (user_id, listing_id))
+    db.commit()
+    return Bookmark.get_by_id(cursor.lastrowid)
+
+
+def old_booking_update_status(booking_id, status):
+    db = get_db()
+    Booking.get_by_id(booking_id)  # read for the analytics delta
+    db.execute("UPDATE Bookings SET status = ? WHERE booking_id = ?", (status, booking_id))
+    db.commit()
+    return Booking.get_by_id(booking_id)
+
+
+def old_user_create(user_id, email):
+    db = get_db()
+    db.execute(
+        "INSERT INTO Users (user_id, email, display_name, phone, role, created_at) VALUES (?, ?, NULL, NULL, 'provider', datetime('now'))",
+        (user_id, email),
+    )
+    row = db.execute("SELECT * FROM Users WHERE user_id = ?", (user_id,)).fetchone()
+    db.commit()
+    return User.from_row(row)
+
+
+def old_provider_create(user_id, business_name):
+    db = get_db()
+    db.execute(
+        "INSERT INTO Providers (user_id, business_name, description, approved) VALUES (?, ?, NULL, 0)",
+        (user_id, business_name),
+    )
+    db.commit()
+    row = db.execute("SELECT * FROM Providers WHERE user_id = ?", (user_id,)).fetchone()
+    return Provider.from_row(row)
+
+
+def new_user_create(user_id, email):
+    user = User.create(email, role='provider', user_id=user_id)
+    get_db().commit()
+    return user
+
+
+def seed(db, n):
+    db.execute("INSERT INTO Users (user_id, email, role) VALUES ('c0', 'c0@example.com', 'customer')")
+    db.execute("INSERT INTO Users (user_id, email, role) VALUES ('p0', 'p0@example.com', 'provider')")
+    db.execute("INSERT INTO Providers (user_id, business_name, approved) VALUES ('p0', 'Bench Pte Ltd', 1)")
+    db.executemany(
+        "INSERT INTO Listings (provider_id, title, price, status) VALUES (1, ?, 50, 'approved')",
+        [(f"Listing {i}",) for i in range(2 * n)],
+    )
+    db.executemany(
+        "INSERT INTO Bookings (listing_id, user_id, booking_date, status) VALUES (?, 'c0', '2030-01-01 10:00:00', 'pending')",
+        [(i + 1,) for i in range(2 * n)],
+    )
+    db.commit()
+
+
+def compare(label, n, old, new):
+    """Time n calls of old(i) and new(i) and print statements per call."""
+    db = get_db()
+    print(f"{label}:")
+    for name, fn, offset in (("write + SELECT", old, 0), ("RETURNING", new, n)):
+        # Some models print on every write; keep the report readable
+        with redirect_stdout(io.StringIO()):
+            with count_statements(db) as statements:
+                fn(offset)
+            calls = iter(range(offset + 1, offset + n))
+            timings = time_calls(lambda: fn(next(calls)), n - 1)
+        summarize(f"{name} ({len(statements)} statements/call)", timings)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = make_app()
+    # Queue analytics deltas for the background flush, as the app does
+    ANALYTICS.init_app(app)
+    try:
+        with app.app_context():
+            db = get_db()
+            seed(db, n)
+
+            a = old_service_create(1, "Same", 10).to_dict()
+            b = Service.create(1, "Same", 10).to_dict()
+            for key in ("listing_id", "created_at"):
+                a.pop(key), b.pop(key)
+            if a != b:
+                raise SystemExit("Service.create results differ")
+
+            compare("Service.create", n,
+                    lambda i: old_service_create(1, f"Old {i}", 10),
+                    lambda i: Service.create(1, f"New {i}", 10))
+            compare("Service.update", n,
+                    lambda i: old_service_update(i + 1, 20),
+                    lambda i: Service.update(i + 1, price=20))
+            compare("Bookmark.create", n,
+                    lambda i: old_bookmark_create('c0', i + 1),
+                    lambda i: Bookmark.create('c0', i + 1))
+            compare("Booking.update_status", n,
+                    lambda i: old_booking_update_status(i + 1, 'confirmed'),
+                    lambda i: Booking.update_status(i + 1, 'confirmed'))
+            compare("User.create", n,
+                    lambda i: old_user_create(f"u{i}", f"u{i}@example.com"),
+                    lambda i: new_user_create(f"u{i}", f"u{i}@example.com"))
+            compare("Provider.create_for_user", n,
+                    lambda i: old_provider_create(f"u{i}", f"Biz {i}"),
+                    lambda i: Provider.create_for_user(f"u{i}", f"Biz {i}", None))
+    finally:
+        ANALYTICS.stop()
+        cleanup(app)
+
+
+if __name__ == "__main__":
+    main()
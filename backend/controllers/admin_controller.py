@@ -1,5 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
-from backend.db import get_db
+from backend import queries
+from backend.db import get_db, get_pool
+from backend.identity import invalidate_identity, require_role
+from backend.factory.database_factory import SQLiteDatabase
+from backend.transactions import commit
+from backend.streaming import iter_cursor, stream_json
+from backend.analytics import record_review
+from backend.models.service import Service
 
 admin_bp = Blueprint("admin_bp", __name__)
 
@@ -34,8 +41,7 @@ def list_users():
         description: Not authorized (admin only)
     """
     db = get_db()
-    users = db.execute("SELECT * FROM Users").fetchall()
-    return jsonify([dict(u) for u in users])
+    return stream_json(iter_cursor(queries.execute("User.stream_all", db=db)))
 
 # -----------------------------
 # Delete a user
@@ -76,8 +82,9 @@ def delete_user(user_id):
         description: Not authorized (admin only)
     """
     db = get_db()
-    result = db.execute("DELETE FROM Users WHERE user_id = ?", (user_id,))
-    db.commit()
+    result = queries.execute("User.delete", (user_id,), db=db)
+    commit(db)
+    invalidate_identity(user_id)
     if result.rowcount == 0:
         return jsonify({"error": "User not found"}), 404
     return jsonify({"message": f"User {user_id} deleted"})
@@ -120,10 +127,7 @@ def delete_service(listing_id):
       403:
         description: Not authorized (admin only)
     """
-    db = get_db()
-    result = db.execute("DELETE FROM Listings WHERE listing_id = ?", (listing_id,))
-    db.commit()
-    if result.rowcount == 0:
+    if not Service.delete(listing_id):
         return jsonify({"error": "Listing not found"}), 404
     return jsonify({"message": f"Listing {listing_id} deleted"})
 
@@ -166,10 +170,11 @@ def delete_review(review_id):
         description: Not authorized (admin only)
     """
     db = get_db()
-    result = db.execute("DELETE FROM Reviews WHERE review_id = ?", (review_id,))
-    db.commit()
-    if result.rowcount == 0:
+    review = queries.fetch_one("Review.delete", (review_id,), db=db)
+    commit(db)
+    if review is None:
         return jsonify({"error": "Review not found"}), 404
+    record_review(review["listing_id"], old_rating=review["rating"], provider_id=review["provider_id"])
     return jsonify({"message": f"Review {review_id} deleted"})
 
 # -----------------------------
@@ -178,22 +183,7 @@ def delete_review(review_id):
 @admin_bp.route("/admin/reviews", methods=["GET"])
 def get_all_reviews():
     db = get_db()
-    reviews = db.execute(
-        """
-        SELECT 
-            r.review_id AS id,
-         r.user_id,
-            u.display_name AS reviewer,
-            l.title AS service,
-            r.comment,
-            r.rating,
-            r.created_at
-        FROM Reviews r
-        JOIN Users u ON r.user_id = u.user_id
-        JOIN Listings l ON r.listing_id = l.listing_id
-        ORDER BY r.created_at DESC
-        """
-    ).fetchall()
+    reviews = queries.fetch_all("Review.list_all", db=db)
     return jsonify([dict(r) for r in reviews])
 
 # -----------------------------
@@ -202,9 +192,7 @@ def get_all_reviews():
 @admin_bp.route("/admin/services/existing", methods=["GET"])
 def get_existing_listings():
     db = get_db()
-    listings = db.execute("""
-        SELECT * FROM Listings WHERE status = 'approved'
-    """).fetchall()
+    listings = queries.fetch_all("Service.list_by_status", ('approved',), db=db)
     return jsonify([dict(l) for l in listings])
 
 # -----------------------------
@@ -213,7 +201,43 @@ def get_existing_listings():
 @admin_bp.route("/admin/services/pending", methods=["GET"])
 def get_pending_listings():
     db = get_db()
-    listings = db.execute("""
-        SELECT * FROM Listings WHERE status = 'pending'
-    """).fetchall()
-    return jsonify([dict(l) for l in listings])
\ No newline at end of file
+    listings = queries.fetch_all("Service.list_by_status", ('pending',), db=db)
+    return jsonify([dict(l) for l in listings])
+
+# -----------------------------
+# Per-query timing
+# -----------------------------
+@admin_bp.route("/admin/query-stats", methods=["GET"])
+@require_role('admin', error='Only admins can view query stats')
+def query_stats():
+    """
+    Query Timing Statistics
+    ---
+    tags:
+      - Admin
+    security:
+      - Bearer: []
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: "Firebase JWT token (format: Bearer TOKEN)"
+    responses:
+      200:
+        description: >
+          Count, rows, errors, total time and p50/p99 latency (ms, over the
+          most recent calls) per named query in this worker,
+          plus the number of registered queries, the statement cache size
+          of each pooled connection and the connection pool's usage (size,
+          checkout waits, saturation)
+      403:
+        description: Not authorized (admin only)
+    """
+    return jsonify({
+        "queries": queries.stats(),
+        "registered": len(queries.QUERIES),
+        "cached_statements": (current_app.config.get('SQLITE_CACHED_STATEMENTS')
+                              or SQLiteDatabase.DEFAULT_CACHED_STATEMENTS),
+        "pool": get_pool().stats(),
+    })
\ No newline at end of file
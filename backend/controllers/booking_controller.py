@@ -3,9 +3,11 @@ Booking Controller
 Handles all booking-related API endpoints and logic.
 """
 from flask import Blueprint, request, jsonify, current_app
-from backend.models.booking import Booking
+from backend.models.booking import Booking, SlotConflictError
 from backend.models.user import User
-import firebase_admin
+from backend.auth import AuthError, current_uid
+from backend.identity import current_identity, get_identity
+from datetime import datetime, timedelta
 import traceback
 
 # Create a Blueprint for booking routes
@@ -19,17 +21,10 @@ def verify_token():
     Returns:
         tuple: (user_id, error_response, status_code)
     """
-    auth_header = request.headers.get('Authorization')
-    print("verify_token() Authorization header:", auth_header)
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None, jsonify({'success': False, 'error': 'Authorization header missing'}), 401
-    
-    token = auth_header.split('Bearer ')[1]
     try:
-        decoded_token = firebase_admin.auth.verify_id_token(token)
-        return decoded_token['uid'], None, None
-    except Exception as e:
-        return None, jsonify({'success': False, 'error': f'Invalid token: {str(e)}'}), 401
+        return current_uid(), None, None
+    except AuthError as e:
+        return None, jsonify({'success': False, 'error': str(e)}), 401
 
 
 def get_user_role(user_id):
@@ -39,16 +34,10 @@ def get_user_role(user_id):
     Returns:
         str: The user's role (admin, provider, customer)
     """
-    
-    #Debug
-    print(f"Looking up user with id: {user_id}")
-    user = User.get_by_id(user_id)
-    print(f"DB query returned: {user}")
-
+    user = get_identity(user_id)
     if not user:
         raise ValueError("User not found")
-    user = User.get_by_id(user_id)
-    return user.role if user else None
+    return user.role
 
 @booking_bp.route('/bookings', methods=['POST'])
 #@login_required
@@ -95,6 +84,8 @@ def create_booking():
         description: Bad request (invalid parameters)
       401:
         description: Unauthorized
+      409:
+        description: Time slot already booked
       500:
         description: Server error
     """
@@ -132,6 +123,13 @@ def create_booking():
             'booking': booking.to_dict()
         }), 201
         
+    except SlotConflictError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'conflicts': e.conflicts
+        }), 409
+        
     except ValueError as e:
         return jsonify({
             'success': False,
@@ -147,6 +145,152 @@ def create_booking():
         }), 500
 
 
+@booking_bp.route('/bookings/batch', methods=['POST'])
+def create_bookings_batch():
+    """
+    Create Several Bookings at Once
+    ---
+    tags:
+      - Bookings
+    description: >
+      Creates all the bookings in one transaction, or none of them if any
+      slot is taken or invalid. Send either a list of bookings, or one
+      listing_id/booking_date with a repeat rule for recurring sessions
+      (e.g. weekly tutoring).
+    security:
+      - Bearer: []
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: "Firebase JWT token (format: Bearer TOKEN)"
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            bookings:
+              type: array
+              items:
+                type: object
+                properties:
+                  listing_id:
+                    type: integer
+                    example: 123
+                  booking_date:
+                    type: string
+                    format: date-time
+                    example: "2023-12-25T14:30:00"
+            listing_id:
+              type: integer
+              example: 123
+            booking_date:
+              type: string
+              format: date-time
+              example: "2023-12-25T14:30:00"
+            repeat:
+              type: object
+              properties:
+                every_days:
+                  type: integer
+                  example: 7
+                count:
+                  type: integer
+                  example: 10
+    responses:
+      201:
+        description: Bookings created successfully
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            count:
+              type: integer
+            bookings:
+              type: array
+              items:
+                type: object
+      400:
+        description: Bad request (invalid parameters)
+      401:
+        description: Unauthorized
+      409:
+        description: One or more time slots already booked (listed in conflicts)
+      500:
+        description: Server error
+    """
+    try:
+        # Verify authentication
+        user_id, error_response, status_code = verify_token()
+        if error_response:
+            return error_response, status_code
+        
+        data = request.get_json(silent=True) or {}
+        requests = _batch_requests(data)
+        bookings = Booking.create_many(user_id, requests)
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(bookings)} bookings created successfully',
+            'count': len(bookings),
+            'bookings': [b.to_dict() for b in bookings]
+        }), 201
+        
+    except SlotConflictError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'conflicts': e.conflicts
+        }), 409
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
+    except Exception as e:
+        current_app.logger.error(f"Error creating bookings: {e}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while creating the bookings'
+        }), 500
+
+
+def _batch_requests(data):
+    """(listing_id, booking_date) pairs from a batch request body."""
+    if 'bookings' in data:
+        items = data['bookings']
+        if not isinstance(items, list) or not all(
+                isinstance(item, dict) and 'listing_id' in item and 'booking_date' in item for item in items):
+            raise ValueError('bookings must be a list of {listing_id, booking_date}')
+        return [(item['listing_id'], item['booking_date']) for item in items]
+
+    if 'listing_id' not in data or 'booking_date' not in data:
+        raise ValueError('Missing required fields: bookings, or listing_id and booking_date')
+    repeat = data.get('repeat') or {}
+    try:
+        every = int(repeat.get('every_days', 7))
+        count = int(repeat.get('count', 1))
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError('repeat must be {every_days, count} with integer values')
+    if every < 1 or count < 1:
+        raise ValueError('repeat.every_days and repeat.count must be positive')
+    if count > Booking.MAX_BATCH:
+        raise ValueError(f'At most {Booking.MAX_BATCH} bookings can be created at once.')
+    try:
+        first = datetime.fromisoformat(data['booking_date'])
+    except (TypeError, ValueError):
+        raise ValueError("Invalid booking date format. Use ISO format (YYYY-MM-DDTHH:MM:SS).")
+    return [(data['listing_id'], first + timedelta(days=every * i)) for i in range(count)]
+
+
 @booking_bp.route('/bookings', methods=['GET'])
 #@login_required
 def get_user_bookings():
@@ -204,8 +348,7 @@ def get_user_bookings():
         
         if role == 'provider':
             # Get provider_id first
-            from backend.models.provider import Provider
-            provider = Provider.get_by_user_id(user_id)
+            provider = current_identity().provider
             
             if not provider:
                 return jsonify({
@@ -394,7 +537,6 @@ def update_booking_status(booking_id):
             }), 404
             
         # Check authorization - need to determine if user is the provider for this booking's listing
-        from backend.models.provider import Provider
         from backend.models.service import Service
         from backend.db import get_db
         
@@ -407,7 +549,7 @@ def update_booking_status(booking_id):
             }), 404
         
         # Get provider profile for current user
-        provider = Provider.get_by_user_id(user_id)
+        provider = current_identity().provider
         is_provider_for_this_listing = (provider and provider.provider_id == listing.provider_id)
         
         # Authorization rules:
@@ -437,7 +579,7 @@ def update_booking_status(booking_id):
             }), 403
             
         # Update booking status
-        updated_booking = Booking.update_status(booking_id, new_status)
+        updated_booking = Booking.update_status(booking_id, new_status, previous=booking)
         
         return jsonify({
             'success': True,
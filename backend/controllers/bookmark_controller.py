@@ -4,8 +4,8 @@ Handles API endpoints for bookmark management.
 Customers can bookmark/unbookmark services.
 """
 from flask import Blueprint, request, jsonify
-import firebase_admin
-from firebase_admin import auth
+from backend.auth import current_uid
+from backend.identity import get_identity
 from backend.models.bookmark import Bookmark
 from backend.models.user import User
 
@@ -23,21 +23,7 @@ def verify_token():
     Raises:
         ValueError: If token is missing or invalid
     """
-    auth_header = request.headers.get('Authorization')
-    print("Received Authorization header:", auth_header)
-    if not auth_header or not auth_header.startswith('Bearer '):
-        raise ValueError("Missing or invalid Authorization header")
-    
-    token = auth_header[len('Bearer '):].strip()
-    if isinstance(token, bytes):
-        print("Decoded token:", decoded_token)
-        token = token.decode('utf-8')
-    try:
-        decoded_token = auth.verify_id_token(token)
-        return decoded_token['uid']
-    except Exception as e:
-        print("Token verification failed:", str(e))
-        raise ValueError(f"Invalid token: {str(e)}")
+    return current_uid()
 
 
 def get_user_role(user_id):
@@ -50,8 +36,7 @@ def get_user_role(user_id):
     Raises:
         ValueError: If user not found
     """
-    user = User.get_by_id(user_id)
-    print(f"User fetched for id {user_id}: {user}")
+    user = get_identity(user_id)
     if not user:
         raise ValueError("User not found")
     return user.role
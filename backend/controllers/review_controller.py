@@ -1,7 +1,10 @@
 from flask import Blueprint, jsonify, current_app, request
+from backend import queries
 from backend.db import get_db
-import firebase_admin
-from firebase_admin import auth, credentials
+from backend.transactions import commit
+from backend.streaming import iter_cursor, stream_json
+from backend.auth import AuthError, verify_id_token
+from backend.analytics import record_review
 
 review_bp = Blueprint("review_bp", __name__)
 
@@ -11,15 +14,28 @@ def verify_token(token):
     Verify Firebase ID token and return user_id.
     Returns: (user_id, error_response)
     """
-    if not token:
-        return None, jsonify({"error": "Missing token"}), 401
-
     try:
-        decoded_token = auth.verify_id_token(token)
-        user_id = decoded_token["uid"]  # Firebase UID
-        return user_id, None
-    except Exception as e:
-        return None, jsonify({"error": "Invalid or expired token"}), 401
+        return verify_id_token(token)["uid"], None
+    except AuthError:
+        return None, (jsonify({"error": "Invalid or expired token"}), 401)
+
+
+def _parse_rating(value):
+    """
+    A rating from a request body as an int from 1 to 5.
+
+    The column's CHECK would also accept 4.5 (stored as REAL), which the
+    integer analytics counters cannot follow, so only whole numbers pass.
+
+    Raises:
+        ValueError: If value is not a whole number from 1 to 5
+    """
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 5:
+        raise ValueError("Rating must be a whole number from 1 to 5")
+    return value
+
 # -----------------------------
 # GET: All reviews for a service/listing
 # -----------------------------
@@ -59,19 +75,11 @@ def get_reviews(listing_id):
     print(f"Fetching reviews for listing_id: {listing_id}")
     
     # First check if reviews exist for this listing
-    all_reviews = db.execute("""
-        SELECT * FROM Reviews WHERE listing_id = ?
-    """, (listing_id,)).fetchall()
+    all_reviews = queries.fetch_all("Review.get_by_listing", (listing_id,), db=db)
     print(f"Found {len(all_reviews)} reviews in Reviews table for listing {listing_id}")
     
     # Now try with JOIN
-    reviews = db.execute("""
-        SELECT r.review_id, r.rating, r.comment, r.created_at, u.display_name AS reviewer
-        FROM Reviews r
-        LEFT JOIN Users u ON r.user_id = u.user_id
-        WHERE r.listing_id = ?
-        ORDER BY r.created_at DESC
-    """, (listing_id,)).fetchall()
+    reviews = queries.fetch_all("Review.get_by_listing_with_reviewer", (listing_id,), db=db)
     
     print(f"After JOIN, found {len(reviews)} reviews")
     result = [dict(r) for r in reviews]
@@ -115,7 +123,9 @@ def add_review(listing_id):
               type: integer
               example: 1
             rating:
-              type: number
+              type: integer
+              minimum: 1
+              maximum: 5
               example: 5
             comment:
               type: string
@@ -131,7 +141,7 @@ def add_review(listing_id):
             review:
               type: object
       400:
-        description: Missing required fields or invalid booking
+        description: Missing required fields, invalid rating or invalid booking
       401:
         description: Unauthorized
       500:
@@ -149,37 +159,21 @@ def add_review(listing_id):
 
     if not all([booking_id, rating]):
         return jsonify({"error": "Missing required fields"}), 400
+    try:
+        rating = _parse_rating(rating)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     db = get_db()
 
-    booking = db.execute(
-        "SELECT * FROM Bookings WHERE booking_id = ? AND user_id = ? AND listing_id = ?",
-        (booking_id, user_id, listing_id)
-    ).fetchone()
+    booking = queries.fetch_one("Booking.get_for_review", (booking_id, user_id, listing_id), db=db)
     if not booking:
         return jsonify({"error": "Invalid booking for this user or service"}), 400
 
     try:
-        cursor = db.execute(
-            """
-            INSERT INTO Reviews (booking_id, user_id, listing_id, rating, comment)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (booking_id, user_id, listing_id, rating, comment)
-        )
-        db.commit()
-
-        review_id = cursor.lastrowid
-        review = db.execute(
-            """
-            SELECT r.review_id, r.rating, r.comment, r.created_at,
-                   u.display_name AS reviewer, r.user_id
-            FROM Reviews r
-            JOIN Users u ON r.user_id = u.user_id
-            WHERE r.review_id = ?
-            """,
-            (review_id,)
-        ).fetchone()
+        review = queries.fetch_one("Review.insert", (booking_id, user_id, listing_id, rating, comment), db=db)
+        commit(db)
+        record_review(listing_id, new_rating=review["rating"], provider_id=booking["provider_id"])
 
         return jsonify(dict(review)), 201
 
@@ -217,7 +211,9 @@ def update_review(review_id):
           type: object
           properties:
             rating:
-              type: number
+              type: integer
+              minimum: 1
+              maximum: 5
               example: 4
             comment:
               type: string
@@ -231,7 +227,7 @@ def update_review(review_id):
             message:
               type: string
       400:
-        description: Nothing to update
+        description: Nothing to update, or invalid rating
       401:
         description: Unauthorized
       404:
@@ -245,27 +241,24 @@ def update_review(review_id):
 
     if rating is None and comment is None:
         return jsonify({"error": "Nothing to update"}), 400
+    if rating is not None:
+        try:
+            rating = _parse_rating(rating)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
     db = get_db()
-    review = db.execute("SELECT * FROM Reviews WHERE review_id = ?", (review_id,)).fetchone()
+    review = queries.fetch_one("Review.get_by_id", (review_id,), db=db)
     if review is None:
         return jsonify({"error": "Review not found"}), 404
 
-    # Build update dynamically based on provided fields
-    updates = []
-    params = []
+    # Fields left out (None) keep their current value
+    updated_review = queries.fetch_one("Review.update", (rating, comment, review_id), db=db)
+    commit(db)
     if rating is not None:
-        updates.append("rating = ?")
-        params.append(rating)
-    if comment is not None:
-        updates.append("comment = ?")
-        params.append(comment)
-    params.append(review_id)
-
-    db.execute(f"UPDATE Reviews SET {', '.join(updates)} WHERE review_id = ?", tuple(params))
-    db.commit()
+        record_review(review["listing_id"], review["rating"], updated_review["rating"],
+                      provider_id=review["provider_id"])
 
-    updated_review = db.execute("SELECT * FROM Reviews WHERE review_id = ?", (review_id,)).fetchone()
     return jsonify({"message": "Review updated successfully", "review": dict(updated_review)}), 200
 
 
@@ -306,11 +299,12 @@ def delete_review(review_id):
         description: Unauthorized
     """
     db = get_db()
-    result = db.execute("DELETE FROM Reviews WHERE review_id = ?", (review_id,))
-    db.commit()
+    review = queries.fetch_one("Review.delete", (review_id,), db=db)
+    commit(db)
 
-    if result.rowcount == 0:
+    if review is None:
         return jsonify({"error": "Review not found"}), 404
+    record_review(review["listing_id"], old_rating=review["rating"], provider_id=review["provider_id"])
 
     return jsonify({"message": "Review deleted successfully"}), 200
 
@@ -347,15 +341,9 @@ def get_average_ratings():
       {"listing_id": 3, "avg_rating": 4.2, "review_count": 2}
     ]
     """
+    # Aggregates are kept on Listings by triggers on Reviews
     db = get_db()
-    rows = db.execute("""
-        SELECT
-            listing_id,
-            ROUND(AVG(rating), 1) AS avg_rating,
-            COUNT(*) AS review_count
-        FROM Reviews
-        GROUP BY listing_id
-    """).fetchall()
+    rows = queries.fetch_all("Service.rating_averages", db=db)
 
     return jsonify([dict(r) for r in rows]), 200
 # -----------------------------
@@ -369,19 +357,7 @@ def get_all_reviews(listing_id):
     db = get_db()
     
     # Fetch all reviews for this listing
-    reviews = db.execute("""
-        SELECT r.review_id,
-               r.rating,
-               r.comment,
-               r.created_at,
-               u.display_name AS reviewer
-        FROM Reviews r
-        LEFT JOIN Users u ON r.user_id = u.user_id
-        WHERE r.listing_id = ?
-        ORDER BY r.created_at DESC
-    """, (listing_id,)).fetchall()
-    
-    # Convert sqlite Row objects to dictionary
-    reviews_list = [dict(r) for r in reviews]
+    reviews = queries.execute("Review.get_by_listing_with_reviewer", (listing_id,), db=db)
     
-    return jsonify(reviews_list), 200
+    # Stream sqlite Row objects out as dictionaries, batch by batch
+    return stream_json(iter_cursor(reviews))
@@ -1,30 +1,35 @@
 from flask import Blueprint, request, jsonify
-from backend.db import get_db
 from backend.models.service import Service
-from backend.models.provider import Provider
-import firebase_admin
+from backend.streaming import stream_json
+from backend.identity import current_identity, require_role
+from backend.analytics import get_provider_analytics
+import base64
+import binascii
+import json
+from urllib.parse import urlencode
 
 service_bp = Blueprint("service_bp", __name__)
 
-def verify_token():
-    """Helper to verify Firebase token and return user_id."""
-    auth_header = request.headers.get('Authorization')
-    if not auth_header:
-        return None, jsonify({'error': 'Authorization header missing'}), 401
-    
-    token = auth_header.split('Bearer ')[-1]
-    try:
-        decoded_token = firebase_admin.auth.verify_id_token(token)
-        return decoded_token['uid'], None, None
-    except Exception as e:
-        return None, jsonify({'error': 'Invalid token'}), 401
+# Page size limits for GET /services
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
 
+def encode_cursor(key):
+    """Encode a (sort value, listing_id) page key as an opaque URL-safe cursor."""
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
 
-def get_user_role(user_id):
-    """Get the role of a user from the database."""
-    db = get_db()
-    row = db.execute("SELECT role FROM Users WHERE user_id = ?", (user_id,)).fetchone()
-    return row['role'] if row else None
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, listing_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(listing_id, int):
+        raise ValueError('Invalid cursor')
+    return value, listing_id
 
 
 # =====================
@@ -32,6 +37,7 @@ def get_user_role(user_id):
 # =====================
 
 @service_bp.route("/provider/services", methods=["POST"])
+@require_role('provider', error='Only providers can add services')
 def provider_add_service():
     """
     Provider Add New Service
@@ -86,17 +92,7 @@ def provider_add_service():
       500:
         description: Server error
     """
-    user_id, error_response, status_code = verify_token()
-    if error_response:
-        return error_response, status_code
-    
-    # Verify user is a provider
-    role = get_user_role(user_id)
-    if role != 'provider':
-        return jsonify({'error': 'Only providers can add services'}), 403
-    
-    # Get provider_id from user_id
-    provider = Provider.get_by_user_id(user_id)
+    provider = current_identity().provider
     if not provider:
         return jsonify({'error': 'Provider profile not found'}), 404
     
@@ -132,6 +128,7 @@ def provider_add_service():
 
 
 @service_bp.route("/provider/services", methods=["GET"])
+@require_role('provider', error='Only providers can access this endpoint')
 def provider_list_services():
     """
     Provider List Own Services
@@ -167,15 +164,7 @@ def provider_list_services():
       404:
         description: Provider profile not found
     """
-    user_id, error_response, status_code = verify_token()
-    if error_response:
-        return error_response, status_code
-    
-    role = get_user_role(user_id)
-    if role != 'provider':
-        return jsonify({'error': 'Only providers can access this endpoint'}), 403
-    
-    provider = Provider.get_by_user_id(user_id)
+    provider = current_identity().provider
     if not provider:
         return jsonify({'error': 'Provider profile not found'}), 404
     
@@ -184,6 +173,7 @@ def provider_list_services():
 
 
 @service_bp.route("/provider/services/<int:listing_id>", methods=["PUT", "PATCH"])
+@require_role('provider', error='Only providers can update services')
 def provider_update_service(listing_id):
     """
     Provider Update Own Service
@@ -234,15 +224,7 @@ def provider_update_service(listing_id):
       500:
         description: Server error
     """
-    user_id, error_response, status_code = verify_token()
-    if error_response:
-        return error_response, status_code
-    
-    role = get_user_role(user_id)
-    if role != 'provider':
-        return jsonify({'error': 'Only providers can update services'}), 403
-    
-    provider = Provider.get_by_user_id(user_id)
+    provider = current_identity().provider
     if not provider:
         return jsonify({'error': 'Provider profile not found'}), 404
     
@@ -291,6 +273,7 @@ def provider_update_service(listing_id):
 
 
 @service_bp.route("/provider/services/<int:listing_id>", methods=["DELETE"])
+@require_role('provider', error='Only providers can delete services')
 def provider_delete_service(listing_id):
     """
     Provider Delete Own Service
@@ -326,15 +309,7 @@ def provider_delete_service(listing_id):
       500:
         description: Failed to delete service
     """
-    user_id, error_response, status_code = verify_token()
-    if error_response:
-        return error_response, status_code
-    
-    role = get_user_role(user_id)
-    if role != 'provider':
-        return jsonify({'error': 'Only providers can delete services'}), 403
-    
-    provider = Provider.get_by_user_id(user_id)
+    provider = current_identity().provider
     if not provider:
         return jsonify({'error': 'Provider profile not found'}), 404
     
@@ -349,6 +324,53 @@ def provider_delete_service(listing_id):
     return jsonify({'error': 'Failed to delete service'}), 500
 
 
+@service_bp.route("/provider/analytics", methods=["GET"])
+@require_role('provider', error='Only providers can view analytics')
+def provider_analytics():
+    """
+    Provider Analytics
+    ---
+    tags:
+      - Provider Services
+    security:
+      - Bearer: []
+    parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: true
+        description: "Firebase JWT token (format: Bearer TOKEN)"
+    responses:
+      200:
+        description: Counters for the provider's current listings (updated within a few seconds of a change)
+        schema:
+          type: object
+          properties:
+            provider_id:
+              type: integer
+            total_services:
+              type: integer
+            total_bookings:
+              type: integer
+              description: Bookings that are not cancelled
+            average_rating:
+              type: number
+              description: null until the first review
+            review_count:
+              type: integer
+            last_updated:
+              type: string
+      403:
+        description: User is not a provider
+      404:
+        description: Provider profile not found
+    """
+    provider = current_identity().provider
+    if not provider:
+        return jsonify({'error': 'Provider profile not found'}), 404
+    return jsonify(get_provider_analytics(provider.provider_id))
+
+
 # =====================
 # Consumer routes
 # =====================
@@ -367,9 +389,40 @@ def list_services():
         required: false
         default: approved
         description: Filter services by status
+      - name: category_id
+        in: query
+        type: integer
+        required: false
+        description: Only services in this category
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: "Page size (capped at 500). Without limit or cursor every matching service is returned in one response."
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Value of X-Next-Cursor from the previous page
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated columns to return, e.g. listing_id,latitude,longitude,price"
+      - name: sort
+        in: query
+        type: string
+        required: false
+        default: newest
+        enum: [newest, rating]
+        description: "newest first, or best average rating first (unrated listings last)"
     responses:
       200:
-        description: List of services
+        description: One page of services, in the requested order. X-Next-Cursor header is set when more pages follow.
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor for the next page
         schema:
           type: array
           items:
@@ -391,12 +444,162 @@ def list_services():
                 type: string
               created_at:
                 type: string
+              avg_rating:
+                type: number
+                description: Mean review rating, null when unrated
+              review_count:
+                type: integer
+      400:
+        description: Invalid cursor, unknown field or unknown sort
     """
     # Optional: verify token if you want to restrict to logged-in users
     # For now, make it public or only show approved services
     status_filter = request.args.get('status', 'approved')
-    services = Service.list_all(status=status_filter)
-    return jsonify([s.to_dict() for s in services])
+    category_id = request.args.get('category_id', type=int)
+    if 'limit' in request.args or 'cursor' in request.args:
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    else:
+        # Clients that predate paging fetch once and expect everything
+        limit = None
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    sort = request.args.get('sort', 'newest')
+
+    try:
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+        services, next_key = Service.list_page(
+            status=status_filter, limit=limit, after=after, fields=fields or None, sort=sort,
+            category_id=category_id,
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    items = services if fields else (s.to_dict() for s in services)
+    headers = {}
+    if next_key is not None:
+        next_cursor = encode_cursor(next_key)
+        headers['X-Next-Cursor'] = next_cursor
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        args['limit'] = limit
+        next_url = f"{request.base_url}?{urlencode(args)}"
+        headers['Link'] = f'<{next_url}>; rel="next"'
+    return stream_json(items, headers=headers)
+
+
+@service_bp.route("/services/search", methods=["GET"])
+def search_services():
+    """
+    Search Services (Full-Text)
+    ---
+    tags:
+      - Consumer Services
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Search text; the last word also matches as a prefix (e.g. "home tut")
+        example: "home tutor"
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        default: 20
+        description: Maximum number of results (capped at 100)
+    responses:
+      200:
+        description: Approved services ranked by relevance (BM25)
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              listing_id:
+                type: integer
+              title:
+                type: string
+              rank:
+                type: number
+              snippet:
+                type: string
+                description: Best-matching excerpt with <mark> highlights
+              title_highlight:
+                type: string
+      400:
+        description: Missing search text
+    """
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'q param required'}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    return jsonify(Service.search(text, status='approved', limit=limit))
+
+
+@service_bp.route("/services/nearby", methods=["GET"])
+def nearby_services():
+    """
+    Nearby Services
+    ---
+    tags:
+      - Consumer Services
+    parameters:
+      - name: lat
+        in: query
+        type: number
+        required: true
+        example: 1.3521
+      - name: lng
+        in: query
+        type: number
+        required: true
+        example: 103.8198
+      - name: radius
+        in: query
+        type: number
+        required: false
+        default: 3.0
+        description: Search radius in km (capped at 50)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        default: 20
+        description: Maximum number of results (capped at 100)
+    responses:
+      200:
+        description: Approved services within the radius, nearest first
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              listing_id:
+                type: integer
+              title:
+                type: string
+              latitude:
+                type: number
+              longitude:
+                type: number
+              distance_km:
+                type: number
+      400:
+        description: Missing or invalid coordinates
+    """
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    if lat is None or lng is None:
+        return jsonify({'error': 'lat and lng params required'}), 400
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({'error': 'lat/lng out of range'}), 400
+    radius = request.args.get('radius', 3.0, type=float)
+    if radius <= 0:
+        return jsonify({'error': 'radius must be positive'}), 400
+    radius = min(radius, 50.0)
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    return jsonify(Service.nearby(lat, lng, radius, limit=limit, status='approved'))
 
 
 @service_bp.route("/services/<int:listing_id>", methods=["GET"])
@@ -448,6 +651,7 @@ def get_service(listing_id):
 # =====================
 
 @service_bp.route("/admin/services/<int:listing_id>", methods=["DELETE"])
+@require_role('admin', error='Only admins can delete any service')
 def admin_delete_service(listing_id):
     """
     Admin Delete Any Service
@@ -482,14 +686,6 @@ def admin_delete_service(listing_id):
       500:
         description: Failed to delete service
     """
-    user_id, error_response, status_code = verify_token()
-    if error_response:
-        return error_response, status_code
-    
-    role = get_user_role(user_id)
-    if role != 'admin':
-        return jsonify({'error': 'Only admins can delete any service'}), 403
-    
     service = Service.get_by_id(listing_id)
     if not service:
         return jsonify({'error': 'Service not found'}), 404
@@ -500,6 +696,7 @@ def admin_delete_service(listing_id):
 
 
 @service_bp.route("/admin/services/<int:listing_id>/approve", methods=["POST"])
+@require_role('admin', error='Only admins can approve services')
 def admin_approve_service(listing_id):
     """
     Admin Approve Pending Service
@@ -536,14 +733,6 @@ def admin_approve_service(listing_id):
       500:
         description: Failed to approve service
     """
-    user_id, error_response, status_code = verify_token()
-    if error_response:
-        return error_response, status_code
-    
-    role = get_user_role(user_id)
-    if role != 'admin':
-        return jsonify({'error': 'Only admins can approve services'}), 403
-    
     service = Service.update(listing_id, status='approved')
     if service:
         return jsonify({'message': 'Service approved', 'service': service.to_dict()})
@@ -551,6 +740,7 @@ def admin_approve_service(listing_id):
 
 
 @service_bp.route("/admin/services/<int:listing_id>/reject", methods=["POST"])
+@require_role('admin', error='Only admins can reject services')
 def admin_reject_service(listing_id):
     """
     Admin Reject Pending Service
@@ -585,14 +775,6 @@ def admin_reject_service(listing_id):
       404:
         description: Service not found
     """
-    user_id, error_response, status_code = verify_token()
-    if error_response:
-        return error_response, status_code
-    
-    role = get_user_role(user_id)
-    if role != 'admin':
-        return jsonify({'error': 'Only admins can reject services'}), 403
-    
     service = Service.update(listing_id, status='rejected')
     if service:
         return jsonify({'message': 'Service rejected', 'service': service.to_dict()})
@@ -600,6 +782,7 @@ def admin_reject_service(listing_id):
 
 
 @service_bp.route("/admin/services", methods=["GET"])
+@require_role('admin', error='Only admins can view all services')
 def admin_list_all_services():
     """
     Admin List All Services (All Statuses)
@@ -646,14 +829,5 @@ def admin_list_all_services():
       403:
         description: Not authorized (admin only)
     """
-    user_id, error_response, status_code = verify_token()
-    if error_response:
-        return error_response, status_code
-    
-    role = get_user_role(user_id)
-    if role != 'admin':
-        return jsonify({'error': 'Only admins can view all services'}), 403
-    
     status_filter = request.args.get('status')  # optional filter
-    services = Service.list_all(status=status_filter)
-    return jsonify([s.to_dict() for s in services])
+    return stream_json(s.to_dict() for s in Service.iter_all(status=status_filter))
@@ -3,19 +3,40 @@ from datetime import datetime
 import click
 from flask import current_app, g
 
+from backend import migrate
 from backend.factory.database_factory import DatabaseFactory
 
 
-def get_db():
-    if 'db' not in g:
-        database_path = current_app.config['DATABASE']
-        db_type = current_app.config.get('DB_TYPE', 'sqlite')
+def _connection_options():
+    """Per-connection settings for the configured database type."""
+    config = current_app.config
+    if config.get('DB_TYPE', 'sqlite').lower() != 'sqlite':
+        return {}
+    return {
+        'pragmas': config.get('SQLITE_PRAGMAS'),
+        'warmup_queries': config.get('SQLITE_WARMUP_QUERIES'),
+        'cached_statements': config.get('SQLITE_CACHED_STATEMENTS'),
+    }
+
+
+def get_pool():
+    """Return the process-wide connection pool for the configured database."""
+    return DatabaseFactory.getPool(
+        current_app.config.get('DB_TYPE', 'sqlite'),
+        current_app.config['DATABASE'],
+        max_size=current_app.config.get('DB_POOL_SIZE', 10),
+        min_size=current_app.config.get('DB_POOL_MIN_SIZE', 1),
+        timeout=current_app.config.get('DB_POOL_TIMEOUT', 10.0),
+        options=_connection_options(),
+    )
 
-        print(f"[Database] Connecting using factory: type={db_type}, path={database_path}")
 
-        db_interface = DatabaseFactory.getDatabase(db_type)
-        db_interface.connect(database_path)
+def get_db():
+    if 'db' not in g:
+        pool = get_pool()
+        db_interface = pool.checkout()
 
+        g._db_pool = pool
         g._db_interface = db_interface
         g.db = db_interface.get_connection()
 
@@ -23,27 +44,19 @@ def get_db():
 
 
 def close_db(e=None):
+    pool = g.pop('_db_pool', None)
     db_interface = g.pop('_db_interface', None)
-    db_connection = g.pop('db', None)
+    g.pop('db', None)
 
-    if db_interface is not None:
-        try:
-            db_interface.close()
-            db_connection = None  # interface handled closure
-        except Exception as err:
-            print(f"[Database] Error while closing interface: {err}")
-
-    if db_connection is not None:
-        try:
-            db_connection.close()
-        except Exception as err:
-            print(f"[Database] Error while closing connection: {err}")
+    if pool is not None and db_interface is not None:
+        # Hand the connection back to the pool instead of closing it
+        pool.checkin(db_interface)
 
 
 def init_db():
+    """Drop all tables and rebuild the schema at the latest migration version."""
     db = get_db()
-    with current_app.open_resource('schema.sql') as f:
-        db.executescript(f.read().decode('utf8'))
+    migrate.reset(db)
 
 
 @click.command('init-db')
@@ -53,6 +66,25 @@ def init_db_command():
     click.echo('Initialized the database.')
 
 
+@click.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations without touching existing data."""
+    applied = migrate.migrate(get_db())
+    if applied:
+        for name in applied:
+            click.echo(f'Applied {name}')
+    else:
+        click.echo('Database is up to date.')
+    click.echo(f'Schema version: {migrate.current_version(get_db())}')
+
+
+def ensure_schema():
+    """Cheap startup check; migrates only when the database is behind."""
+    applied = migrate.ensure_schema(get_db())
+    for name in applied:
+        print(f"[Database] Applied migration {name}")
+
+
 # Register a converter so SQLite timestamps convert to datetime objects automatically
 sqlite3.register_converter(
     "timestamp", lambda v: datetime.fromisoformat(v.decode())
@@ -351,20 +383,24 @@ def seed_db_command():
     (2, 1);
     """)
 
-    # Seed Provider Analytics
-    db.executescript("""
-    INSERT INTO Provider_Analytics (provider_id, total_services, average_rating, total_bookings) VALUES
-    (1, 1, 5.0, 1),
-    (4, 1, 4.0, 1),
-    (12, 1, 0, 1);
-    """)
-
     db.commit()
+
+    # Provider analytics are derived from the rows above
+    from backend.analytics import rebuild_provider_analytics
+    rebuild_provider_analytics(db)
     click.echo("✅ Database seeded successfully with full demo data!")
 
 
 def init_app(app):
+    from backend.analytics import rebuild_analytics_command
+    from backend.query_plans import check_query_plans_command
+    from backend import transactions
+
     # Register functions with Flask app
+    transactions.init_app(app)
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
     app.cli.add_command(seed_db_command)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(rebuild_analytics_command)
@@ -1,6 +1,14 @@
 """Factory package providing abstracted creation utilities."""
 
-from .database_factory import DatabaseFactory, DatabaseInterface, SQLiteDatabase, MongoDatabase, PostgreSQLDatabase
+from .database_factory import (
+    DatabaseFactory,
+    DatabaseInterface,
+    SQLiteDatabase,
+    MongoDatabase,
+    PostgreSQLDatabase,
+    ConnectionPool,
+    PoolTimeoutError,
+)
 
 __all__ = [
     "DatabaseFactory",
@@ -8,4 +16,6 @@ __all__ = [
     "SQLiteDatabase",
     "MongoDatabase",
     "PostgreSQLDatabase",
+    "ConnectionPool",
+    "PoolTimeoutError",
 ]
@@ -8,8 +8,11 @@ need for it in the future.
 """
 
 from abc import ABC, abstractmethod
+import os
 import sqlite3
-from typing import Any
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 
 class DatabaseInterface(ABC):
@@ -32,13 +35,60 @@ class DatabaseInterface(ABC):
         """Close the database connection."""
         pass
 
+    def reset(self):
+        """
+        Return the connection to a clean state before it is reused.
+
+        Called by ConnectionPool on check-in. The default is a no-op;
+        implementations should discard any uncommitted work here.
+        """
+        pass
+
 
 class SQLiteDatabase(DatabaseInterface):
-    """SQLite database implementation."""
-    
-    def __init__(self):
+    """
+    SQLite database implementation.
+
+    Every new connection gets the PRAGMA profile below. WAL lets readers
+    keep working while a writer commits, which matters for a read-heavy
+    catalog (browsing /api/services while bookings are being written).
+    """
+
+    DEFAULT_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",     # safe with WAL, avoids an fsync per commit
+        "busy_timeout": 5000,        # ms to wait on a locked database
+        "cache_size": -16000,        # negative = KiB, i.e. 16 MB page cache
+        "mmap_size": 134217728,      # 128 MB memory-mapped I/O
+        "temp_store": "MEMORY",
+    }
+
+    # sqlite3's default (128) is smaller than the named queries plus their
+    # request-shaped variants, so hot statements would be recompiled
+    DEFAULT_CACHED_STATEMENTS = 256
+
+    # Reads that pull the hot tables into the page cache of a new connection
+    HOT_TABLE_WARMUP = (
+        "SELECT * FROM Listings",
+        "SELECT * FROM Providers",
+        "SELECT * FROM Categories",
+    )
+
+    def __init__(self, pragmas: Optional[Dict[str, Any]] = None,
+                 warmup_queries: Optional[Iterable[str]] = None,
+                 cached_statements: Optional[int] = None):
+        """
+        Args:
+            pragmas: Overrides merged over DEFAULT_PRAGMAS (None values drop a pragma)
+            warmup_queries: Optional SELECTs run once right after connecting
+            cached_statements: Size of the connection's compiled statement
+                cache (DEFAULT_CACHED_STATEMENTS if None)
+        """
         self.connection = None
-    
+        self.pragmas = {**self.DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.warmup_queries = tuple(warmup_queries or ())
+        self.cached_statements = cached_statements or self.DEFAULT_CACHED_STATEMENTS
+
     def connect(self, database_path: str):
         """
         Connect to SQLite database.
@@ -46,11 +96,33 @@ class SQLiteDatabase(DatabaseInterface):
         Args:
             database_path: Path to SQLite database file
         """
+        # check_same_thread=False: pooled connections are handed to whichever
+        # request thread checks them out. The pool guarantees a single owner.
         self.connection = sqlite3.connect(
             database_path,
-            detect_types=sqlite3.PARSE_DECLTYPES
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
         )
         self.connection.row_factory = sqlite3.Row
+        self.apply_pragmas()
+        self.warm_up()
+
+    def apply_pragmas(self):
+        """Apply the PRAGMA profile to the open connection."""
+        for name, value in self.pragmas.items():
+            if value is None:
+                continue
+            self.connection.execute(f"PRAGMA {name} = {value}")
+
+    def warm_up(self):
+        """Run the warm-up queries, ignoring tables that do not exist yet."""
+        for query in self.warmup_queries:
+            try:
+                for _ in self.connection.execute(query):
+                    pass
+            except sqlite3.OperationalError as err:
+                print(f"[Database] Warm-up query skipped ({err}): {query}")
     
     def get_connection(self) -> sqlite3.Connection:
         """Get SQLite connection."""
@@ -62,6 +134,11 @@ class SQLiteDatabase(DatabaseInterface):
             self.connection.close()
             self.connection = None
 
+    def reset(self):
+        """Roll back anything the previous request left uncommitted."""
+        if self.connection is not None and self.connection.in_transaction:
+            self.connection.rollback()
+
 
 class MongoDatabase(DatabaseInterface):
     """
@@ -145,6 +222,171 @@ class PostgreSQLDatabase(DatabaseInterface):
             self.connection = None
 
 
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available within the timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of DatabaseInterface instances.
+
+    Connections are opened lazily up to ``max_size`` and reused in LIFO
+    order, so the most recently used (warmest) connection is handed out
+    first. ``min_size`` connections are opened eagerly when the pool is
+    created.
+
+    Usage:
+        pool = DatabaseFactory.getPool('sqlite', './instance/localconnectusers.sqlite')
+        db = pool.checkout()
+        try:
+            db.get_connection().execute("SELECT 1")
+        finally:
+            pool.checkin(db)
+    """
+
+    def __init__(self, db_type: str, database_path: str, max_size: int = 10,
+                 min_size: int = 1, timeout: float = 10.0,
+                 options: Optional[Dict[str, Any]] = None):
+        self.db_type = db_type
+        self.database_path = database_path
+        self.options = dict(options or {})
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._pid = os.getpid()
+
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+        for _ in range(min(int(min_size), self.max_size)):
+            self._idle.append(self._open())
+            self._size += 1
+
+    def _open(self) -> DatabaseInterface:
+        # Connection setup (pragmas, warm-up) runs once here, not per request
+        db = DatabaseFactory.getDatabase(self.db_type, **self.options)
+        db.connect(self.database_path)
+        return db
+
+    def _check_fork(self):
+        """Forget connections inherited from a parent process (e.g. Gunicorn preload)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._size = 0
+            self._in_use = 0
+
+    def checkout(self) -> DatabaseInterface:
+        """
+        Take a connection from the pool, opening a new one if below max_size.
+
+        Raises:
+            PoolTimeoutError: If the pool stays saturated for ``timeout`` seconds
+        """
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        db = None
+        with self._cond:
+            self._check_fork()
+            waited = False
+            while True:
+                if self._idle:
+                    db = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            wait = time.perf_counter() - start
+            self._checkouts += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            if waited:
+                self._waits += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        if db is None:
+            try:
+                db = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return db
+
+    def checkin(self, db: DatabaseInterface):
+        """Return a connection to the pool, discarding it if it cannot be reset."""
+        healthy = True
+        try:
+            db.reset()
+        except Exception as err:
+            print(f"[Database] Discarding pooled connection: {err}")
+            healthy = False
+            try:
+                db.close()
+            except Exception:
+                pass
+
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._in_use = max(0, self._in_use - 1)
+            if healthy:
+                self._idle.append(db)
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection. Checked-out connections are left to their owners."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for db in idle:
+            try:
+                db.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool usage: size, checkout wait times and saturation."""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "saturation": self._in_use / self.max_size,
+                "checkouts": checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (self._total_wait / checkouts * 1000) if checkouts else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+            }
+
+
 class DatabaseFactory:
     """
     Factory class for creating database instances.
@@ -157,15 +399,22 @@ class DatabaseFactory:
         # Future: Get MongoDB database
         db = DatabaseFactory.getDatabase('mongodb')
         db.connect('mongodb://localhost:27017/localconnect')
+
+        # Process-wide pool of connections to the same database
+        pool = DatabaseFactory.getPool('sqlite', './instance/localconnectusers.sqlite')
     """
+
+    _pools: Dict[Tuple[str, str], ConnectionPool] = {}
+    _pools_lock = threading.Lock()
     
     @staticmethod
-    def getDatabase(type: str) -> DatabaseInterface:
+    def getDatabase(type: str, **options) -> DatabaseInterface:
         """
         Create and return appropriate database instance.
         
         Args:
             type: Database type - "sqlite", "mongodb", or "postgresql"
+            **options: Implementation-specific settings (e.g. SQLite pragmas)
         
         Returns:
             DatabaseInterface implementation
@@ -177,11 +426,49 @@ class DatabaseFactory:
         """
         match type.lower():
             case 'sqlite':
-                return SQLiteDatabase()
+                return SQLiteDatabase(**options)
             case 'mongodb' | 'mongo':
                 return MongoDatabase()
             case 'postgresql' | 'postgres':
                 return PostgreSQLDatabase()
             case _:
                 # Default to SQLite
-                return SQLiteDatabase()
+                return SQLiteDatabase(**options)
+
+    @staticmethod
+    def getPool(type: str, database_path: str, max_size: int = 10, min_size: int = 1,
+                timeout: float = 10.0, options: Optional[Dict[str, Any]] = None) -> ConnectionPool:
+        """
+        Return the process-wide ConnectionPool for a database, creating it once.
+
+        Args:
+            type: Database type, as accepted by getDatabase
+            database_path: Path or connection string of the database
+            max_size: Maximum number of open connections
+            min_size: Connections opened eagerly when the pool is created
+            timeout: Seconds to wait for a free connection before failing
+            options: Passed to getDatabase for every connection the pool opens
+
+        Returns:
+            ConnectionPool shared by every caller using the same type and path
+        """
+        key = (type.lower(), database_path)
+        pool = DatabaseFactory._pools.get(key)
+        if pool is None:
+            with DatabaseFactory._pools_lock:
+                pool = DatabaseFactory._pools.get(key)
+                if pool is None:
+                    print(f"[Database] Creating connection pool: type={type}, path={database_path}, max_size={max_size}")
+                    pool = ConnectionPool(type, database_path, max_size=max_size,
+                                          min_size=min_size, timeout=timeout, options=options)
+                    DatabaseFactory._pools[key] = pool
+        return pool
+
+    @staticmethod
+    def closeAllPools():
+        """Close idle connections in every pool and forget the pools."""
+        with DatabaseFactory._pools_lock:
+            pools = list(DatabaseFactory._pools.values())
+            DatabaseFactory._pools.clear()
+        for pool in pools:
+            pool.close_all()
@@ -0,0 +1,203 @@
+"""
+Geographic helpers shared by the models and controllers.
+
+Distances are great-circle distances in kilometres on a spherical Earth,
+which is accurate to well under 1% at Singapore's scale.
+
+PointIndex answers nearest-N and within-radius queries over a fixed set
+of points (e.g. the features of one downloaded dataset) with vectorized
+NumPy haversine, so the per-point work happens once when the index is
+built rather than on every request.
+
+svy21_to_wgs84() converts SVY21 grid coordinates, which data.gov.sg uses
+for many datasets, to latitude/longitude for whole columns at once.
+"""
+from math import asin, cos, degrees, radians, sin, sqrt
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two (lat, lon) points in degrees."""
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Smallest lat/lng box containing every point within radius_km of (lat, lng).
+
+    Returns:
+        tuple: (min_lat, max_lat, min_lng, max_lng) in degrees
+    """
+    dlat = degrees(radius_km / EARTH_RADIUS_KM)
+    # Longitude degrees shrink with cos(latitude); near the poles the box
+    # spans every longitude
+    cos_lat = cos(radians(min(89.9, abs(lat) + dlat)))
+    dlng = min(180.0, dlat / cos_lat)
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+# SVY21 (Singapore's national grid) as a transverse Mercator projection
+SVY21_PARAMS = dict(proj='tmerc', lat_0=1.366666, lon_0=103.833333,
+                    k=1.0, x_0=28001.642, y_0=38744.572, ellps='WGS84')
+
+_svy21_transformer = None
+
+
+def svy21_transformer():
+    """The shared SVY21 -> WGS84 pyproj Transformer (built on first use)."""
+    global _svy21_transformer
+    if _svy21_transformer is None:
+        from pyproj import Proj, Transformer
+        _svy21_transformer = Transformer.from_proj(
+            Proj(**SVY21_PARAMS), Proj(proj='latlong', datum='WGS84'))
+    return _svy21_transformer
+
+
+def parse_coordinates(values):
+    """
+    Parse a column of coordinate values into a float array.
+
+    Missing or unparseable values become NaN.
+    """
+    try:
+        # Fast path: the whole column converts cleanly in C
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+    out = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            out[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+
+def svy21_to_wgs84(xs, ys):
+    """
+    Reproject SVY21 eastings/northings to WGS84 in a single transform call.
+
+    Args:
+        xs, ys: Sequences of eastings/northings (strings, numbers or None)
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (lats, lngs); NaN where the input
+        was missing, unparseable or did not transform to a finite point
+    """
+    x = parse_coordinates(xs)
+    y = parse_coordinates(ys)
+    valid = np.isfinite(x) & np.isfinite(y)
+    lats = np.full(len(x), np.nan)
+    lngs = np.full(len(x), np.nan)
+    if valid.any():
+        lngs[valid], lats[valid] = svy21_transformer().transform(x[valid], y[valid])
+    bad = ~(np.isfinite(lats) & np.isfinite(lngs))
+    lats[bad] = np.nan
+    lngs[bad] = np.nan
+    return lats, lngs
+
+
+def nan_to_none(values):
+    """Array of floats -> list with None in place of NaN, ready for JSON."""
+    return [None if v != v else float(v) for v in values.tolist()]
+
+
+class PointIndex:
+    """
+    Fixed set of points with vectorized distance queries.
+
+    Points without coordinates (NaN) are kept so positions line up with the
+    source list, but never match a query.
+    """
+
+    def __init__(self, lats, lngs):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        if self.lats.shape != self.lngs.shape:
+            raise ValueError("lats and lngs must have the same length")
+        self._lat_rad = np.radians(self.lats)
+        self._lng_rad = np.radians(self.lngs)
+        self._cos_lat = np.cos(self._lat_rad)
+
+    def __len__(self):
+        return len(self.lats)
+
+    @classmethod
+    def from_points(cls, points, lat_key="lat", lng_key="lng"):
+        """Build from dicts holding lat/lng values (None for unknown)."""
+        lats = [p.get(lat_key) for p in points]
+        lngs = [p.get(lng_key) for p in points]
+        return cls(
+            [np.nan if v is None else v for v in lats],
+            [np.nan if v is None else v for v in lngs],
+        )
+
+    @classmethod
+    def from_geojson(cls, features):
+        """
+        Build from GeoJSON features, one point per feature.
+
+        Point geometries are used as-is; anything else is reduced to its
+        centroid with shapely, in one vectorized call.
+        """
+        import shapely
+        from shapely.geometry import shape
+
+        lats = np.full(len(features), np.nan)
+        lngs = np.full(len(features), np.nan)
+        others, positions = [], []
+        for i, feature in enumerate(features):
+            geometry = feature.get("geometry")
+            if not geometry:
+                continue
+            if geometry.get("type") == "Point":
+                lngs[i], lats[i] = geometry["coordinates"][:2]
+            else:
+                others.append(shape(geometry))
+                positions.append(i)
+        if others:
+            centroids = shapely.centroid(np.array(others, dtype=object))
+            lngs[positions] = shapely.get_x(centroids)
+            lats[positions] = shapely.get_y(centroids)
+        return cls(lats, lngs)
+
+    def distances(self, lat, lng):
+        """Distance in km from (lat, lng) to every point (NaN where unknown)."""
+        lat_rad, lng_rad = radians(lat), radians(lng)
+        a = (np.sin((self._lat_rad - lat_rad) / 2) ** 2
+             + cos(lat_rad) * self._cos_lat * np.sin((self._lng_rad - lng_rad) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def nearest(self, lat, lng, n):
+        """
+        The n points closest to (lat, lng), nearest first.
+
+        Returns:
+            list[tuple[int, float]]: (position, distance_km) pairs
+        """
+        dist = self.distances(lat, lng)
+        valid = np.flatnonzero(~np.isnan(dist))
+        if n < len(valid):
+            valid = valid[np.argpartition(dist[valid], n)[:n]]
+        order = valid[np.argsort(dist[valid], kind="stable")]
+        return [(int(i), float(dist[i])) for i in order]
+
+    def within(self, lat, lng, radius_km, limit=None):
+        """
+        Points within radius_km of (lat, lng), nearest first.
+
+        Returns:
+            list[tuple[int, float]]: (position, distance_km) pairs
+        """
+        dist = self.distances(lat, lng)
+        hits = np.flatnonzero(dist <= radius_km)
+        order = hits[np.argsort(dist[hits], kind="stable")]
+        if limit is not None:
+            order = order[:limit]
+        return [(int(i), float(dist[i])) for i in order]
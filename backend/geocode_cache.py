@@ -0,0 +1,124 @@
+"""
+Two-tier geocode cache.
+
+Tier 1 is an in-process LRU with a TTL, so repeated lookups in one worker
+cost a dict access. Tier 2 is the Geocode_Cache table, shared by every
+worker and kept across restarts, so a redeploy does not re-pay the Google
+Geocoding calls. Keys are normalised addresses, so "1 Raffles Place,
+Singapore" and "1  raffles place, singapore " share one entry.
+"""
+import re
+import threading
+import time
+
+from cachetools import TTLCache
+
+from backend.db import get_db
+from backend.transactions import commit
+
+MEMORY_MAXSIZE = 10000
+MEMORY_TTL = 24 * 60 * 60       # 24 hours
+PERSISTENT_TTL = 30 * 24 * 60 * 60  # 30 days
+
+
+def normalize_address(address):
+    """Lower-case, trim and collapse whitespace/comma runs in an address."""
+    address = re.sub(r"\s*,\s*", ", ", address.strip().lower())
+    return re.sub(r"\s+", " ", address).strip(" ,")
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that counts LRU evictions and TTL expiries."""
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl)
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def clear(self):
+        # MutableMapping.clear() goes through popitem(); not an eviction
+        evictions = self.evictions
+        super().clear()
+        self.evictions = evictions
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+
+class GeocodeCache:
+    """
+    Address -> {"lat", "lng"} cache shared by the geocoding endpoints.
+
+    get() and set() touch the database, so call them inside a request or
+    app context.
+    """
+
+    def __init__(self, maxsize=MEMORY_MAXSIZE, ttl=MEMORY_TTL, persistent_ttl=PERSISTENT_TTL):
+        self.persistent_ttl = persistent_ttl
+        self._memory = _CountingTTLCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, address):
+        """Return the cached location for an address, or None."""
+        key = normalize_address(address)
+        with self._lock:
+            loc = self._memory.get(key)
+            if loc is not None:
+                self.memory_hits += 1
+                return loc
+
+        row = get_db().execute(
+            "SELECT lat, lng, updated_at FROM Geocode_Cache WHERE address = ?", (key,)
+        ).fetchone()
+        with self._lock:
+            if row is None or time.time() - row["updated_at"] >= self.persistent_ttl:
+                self.misses += 1
+                return None
+            loc = {"lat": row["lat"], "lng": row["lng"]}
+            self._memory[key] = loc
+            self.db_hits += 1
+        return loc
+
+    def set(self, address, lat, lng):
+        """Store a location in both tiers and return it."""
+        key = normalize_address(address)
+        loc = {"lat": lat, "lng": lng}
+        db = get_db()
+        db.execute(
+            "INSERT OR REPLACE INTO Geocode_Cache (address, lat, lng, updated_at) VALUES (?, ?, ?, ?)",
+            (key, lat, lng, time.time()),
+        )
+        commit(db)
+        with self._lock:
+            self._memory[key] = loc
+        return loc
+
+    def clear_memory(self):
+        """Drop the in-process tier; the table is left alone."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters for both tiers."""
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "memory_size": len(self._memory),
+                "memory_maxsize": self._memory.maxsize,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else None,
+                "evictions": self._memory.evictions,
+                "expirations": self._memory.expirations,
+            }
@@ -0,0 +1,108 @@
+"""
+Batch geocoding against the Google Geocoding API.
+
+geocode_batch() de-duplicates the addresses, answers what it can from the
+geocode cache and sends the rest to Google over a bounded thread pool.
+Results are yielded in input order as soon as each one (and everything
+before it) is ready, so a caller can stream them out and total latency
+tracks the slowest round trip rather than the sum of all of them.
+
+Worker threads only make HTTP calls; every cache read and write happens
+in the caller's thread, which holds the Flask request context.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from backend import http_client
+from backend.geocode_cache import normalize_address
+
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+# Upper bound on in-flight requests to one host across the whole process,
+# however many batches are running at once
+MAX_CONCURRENCY_PER_HOST = 8
+MAX_WORKERS = 8
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+def host_limit(url):
+    """Process-wide semaphore capping concurrent requests to url's host."""
+    host = urlparse(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(MAX_CONCURRENCY_PER_HOST)
+        return _host_limits[host]
+
+
+def fetch_geocode(address, api_key, timeout=None):
+    """
+    Geocode one address with Google.
+
+    Returns:
+        dict | None: {"lat", "lng"}, or None if there is no result or the call fails
+    """
+    params = {"address": address, "key": api_key}
+    try:
+        with host_limit(GOOGLE_GEOCODE_URL):
+            resp = http_client.get(GOOGLE_GEOCODE_URL, params=params, timeout=timeout)
+        resp.raise_for_status()
+        results = resp.json().get("results")
+    except (requests.RequestException, ValueError):
+        return None
+    if not results:
+        return None
+    loc = results[0]["geometry"]["location"]
+    return {"lat": loc["lat"], "lng": loc["lng"]}
+
+
+def geocode_batch(addresses, api_key, cache, max_workers=MAX_WORKERS, timeout=None):
+    """
+    Geocode many addresses concurrently.
+
+    Args:
+        addresses: Addresses in the order results should come back
+        api_key: Google Maps API key
+        cache: GeocodeCache consulted before, and filled after, each call
+
+    Yields:
+        tuple[str, dict | None]: (address, location) in input order
+    """
+    results = {}
+    pending = []
+    for address in addresses:
+        key = normalize_address(address)
+        if key in results:
+            continue
+        loc = cache.get(address)
+        if loc is not None:
+            results[key] = loc
+        else:
+            pending.append(key)
+            results[key] = None
+
+    if not pending:
+        for address in addresses:
+            yield address, results[normalize_address(address)]
+        return
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(pending)))
+    try:
+        futures = {key: pool.submit(fetch_geocode, key, api_key, timeout) for key in pending}
+        for address in addresses:
+            key = normalize_address(address)
+            future = futures.pop(key, None)
+            if future is not None:
+                loc = future.result()
+                if loc is not None:
+                    loc = cache.set(address, loc["lat"], loc["lng"])
+                results[key] = loc
+            yield address, results[key]
+    finally:
+        # A client that disconnects mid-stream closes the generator; don't
+        # keep paying for lookups nobody will read
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,298 @@
+"""
+Outbound HTTP layer for the external API controllers.
+
+One pooled requests.Session per upstream host (keep-alive, so repeated
+calls skip the TCP+TLS handshake), per-host timeouts, jittered
+exponential-backoff retries and a circuit breaker per host. get_json()
+also remembers the last good payload for the most recent requests (a small
+LRU), and serves it while the upstream is failing or its circuit is open.
+
+    from backend import http_client
+    data = http_client.get_json("https://api.data.gov.sg/v1/...")
+
+Per-host call counts, retries, failures, breaker state and a latency
+histogram are available from http_client.stats().
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 30)
+HOST_TIMEOUTS = {
+    "api.data.gov.sg": (3.05, 10),
+    "api-open.data.gov.sg": (3.05, 10),
+    "data.gov.sg": (3.05, 20),
+    "maps.googleapis.com": (3.05, 10),
+    "www.googleapis.com": (3.05, 10),
+}
+
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.2   # seconds; doubles per attempt, with +/-50% jitter
+BACKOFF_MAX = 2.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+FAILURE_THRESHOLD = 5   # consecutive failures before the circuit opens
+RESET_TIMEOUT = 30.0    # seconds the circuit stays open before a trial call
+
+POOL_MAXSIZE = 16
+FALLBACK_ENTRIES = 32   # last-good payloads kept; keys include caller-supplied params
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class UpstreamUnavailable(requests.exceptions.RequestException):
+    """Raised instead of calling a host whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open after FAILURE_THRESHOLD failures -> half-open after RESET_TIMEOUT."""
+
+    def __init__(self, host, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        """Whether a call may go out now. Half-open lets one trial call through."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                print(f"[HTTP] Circuit closed for {self.host}")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f"[HTTP] Circuit opened for {self.host} after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+
+class UpstreamStats:
+    """Call counters and a latency histogram for one host."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.fallbacks = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed_ms, ok):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self.total_ms += elapsed_ms
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"le_{b}ms" for b in LATENCY_BUCKETS_MS] + ["gt_%dms" % LATENCY_BUCKETS_MS[-1]]
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "fallbacks": self.fallbacks,
+                "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+                "latency_histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+class HttpClient:
+    """Pooled, retrying, circuit-broken GET client shared by the process."""
+
+    def __init__(self, host_timeouts=None, max_retries=MAX_RETRIES):
+        self.host_timeouts = dict(HOST_TIMEOUTS if host_timeouts is None else host_timeouts)
+        self.max_retries = max_retries
+        self._sessions = {}
+        self._breakers = {}
+        self._stats = {}
+        self._last_good = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _host_state(self, host):
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+                self._breakers[host] = CircuitBreaker(host)
+                self._stats[host] = UpstreamStats()
+            return self._sessions[host], self._breakers[host], self._stats[host]
+
+    @staticmethod
+    def _backoff(attempt):
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    def get(self, url, params=None, timeout=None):
+        """
+        GET with pooling, retries and the host's circuit breaker.
+
+        Connection errors, timeouts and 429/5xx responses are retried with
+        jittered backoff. The final response is returned as-is (call
+        raise_for_status() as usual).
+
+        Raises:
+            UpstreamUnavailable: If the host's circuit is open
+            requests.RequestException: If every attempt failed to connect
+        """
+        host = urlparse(url).netloc
+        session, breaker, stats = self._host_state(host)
+        if not breaker.allow():
+            stats.count("rejected")
+            raise UpstreamUnavailable(f"{host} is unavailable (circuit open)")
+
+        timeout = timeout or self.host_timeouts.get(host, DEFAULT_TIMEOUT)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                resp = session.get(url, params=params, timeout=timeout)
+                error = None
+            except requests.RequestException as e:
+                resp, error = None, e
+            failed = error is not None or resp.status_code >= 500
+            stats.observe((time.perf_counter() - start) * 1000, not failed)
+
+            retryable = error is not None or resp.status_code in RETRY_STATUSES
+            if not retryable or attempt >= self.max_retries:
+                break
+            attempt += 1
+            stats.count("retries")
+            time.sleep(self._backoff(attempt))
+
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if error is not None:
+            raise error
+        return resp
+
+    def get_json(self, url, params=None, timeout=None, cache_key=None, fallback=True):
+        """
+        GET and parse JSON, falling back to the last good payload on failure.
+
+        Client errors (4xx other than 429) are raised as-is: the request
+        itself is wrong, so an earlier payload would only hide that.
+
+        Args:
+            cache_key: Key for the last-known-good copy; defaults to the full
+                URL. Pass a stable key for URLs that change per call (e.g.
+                signed download links).
+            fallback: Set False to always raise instead of serving stale data
+
+        Raises:
+            requests.RequestException | ValueError: If the call failed and
+                there is no earlier payload to serve
+        """
+        key = cache_key or (url + ("?" + urlencode(sorted(params.items())) if params else ""))
+        try:
+            resp = self.get(url, params=params, timeout=timeout)
+            resp.raise_for_status()
+            data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            response = getattr(e, "response", None)
+            if response is not None and 400 <= response.status_code < 500 \
+                    and response.status_code not in RETRY_STATUSES:
+                raise
+            stale = self._remembered(key) if fallback else None
+            if stale is None:
+                raise
+            host = urlparse(url).netloc
+            self._host_state(host)[2].count("fallbacks")
+            print(f"[HTTP] Serving last known good response for {key}")
+            return stale
+        if fallback:
+            self._remember(key, data)
+        return data
+
+    def _remembered(self, key):
+        with self._lock:
+            data = self._last_good.get(key)
+            if data is not None:
+                self._last_good.move_to_end(key)
+            return data
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._last_good[key] = data
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > FALLBACK_ENTRIES:
+                self._last_good.popitem(last=False)
+
+    def stats(self):
+        """Per-host counters, latency histogram and circuit state."""
+        with self._lock:
+            hosts = list(self._stats)
+        result = {}
+        for host in hosts:
+            _, breaker, stats = self._host_state(host)
+            result[host] = dict(stats.snapshot(), circuit=breaker.state)
+        return result
+
+
+default_client = HttpClient()
+
+
+def get(url, params=None, timeout=None):
+    """GET through the shared client. See HttpClient.get."""
+    return default_client.get(url, params=params, timeout=timeout)
+
+
+def get_json(url, params=None, timeout=None, cache_key=None, fallback=True):
+    """GET JSON through the shared client. See HttpClient.get_json."""
+    return default_client.get_json(url, params=params, timeout=timeout,
+                                   cache_key=cache_key, fallback=fallback)
+
+
+def stats():
+    """Per-host stats from the shared client."""
+    return default_client.stats()
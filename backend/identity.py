@@ -0,0 +1,145 @@
+"""
+Who is making the request: user, role and provider profile.
+
+current_identity() verifies the bearer token, then loads the user row and
+its provider row (if any) in one joined query. The result is kept on
+flask.g for the rest of the request and in a short-TTL process cache for
+the next ones, so a typical provider call costs one cache lookup instead
+of a Users SELECT plus a Providers SELECT.
+
+    @service_bp.route("/provider/services", methods=["POST"])
+    @require_role('provider', error='Only providers can add services')
+    def provider_add_service():
+        provider = current_identity().provider
+
+Call invalidate_identity(uid) after changing a user's role, provider
+profile or deleting them. Other worker processes pick the change up
+within IDENTITY_TTL seconds.
+"""
+import functools
+import threading
+
+from cachetools import TTLCache
+from flask import g, has_app_context, jsonify
+
+from backend.auth import AuthError, current_uid
+from backend.db import get_db
+from backend.models.provider import Provider
+from backend.transactions import after_commit
+
+IDENTITY_TTL = 30  # seconds
+IDENTITY_CACHE_SIZE = 10000
+
+_cache = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_TTL)
+_lock = threading.Lock()
+_MISSING = object()
+
+
+class Identity:
+    """A verified caller: their Users row plus their Providers row, if any."""
+
+    def __init__(self, user_id, email, display_name, role, provider=None):
+        self.user_id = user_id
+        self.email = email
+        self.display_name = display_name
+        self.role = role
+        self.provider = provider
+
+    @staticmethod
+    def from_row(row):
+        provider = None
+        if row['provider_id'] is not None:
+            provider = Provider(
+                provider_id=row['provider_id'],
+                user_id=row['user_id'],
+                business_name=row['business_name'],
+                description=row['description'],
+                approved=row['approved'],
+            )
+        return Identity(row['user_id'], row['email'], row['display_name'], row['role'], provider)
+
+
+def load_identity(user_id):
+    """Identity for a user id straight from the database, or None if there is no such user."""
+    row = get_db().execute(
+        """SELECT u.user_id, u.email, u.display_name, u.role,
+                  p.provider_id, p.business_name, p.description, p.approved
+           FROM Users u
+           LEFT JOIN Providers p ON p.user_id = u.user_id
+           WHERE u.user_id = ?""",
+        (user_id,),
+    ).fetchone()
+    return Identity.from_row(row) if row else None
+
+
+def get_identity(user_id):
+    """Identity for a user id, from the process cache when possible."""
+    with _lock:
+        identity = _cache.get(user_id, _MISSING)
+    if identity is _MISSING:
+        identity = load_identity(user_id)
+        # Unknown users are not cached: they are usually about to be created
+        if identity is not None:
+            with _lock:
+                _cache[user_id] = identity
+    return identity
+
+
+def current_identity():
+    """
+    Identity of the caller, resolved once per request.
+
+    Returns None when the token is valid but the user is not in the database.
+
+    Raises:
+        AuthError: If the Authorization header is missing or the token is invalid
+    """
+    if 'identity' not in g:
+        g.identity = get_identity(current_uid())
+    return g.identity
+
+
+def invalidate_identity(user_id=None):
+    """
+    Forget the cached identity of one user, or of everyone when user_id is None.
+
+    The process cache is cleared again once the current transaction
+    commits, so a concurrent request cannot re-cache the old row meanwhile.
+    """
+    _forget(user_id)
+    if has_app_context():
+        cached = g.get('identity')
+        if user_id is None or (cached is not None and cached.user_id == user_id):
+            g.pop('identity', None)
+        after_commit(lambda: _forget(user_id))
+
+
+def _forget(user_id):
+    with _lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+
+
+def require_role(*roles, error=None):
+    """
+    Decorator: reject the request unless the caller has one of the roles.
+
+    401 when the token is missing or invalid, 403 when the user is unknown
+    or has another role. With no roles, any registered user may call.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                identity = current_identity()
+            except AuthError as e:
+                return jsonify({'error': str(e)}), 401
+            if identity is None:
+                return jsonify({'error': 'User not found'}), 403
+            if roles and identity.role not in roles:
+                return jsonify({'error': error or 'Insufficient permissions'}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
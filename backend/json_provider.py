@@ -0,0 +1,94 @@
+"""
+JSON provider for the Flask app.
+
+Uses orjson when it is installed: it encodes several times faster than
+the stdlib json module and handles datetime, date, UUID and dataclasses
+natively, so models can put raw values in to_dict() and leave formatting
+to the encoder. Without orjson the provider behaves like Flask's default
+one, except that dates are still sent as ISO 8601 strings (Flask's
+default would send RFC 822 HTTP dates). FastJSONProvider(app,
+use_orjson=False) picks the stdlib encoder even when orjson is installed,
+with the same output format.
+
+    app.json = FastJSONProvider(app)
+
+Everything that goes through the app's provider picks it up: jsonify(),
+request.get_json(), and stream_json().
+"""
+import dataclasses
+import datetime
+import decimal
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(o):
+    """Fallback for types neither encoder handles on its own."""
+    if isinstance(o, (datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider that encodes with orjson when it is available."""
+
+    default = staticmethod(_default)
+
+    def __init__(self, app, use_orjson=True):
+        super().__init__(app)
+        self.use_orjson = use_orjson and orjson is not None
+
+    @property
+    def backend(self):
+        return "orjson" if self.use_orjson else "json"
+
+    def _options(self):
+        # numpy scalars come out of PointIndex distance lookups
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialise obj to UTF-8 encoded JSON bytes."""
+        if self.use_orjson and not kwargs:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._options())
+            except orjson.JSONEncodeError:
+                # e.g. integers wider than 64 bits; the stdlib copes with those
+                pass
+        if not kwargs:
+            # Compact, like orjson's output
+            kwargs = {"separators": (",", ":")}
+        return super().dumps(obj, **kwargs).encode("utf8")
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode("utf8")
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.compact is None and self._app.debug or self.compact is False:
+            # Pretty-printed output for debugging goes through the stdlib
+            return super().response(obj)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
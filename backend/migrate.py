@@ -0,0 +1,209 @@
+"""
+Schema Migrations
+
+The schema version is recorded in a schema_version table. Version 0 is the
+base schema in schema.sql; every file in schema_migrations/ named
+NNNN_description.sql is one migration, applied once and in order, each in
+its own transaction.
+
+    flask migrate    # apply pending migrations
+    flask init-db    # drop everything and rebuild at the latest version
+
+App startup only calls ensure_schema(), which is a single SELECT when the
+database is already current.
+"""
+import os
+import re
+import sqlite3
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = os.path.join(BACKEND_DIR, 'schema.sql')
+MIGRATIONS_DIR = os.path.join(BACKEND_DIR, 'schema_migrations')
+
+MIGRATION_FILE = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    List the migration files in version order.
+
+    Returns:
+        list[tuple[int, str, str]]: (version, name, path) for each migration
+
+    Raises:
+        ValueError: If two files share a version number
+    """
+    migrations = {}
+    for filename in os.listdir(migrations_dir):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {filename}")
+        migrations[version] = (version, match.group(2), os.path.join(migrations_dir, filename))
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def latest_version(migrations_dir=MIGRATIONS_DIR):
+    """Return the version the database should be at after migrating."""
+    migrations = list_migrations(migrations_dir)
+    return migrations[-1][0] if migrations else 0
+
+
+def current_version(db):
+    """Return the applied schema version, or None if the database is unversioned."""
+    try:
+        row = db.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0]
+
+
+def _has_base_schema(db):
+    row = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Users'"
+    ).fetchone()
+    return row is not None
+
+
+def _table_columns(db):
+    """{table: set of column names} for the ordinary tables in db."""
+    tables = [row[0] for row in db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()]
+    return {table: {row[1] for row in db.execute(f'PRAGMA table_info("{table}")')} for table in tables}
+
+
+def base_schema_mismatches(db, schema_path=SCHEMA_PATH):
+    """
+    Compare an unversioned database with schema.sql.
+
+    schema.sql is built in a scratch in-memory database and every table and
+    column it defines must exist in db (extra ones are fine).
+
+    Returns:
+        list[str]: One line per missing table or column; empty if db matches
+    """
+    expected = sqlite3.connect(':memory:')
+    try:
+        with open(schema_path, encoding='utf8') as f:
+            expected.executescript(f.read())
+        wanted = _table_columns(expected)
+    finally:
+        expected.close()
+
+    actual = _table_columns(db)
+    problems = []
+    for table, columns in sorted(wanted.items()):
+        if table not in actual:
+            problems.append(f"missing table {table}")
+            continue
+        for column in sorted(columns - actual[table]):
+            problems.append(f"missing column {table}.{column}")
+    return problems
+
+
+def _apply(db, version, name, sql):
+    """
+    Run one migration and record it, atomically.
+
+    The schema_version insert comes first inside BEGIN IMMEDIATE, so if
+    another worker applied the same version meanwhile the primary key
+    rejects it before any DDL runs.
+
+    Returns:
+        bool: True if applied here, False if another process already had
+    """
+    script = (
+        "BEGIN IMMEDIATE;\n"
+        f"INSERT INTO schema_version (version, name) VALUES ({int(version)}, '{name}');\n"
+        f"{sql}\n"
+        "COMMIT;"
+    )
+    try:
+        db.executescript(script)
+        return True
+    except sqlite3.IntegrityError:
+        db.rollback()
+        # Only a version row another process committed means "already
+        # applied"; any other constraint failure is the migration's own
+        row = db.execute("SELECT 1 FROM schema_version WHERE version = ?", (int(version),)).fetchone()
+        if row is None:
+            raise
+        return False
+    except Exception:
+        db.rollback()
+        raise
+
+
+def migrate(db, migrations_dir=MIGRATIONS_DIR, schema_path=SCHEMA_PATH):
+    """
+    Bring the database up to the latest schema version.
+
+    An empty database gets schema.sql as version 0. A database created
+    before versioning existed is stamped as version 0 as-is if it has every
+    table and column of schema.sql. If it does not, it is rebuilt from
+    schema.sql, dropping its data, which is what every boot did to it before
+    versioning existed.
+
+    Returns:
+        list[str]: Names of the migrations applied by this call
+    """
+    db.execute(SCHEMA_VERSION_DDL)
+    db.commit()
+
+    applied = []
+    version = current_version(db)
+    if version is None:
+        stamp = _has_base_schema(db)
+        if stamp:
+            problems = base_schema_mismatches(db, schema_path)
+            if problems:
+                print(f"[Database] Unversioned database does not match schema.sql "
+                      f"({'; '.join(problems)}); rebuilding it from schema.sql")
+                stamp = False
+        if stamp:
+            db.execute("INSERT OR IGNORE INTO schema_version (version, name) VALUES (0, 'base_schema')")
+            db.commit()
+        else:
+            with open(schema_path, encoding='utf8') as f:
+                if _apply(db, 0, 'base_schema', f.read()):
+                    applied.append('0000_base_schema')
+        version = 0
+
+    for number, name, path in list_migrations(migrations_dir):
+        if number <= version:
+            continue
+        with open(path, encoding='utf8') as f:
+            if _apply(db, number, name, f.read()):
+                applied.append(f"{number:04d}_{name}")
+    return applied
+
+
+def ensure_schema(db, migrations_dir=MIGRATIONS_DIR, schema_path=SCHEMA_PATH):
+    """
+    Startup hook: migrate only if the database is behind.
+
+    Returns:
+        list[str]: Names of the migrations applied (empty when already current)
+    """
+    if current_version(db) == latest_version(migrations_dir):
+        return []
+    return migrate(db, migrations_dir, schema_path)
+
+
+def reset(db, migrations_dir=MIGRATIONS_DIR, schema_path=SCHEMA_PATH):
+    """Drop all data, recreate schema.sql and apply every migration."""
+    db.executescript("DROP TABLE IF EXISTS schema_version;")
+    with open(schema_path, encoding='utf8') as f:
+        db.executescript(f.read())
+    return migrate(db, migrations_dir, schema_path)
@@ -1,4 +1,6 @@
+from backend import queries
 from backend.db import get_db
+from backend.transactions import commit
 from models.user import User
 
 
@@ -46,7 +48,7 @@ class Admin:
         """Create a new admin user."""
         db = get_db()
         user = User._insert_row(db, email, display_name, phone, role='admin', user_id=user_id)
-        db.commit()
+        commit(db)
         return Admin(user)
 
     @staticmethod
@@ -68,7 +70,5 @@ class Admin:
     @staticmethod
     def list_all():
         """List all admin users."""
-        db = get_db()
-        rows = db.execute("SELECT * FROM Users WHERE role = 'admin' ORDER BY created_at DESC").fetchall()
-        users = [User.from_row(r) for r in rows]
+        users = queries.fetch_all("User.list_by_role", ('admin',), User.from_row)
         return [Admin(u) for u in users if u]
@@ -4,7 +4,22 @@ Represents a booking made by a customer for a service.
 Maps to the Bookings table in the database.
 """
 from datetime import datetime
+from backend import queries
 from backend.db import get_db
+from backend.transactions import commit, transaction
+from backend.analytics import ANALYTICS, record_booking_status
+from backend.scheduling import SlotIndex
+from backend.models.rows import RowMapper, parse_datetime
+
+
+class SlotConflictError(ValueError):
+    """One or more requested booking slots are already taken."""
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super().__init__("Requested time slot is already booked."
+                         if len(conflicts) == 1 else
+                         f"{len(conflicts)} requested time slots are already booked.")
 
 
 class Booking:
@@ -20,6 +35,8 @@ class Booking:
         created_at: Timestamp when booking was created
     """
     
+    __slots__ = ('booking_id', 'listing_id', 'user_id', 'booking_date', 'status', 'created_at')
+
     STATUS_PENDING = 'pending'
     STATUS_CONFIRMED = 'confirmed'
     STATUS_CANCELLED = 'cancelled'
@@ -31,10 +48,7 @@ class Booking:
         self.user_id = user_id
         
         # Convert string to datetime if necessary
-        if isinstance(booking_date, str):
-            self.booking_date = datetime.fromisoformat(booking_date)
-        else:
-            self.booking_date = booking_date
+        self.booking_date = parse_datetime(booking_date)
             
         self.status = status
         self.created_at = created_at or datetime.now()
@@ -45,26 +59,13 @@ class Booking:
             'booking_id': self.booking_id,
             'listing_id': self.listing_id,
             'user_id': self.user_id,
-            'booking_date': self.booking_date.isoformat() if isinstance(self.booking_date, datetime) else self.booking_date,
+            'booking_date': self.booking_date,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if isinstance(self.created_at, datetime) else self.created_at
+            'created_at': self.created_at
         }
     
-    @staticmethod
-    def from_row(row):
-        """Create Booking instance from database row."""
-        if row is None:
-            return None
-        # Use bracket-access, not .get()
-        return Booking(
-            booking_id=row['booking_id'],
-            listing_id=row['listing_id'],
-            user_id=row['user_id'],
-            booking_date=row['booking_date'],
-            status=row['status'] if 'status' in row.keys() else Booking.STATUS_PENDING,
-            created_at=row['created_at'] if 'created_at' in row.keys() else None
-        )
-        
+    MAX_BATCH = 100
+
     @staticmethod
     def create(user_id, listing_id, booking_date):
         """
@@ -80,51 +81,108 @@ class Booking:
             
         Raises:
             ValueError: If booking_date is invalid or listing doesn't exist
+            SlotConflictError: If the slot is already taken
         """
-        db = get_db()
+        return Booking.create_many(user_id, [(listing_id, booking_date)])[0]
+
+    @staticmethod
+    def create_many(user_id, requests):
+        """
+        Create several bookings in one transaction, all or nothing.
         
-        # Validate booking date is in the future
-        if isinstance(booking_date, str):
-            try:
-                booking_datetime = datetime.fromisoformat(booking_date)
-            except ValueError:
-                raise ValueError("Invalid booking date format. Use ISO format (YYYY-MM-DDTHH:MM:SS).")
-        else:
-            booking_datetime = booking_date
-            
-        now = datetime.now()
-        if booking_datetime < now:
-            raise ValueError("Booking date must be in the future.")
+        Each booking is checked against the listing's existing bookings
+        and against the earlier ones in the same batch.
         
-        # Check if listing exists and is approved
-        listing = db.execute("SELECT * FROM Listings WHERE listing_id = ? AND status = 'approved'", 
-                            (listing_id,)).fetchone()
-        if not listing:
-            raise ValueError("Service not found or not approved for booking.")
+        Args:
+            user_id: ID of the customer making the bookings
+            requests: Iterable of (listing_id, booking_date) pairs
             
-        # Create the booking
-        cursor = db.execute(
-            """
-            INSERT INTO Bookings (listing_id, user_id, booking_date, status, created_at)
-            VALUES (?, ?, ?, ?, datetime('now'))
-            """,
-            (listing_id, user_id, booking_datetime.isoformat(), Booking.STATUS_PENDING)
-        )
-        db.commit()
-        booking_id = cursor.lastrowid
-        
-        # Fetch the created booking
-        return Booking.get_by_id(booking_id)
+        Returns:
+            list[Booking]: The created bookings, in request order
+            
+        Raises:
+            ValueError: If a date is invalid or in the past, or a listing
+                doesn't exist or isn't approved
+            SlotConflictError: If any requested slot is taken
+        """
+        requests = list(requests)
+        if not requests:
+            raise ValueError("No bookings to create.")
+        if len(requests) > Booking.MAX_BATCH:
+            raise ValueError(f"At most {Booking.MAX_BATCH} bookings can be created at once.")
+
+        now = datetime.now()
+        wanted = []
+        for listing_id, booking_date in requests:
+            # Validate booking date is in the future
+            if isinstance(booking_date, str):
+                try:
+                    booking_datetime = datetime.fromisoformat(booking_date)
+                except ValueError:
+                    raise ValueError("Invalid booking date format. Use ISO format (YYYY-MM-DDTHH:MM:SS).")
+            elif isinstance(booking_date, datetime):
+                booking_datetime = booking_date
+            else:
+                raise ValueError("Invalid booking date format. Use ISO format (YYYY-MM-DDTHH:MM:SS).")
+            if booking_datetime.tzinfo is not None:
+                # Stored dates are naive server-local time, e.g. "...Z" from
+                # Date.toISOString() becomes the local wall-clock time
+                booking_datetime = booking_datetime.astimezone().replace(tzinfo=None)
+            if booking_datetime < now:
+                raise ValueError("Booking date must be in the future.")
+            try:
+                listing_id = int(listing_id)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid listing_id.")
+            wanted.append((listing_id, booking_datetime))
+
+        listing_ids = {listing_id for listing_id, _ in wanted}
+        placeholders = ",".join("?" * len(listing_ids))
+        db = get_db()
+        # Take the write lock before reading existing bookings so no other
+        # request can book the same slots between the check and the insert
+        if not db.in_transaction:
+            db.execute("BEGIN IMMEDIATE")
+        with transaction(db):
+            # Check the listings exist and are approved
+            providers = dict(queries.fetch_all(
+                "Booking.approved_listings",
+                tuple(listing_ids),
+                db=db,
+                sql=f"""SELECT listing_id, provider_id FROM Listings
+                        WHERE status = 'approved' AND listing_id IN ({placeholders})""",
+            ))
+            if len(providers) < len(listing_ids):
+                raise ValueError("Service not found or not approved for booking.")
+
+            dates = [booking_datetime for _, booking_datetime in wanted]
+            index = SlotIndex.load(db, listing_ids, min(dates), max(dates))
+            conflicts = []
+            for listing_id, booking_datetime in wanted:
+                if index.conflicts(listing_id, booking_datetime):
+                    conflicts.append({'listing_id': listing_id, 'booking_date': booking_datetime})
+                else:
+                    index.add(listing_id, booking_datetime)
+            if conflicts:
+                raise SlotConflictError(conflicts)
+
+            bookings = [
+                queries.fetch_one(
+                    "Booking.insert",
+                    (listing_id, user_id, booking_datetime.isoformat(), Booking.STATUS_PENDING),
+                    Booking.from_row,
+                    db=db,
+                )
+                for listing_id, booking_datetime in wanted
+            ]
+            for listing_id, provider_id in providers.items():
+                ANALYTICS.record(provider_id, bookings=sum(b.listing_id == listing_id for b in bookings))
+        return bookings
     
     @staticmethod
     def get_by_id(booking_id):
         """Get booking by ID."""
-        db = get_db()
-        row = db.execute(
-            "SELECT * FROM Bookings WHERE booking_id = ?",
-            (booking_id,)
-        ).fetchone()
-        return Booking.from_row(row)
+        return queries.fetch_one("Booking.get_by_id", (booking_id,), Booking.from_row)
     
     @staticmethod
     def get_by_user(user_id, status=None):
@@ -138,28 +196,9 @@ class Booking:
         Returns:
             list[Booking]: List of booking objects
         """
-        db = get_db()
-        
         if status:
-            rows = db.execute(
-                """
-                SELECT * FROM Bookings 
-                WHERE user_id = ? AND status = ?
-                ORDER BY booking_date DESC
-                """,
-                (user_id, status)
-            ).fetchall()
-        else:
-            rows = db.execute(
-                """
-                SELECT * FROM Bookings 
-                WHERE user_id = ?
-                ORDER BY booking_date DESC
-                """,
-                (user_id,)
-            ).fetchall()
-            
-        return [Booking.from_row(row) for row in rows]
+            return queries.fetch_all("Booking.get_by_user(status)", (user_id, status), Booking.from_row)
+        return queries.fetch_all("Booking.get_by_user", (user_id,), Booking.from_row)
     
     @staticmethod
     def get_by_provider(provider_id, status=None):
@@ -173,48 +212,10 @@ class Booking:
         Returns:
             list[dict]: List of booking dictionaries with service details (title, image_url, etc.)
         """
-        db = get_db()
-        
         if status:
-            rows = db.execute(
-                """
-                SELECT 
-                    b.*,
-                    l.title,
-                    l.description as service_description,
-                    l.price,
-                    l.image_url,
-                    l.category_id,
-                    u.display_name as customer_name,
-                    u.email as customer_email
-                FROM Bookings b
-                JOIN Listings l ON b.listing_id = l.listing_id
-                LEFT JOIN Users u ON b.user_id = u.user_id
-                WHERE l.provider_id = ? AND b.status = ?
-                ORDER BY b.booking_date DESC
-                """,
-                (provider_id, status)
-            ).fetchall()
+            rows = queries.fetch_all("Booking.get_by_provider(status)", (provider_id, status))
         else:
-            rows = db.execute(
-                """
-                SELECT 
-                    b.*,
-                    l.title,
-                    l.description as service_description,
-                    l.price,
-                    l.image_url,
-                    l.category_id,
-                    u.display_name as customer_name,
-                    u.email as customer_email
-                FROM Bookings b
-                JOIN Listings l ON b.listing_id = l.listing_id
-                LEFT JOIN Users u ON b.user_id = u.user_id
-                WHERE l.provider_id = ?
-                ORDER BY b.booking_date DESC
-                """,
-                (provider_id,)
-            ).fetchall()
+            rows = queries.fetch_all("Booking.get_by_provider", (provider_id,))
             
         # Return as dictionaries with all joined data
         return [dict(row) for row in rows]
@@ -230,30 +231,7 @@ class Booking:
         Returns:
             dict: Dictionary with booking, service, and provider details
         """
-        db = get_db()
-        row = db.execute(
-            """
-            SELECT 
-                b.*,
-                l.title,
-                l.description as service_description,
-                l.price,
-                l.image_url, 
-                p.business_name,
-                p.description as provider_description,
-                u.display_name as customer_name,
-                u.email as customer_email,
-                pu.display_name as provider_name,
-                pu.email as provider_email
-            FROM Bookings b
-            JOIN Listings l ON b.listing_id = l.listing_id
-            JOIN Providers p ON l.provider_id = p.provider_id
-            JOIN Users u ON b.user_id = u.user_id
-            JOIN Users pu ON p.user_id = pu.user_id
-            WHERE b.booking_id = ?
-            """,
-            (booking_id,)
-        ).fetchone()
+        row = queries.fetch_one("Booking.get_with_details", (booking_id,))
         
         if not row:
             return None
@@ -261,13 +239,15 @@ class Booking:
         return dict(row)
     
     @staticmethod
-    def update_status(booking_id, status):
+    def update_status(booking_id, status, previous=None):
         """
         Update the status of a booking.
         
         Args:
             booking_id: ID of the booking to update
             status: New status ('pending', 'confirmed', 'cancelled', 'completed')
+            previous: The booking as loaded by the caller, if it has it
+                (saves reading it again for the analytics delta)
             
         Returns:
             Booking: Updated booking object, or None if not found
@@ -277,13 +257,16 @@ class Booking:
             raise ValueError("Invalid booking status.")
             
         db = get_db()
-        db.execute(
-            "UPDATE Bookings SET status = ? WHERE booking_id = ?",
-            (status, booking_id)
-        )
-        db.commit()
+        if previous is None:
+            previous = Booking.get_by_id(booking_id)
+        row = queries.fetch_one("Booking.update_status", (status, booking_id), db=db)
+        commit(db)
+        if row is None:
+            return None
+        if previous:
+            record_booking_status(row['listing_id'], previous.status, status, provider_id=row['provider_id'])
         
-        return Booking.get_by_id(booking_id)
+        return Booking.from_row(row)
     
     @staticmethod
     def delete(booking_id):
@@ -300,14 +283,15 @@ class Booking:
         db = get_db()
         
         # Only allow deletion of pending bookings
-        booking = Booking.get_by_id(booking_id)
-        if not booking or booking.status != Booking.STATUS_PENDING:
+        row = queries.fetch_one("Booking.delete", (booking_id, Booking.STATUS_PENDING), db=db)
+        commit(db)
+        if row is None:
             return False
+        record_booking_status(row['listing_id'], Booking.STATUS_PENDING, None, provider_id=row['provider_id'])
         
-        cursor = db.execute(
-            "DELETE FROM Bookings WHERE booking_id = ? AND status = ?",
-            (booking_id, Booking.STATUS_PENDING)
-        )
-        db.commit()
-        
-        return cursor.rowcount > 0
+        return True
+
+
+# Booking.from_row(row): compiled per result shape, see models/rows.py
+Booking.from_row = RowMapper(Booking, converters={'booking_date': parse_datetime},
+                             defaults={'status': Booking.STATUS_PENDING})
@@ -4,7 +4,10 @@ Represents a bookmark (saved service) by a user.
 Maps to the Bookmarks table in the database.
 """
 from datetime import datetime
+from backend import queries
 from backend.db import get_db
+from backend.transactions import commit, transaction
+from backend.models.rows import RowMapper
 
 
 class Bookmark:
@@ -17,6 +20,8 @@ class Bookmark:
         listing_id: ID of the service/listing bookmarked
         created_at: Timestamp when bookmark was created
     """
+
+    __slots__ = ('bookmark_id', 'user_id', 'listing_id', 'created_at')
     
     def __init__(self, bookmark_id, user_id, listing_id, created_at=None):
         self.bookmark_id = bookmark_id
@@ -30,21 +35,9 @@ class Bookmark:
             'bookmark_id': self.bookmark_id,
             'user_id': self.user_id,
             'listing_id': self.listing_id,
-            'created_at': self.created_at.isoformat() if isinstance(self.created_at, datetime) else self.created_at
+            'created_at': self.created_at
         }
     
-    @staticmethod
-    def from_row(row):
-        """Create Bookmark instance from database row."""
-        if row is None:
-            return None
-        return Bookmark(
-            bookmark_id=row['bookmark_id'],
-            user_id=row['user_id'],
-            listing_id=row['listing_id'],
-            created_at=row['created_at']
-        )
-    
     @staticmethod
     def create(user_id, listing_id):
         """
@@ -63,23 +56,11 @@ class Bookmark:
         db = get_db()
         print(f"[BOOKMARK CREATE] Attempting to create bookmark - User ID: {user_id} (type: {type(user_id)}), Listing ID: {listing_id} (type: {type(listing_id)})")
         try:
-            cursor = db.execute(
-                """
-                INSERT INTO Bookmarks (user_id, listing_id)
-                VALUES (?, ?)
-                """,
-                (user_id, listing_id)
-            )
-            db.commit()
-            bookmark_id = cursor.lastrowid
-            print(f"[BOOKMARK CREATE] Successfully created bookmark with ID: {bookmark_id}")
-            
-            # Fetch the created bookmark
-            bookmark = Bookmark.get_by_id(bookmark_id)
-            print(f"[BOOKMARK CREATE] Retrieved bookmark: {bookmark.to_dict() if bookmark else 'None'}")
+            with transaction(db):
+                bookmark = queries.fetch_one("Bookmark.insert", (user_id, listing_id), Bookmark.from_row, db=db)
+            print(f"[BOOKMARK CREATE] Successfully created bookmark with ID: {bookmark.bookmark_id}")
             return bookmark
         except Exception as e:
-            db.rollback()
             print(f"[BOOKMARK CREATE ERROR] {type(e).__name__}: {str(e)}")
             # Handle UNIQUE constraint violation
             if 'UNIQUE constraint failed' in str(e):
@@ -89,12 +70,7 @@ class Bookmark:
     @staticmethod
     def get_by_id(bookmark_id):
         """Get bookmark by ID."""
-        db = get_db()
-        row = db.execute(
-            "SELECT * FROM Bookmarks WHERE bookmark_id = ?",
-            (bookmark_id,)
-        ).fetchone()
-        return Bookmark.from_row(row)
+        return queries.fetch_one("Bookmark.get_by_id", (bookmark_id,), Bookmark.from_row)
     
     @staticmethod
     def get_by_user_and_listing(user_id, listing_id):
@@ -104,12 +80,7 @@ class Bookmark:
         Returns:
             Bookmark or None: The bookmark if it exists, None otherwise
         """
-        db = get_db()
-        row = db.execute(
-            "SELECT * FROM Bookmarks WHERE user_id = ? AND listing_id = ?",
-            (user_id, listing_id)
-        ).fetchone()
-        return Bookmark.from_row(row)
+        return queries.fetch_one("Bookmark.get_by_user_and_listing", (user_id, listing_id), Bookmark.from_row)
     
     @staticmethod
     def get_by_user(user_id):
@@ -122,12 +93,7 @@ class Bookmark:
         Returns:
             list[Bookmark]: List of bookmark objects
         """
-        db = get_db()
-        rows = db.execute(
-            "SELECT * FROM Bookmarks WHERE user_id = ? ORDER BY created_at DESC",
-            (user_id,)
-        ).fetchall()
-        return [Bookmark.from_row(row) for row in rows]
+        return queries.fetch_all("Bookmark.get_by_user", (user_id,), Bookmark.from_row)
     
     @staticmethod
     def get_with_service_details(user_id):
@@ -143,44 +109,14 @@ class Bookmark:
         Returns:
             list[dict]: List of dictionaries with bookmark and service details
         """
-        db = get_db()
-        
         print(f"[GET WITH SERVICE DETAILS] Fetching bookmarks for user_id: {user_id} (type: {type(user_id)})")
         
         # First, check if any bookmarks exist for this user
-        bookmark_check = db.execute(
-            "SELECT COUNT(*) as count FROM Bookmarks WHERE user_id = ?",
-            (user_id,)
-        ).fetchone()
+        bookmark_check = queries.fetch_one("Bookmark.count_by_user", (user_id,))
         print(f"[GET WITH SERVICE DETAILS] Found {bookmark_check['count']} raw bookmarks in Bookmarks table")
         
         # Get all bookmarks regardless of listing status
-        rows = db.execute(
-            """
-            SELECT 
-                b.bookmark_id,
-                b.user_id,
-                b.listing_id,
-                b.created_at as bookmarked_at,
-                l.title,
-                l.description,
-                l.price,
-                l.status,
-                l.image_url,
-                l.category_id,
-                l.provider_id,
-                p.business_name,
-                p.description as provider_description,
-                c.name as category_name
-            FROM Bookmarks b
-            JOIN Listings l ON b.listing_id = l.listing_id
-            JOIN Providers p ON l.provider_id = p.provider_id
-            LEFT JOIN Categories c ON l.category_id = c.category_id
-            WHERE b.user_id = ?
-            ORDER BY b.created_at DESC
-            """,
-            (user_id,)
-        ).fetchall()
+        rows = queries.fetch_all("Bookmark.get_with_service_details", (user_id,))
         
         print(f"[GET WITH SERVICE DETAILS] After JOIN query, found {len(rows)} bookmarks with service details")
         if len(rows) > 0:
@@ -200,11 +136,8 @@ class Bookmark:
             bool: True if deleted, False if not found
         """
         db = get_db()
-        cursor = db.execute(
-            "DELETE FROM Bookmarks WHERE bookmark_id = ?",
-            (bookmark_id,)
-        )
-        db.commit()
+        cursor = queries.execute("Bookmark.delete", (bookmark_id,), db=db)
+        commit(db)
         return cursor.rowcount > 0
     
     @staticmethod
@@ -221,11 +154,8 @@ class Bookmark:
             bool: True if deleted, False if not found
         """
         db = get_db()
-        cursor = db.execute(
-            "DELETE FROM Bookmarks WHERE user_id = ? AND listing_id = ?",
-            (user_id, listing_id)
-        )
-        db.commit()
+        cursor = queries.execute("Bookmark.delete_by_user_and_listing", (user_id, listing_id), db=db)
+        commit(db)
         return cursor.rowcount > 0
     
     @staticmethod
@@ -238,3 +168,7 @@ class Bookmark:
         """
         bookmark = Bookmark.get_by_user_and_listing(user_id, listing_id)
         return bookmark is not None
+
+
+# Bookmark.from_row(row): compiled per result shape, see models/rows.py
+Bookmark.from_row = RowMapper(Bookmark)
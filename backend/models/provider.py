@@ -1,5 +1,8 @@
+from backend import queries
 from backend.db import get_db
+from backend.transactions import commit, transaction
 from backend.models.user import User
+from backend.models.rows import RowMapper
 from datetime import datetime
 
 
@@ -10,6 +13,8 @@ class Provider:
     user details (email/display_name/phone + business info) using User._insert_row.
     """
 
+    __slots__ = ('provider_id', 'user_id', 'business_name', 'description', 'approved')
+
     def __init__(self, provider_id, user_id, business_name=None, description=None, approved=False):
         self.provider_id = provider_id
         self.user_id = user_id
@@ -26,29 +31,18 @@ class Provider:
             'approved': self.approved,
         }
 
-    @staticmethod
-    def from_row(row):
-        if row is None:
-            return None
-        return Provider(
-            provider_id = row['provider_id'],
-            user_id = row['user_id'],
-            business_name = row['business_name'] if 'business_name' in row.keys() else None,
-            description = row['description'] if 'description' in row.keys() else None,
-            approved = row['approved'] if 'approved' in row.keys() else None,
-        )
-
     @staticmethod
     def create_for_user(user_id, business_name, description, approved=False):
         """Create a provider record for an existing user_id."""
         db = get_db()
-        db.execute(
-            "INSERT INTO Providers (user_id, business_name, description, approved) VALUES (?, ?, ?, ?)",
-            (user_id, business_name, description, int(bool(approved)))
+        provider = queries.fetch_one(
+            "Provider.insert",
+            (user_id, business_name, description, int(bool(approved))),
+            Provider.from_row,
+            db=db,
         )
-        db.commit()
-        row = db.execute("SELECT * FROM Providers WHERE user_id = ?", (user_id,)).fetchone()
-        return Provider.from_row(row)
+        commit(db)
+        return provider
 
     @staticmethod
     def create_from_user(email, display_name=None, phone=None, business_name=None, business_description=None, user_id=None):
@@ -56,28 +50,23 @@ class Provider:
         if not business_name or not business_description:
             raise ValueError('business_name and business_description required')
 
-        db = get_db()
-        try:
+        with transaction() as db:
             user = User._insert_row(db, email, display_name, phone, role='provider', user_id=user_id)
-            db.execute(
-                "INSERT INTO Providers (user_id, business_name, description, approved) VALUES (?, ?, ?, 0)",
-                (user.user_id, business_name, business_description)
+            return queries.fetch_one(
+                "Provider.insert",
+                (user.user_id, business_name, business_description, 0),
+                Provider.from_row,
+                db=db,
             )
-            db.commit()
-            row = db.execute("SELECT * FROM Providers WHERE user_id = ?", (user.user_id,)).fetchone()
-            return Provider.from_row(row)
-        except Exception:
-            db.rollback()
-            raise
 
     @staticmethod
     def get_by_user_id(user_id):
-        db = get_db()
-        row = db.execute("SELECT * FROM Providers WHERE user_id = ?", (user_id,)).fetchone()
-        return Provider.from_row(row)
+        return queries.fetch_one("Provider.get_by_user_id", (user_id,), Provider.from_row)
 
     @staticmethod
     def list_all():
-        db = get_db()
-        rows = db.execute("SELECT * FROM Providers ORDER BY provider_id DESC").fetchall()
-        return [Provider.from_row(r) for r in rows]
+        return queries.fetch_all("Provider.list_all", (), Provider.from_row)
+
+
+# Provider.from_row(row): compiled per result shape, see models/rows.py
+Provider.from_row = RowMapper(Provider, converters={'approved': bool}, defaults={'approved': False})
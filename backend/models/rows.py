@@ -0,0 +1,94 @@
+"""
+Row mapping for the models.
+
+A RowMapper builds model instances straight from result rows by column
+index. The plan (which column feeds which attribute, and what to use for
+attributes the query did not select) is compiled once per column list,
+i.e. once per cursor description, and cached, so mapping a row costs one
+index per attribute: no name lookups, no row.keys() per field, and no
+__init__ defaults such as datetime.now() for values the row already has.
+
+Models declare their attributes in __slots__ and use a mapper as from_row:
+
+    class Bookmark:
+        __slots__ = ('bookmark_id', 'user_id', 'listing_id', 'created_at')
+        ...
+
+    Bookmark.from_row = RowMapper(Bookmark)
+
+from_row(row) still takes a sqlite3.Row (or None). queries.fetch_one and
+fetch_all recognise a mapper and read plain tuples instead, so no
+sqlite3.Row is created per row at all.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(value):
+    return datetime.fromisoformat(value)
+
+
+def parse_datetime(value):
+    """datetime for an ISO 8601 string (cached, most rows repeat a few slots); other values as-is."""
+    if isinstance(value, str):
+        return _parse_iso(value)
+    return value
+
+
+class RowMapper:
+    """Maps result rows to instances of a __slots__ class by column index."""
+
+    def __init__(self, cls, converters=None, defaults=None):
+        """
+        Args:
+            cls: Model class; its __slots__ are the attributes to fill
+            converters: {attribute: fn} applied to the column value
+            defaults: {attribute: value} for attributes missing from the
+                row (None otherwise)
+        """
+        self.cls = cls
+        self.fields = tuple(cls.__slots__)
+        self.converters = dict(converters or {})
+        self.defaults = dict(defaults or {})
+        self._plans = {}
+
+    def __call__(self, row):
+        """Map one sqlite3.Row; None stays None."""
+        if row is None:
+            return None
+        return self.for_columns(row.keys())(row)
+
+    def for_cursor(self, cursor):
+        """The row builder for a cursor's result columns."""
+        return self.for_columns([column[0] for column in cursor.description])
+
+    def for_columns(self, columns):
+        """The row builder for rows with these column names, compiled on first use."""
+        columns = tuple(columns)
+        build = self._plans.get(columns)
+        if build is None:
+            build = self._plans[columns] = self._compile(columns)
+        return build
+
+    def _compile(self, columns):
+        index = {}
+        for i, name in enumerate(columns):
+            # Like sqlite3.Row, the first of several same-named columns wins
+            index.setdefault(name, i)
+
+        namespace = {"new": object.__new__, "cls": self.cls}
+        lines = ["def build(row):", "    obj = new(cls)"]
+        for field in self.fields:
+            if field in index:
+                value = f"row[{index[field]}]"
+                if field in self.converters:
+                    namespace[f"convert_{field}"] = self.converters[field]
+                    value = f"convert_{field}({value})"
+            else:
+                namespace[f"default_{field}"] = self.defaults.get(field)
+                value = f"default_{field}"
+            lines.append(f"    obj.{field} = {value}")
+        lines.append("    return obj")
+        exec("\n".join(lines), namespace)
+        return namespace["build"]
@@ -1,5 +1,13 @@
+from backend import queries
 from backend.db import get_db
+from backend.transactions import commit
+from backend.analytics import ANALYTICS
+from backend.geo import bounding_box, haversine
+from backend.models.rows import RowMapper
+from backend.streaming import iter_cursor
 from datetime import datetime
+import heapq
+import re
 
 class Service:
     """Service model wrapper for the Listings table.
@@ -17,10 +25,27 @@ class Service:
       - lat
       - long
       - created_at
+      - rating_sum, rating_count (maintained by triggers on Reviews)
     """
 
+    __slots__ = (
+        "listing_id", "provider_id", "category_id", "title", "description", "price", "status",
+        "image_url", "location", "latitude", "longitude", "created_at", "rating_sum", "rating_count",
+    )
+
+    # Columns a client may request through list_page(fields=...)
+    LIST_FIELDS = (
+        "listing_id", "provider_id", "category_id", "title", "description", "price",
+        "status", "image_url", "location", "latitude", "longitude", "created_at",
+        "rating_avg", "rating_count",
+    )
+
+    # Orderings list_page(sort=...) supports, and the column each one pages by
+    SORT_COLUMNS = {"newest": "created_at", "rating": "rating_avg"}
+
     def __init__(self, listing_id, provider_id, title, price, category_id=None, description=None,
-                 status='pending', image_url=None, location=None, latitude=None, longitude=None, created_at=None):
+                 status='pending', image_url=None, location=None, latitude=None, longitude=None, created_at=None,
+                 rating_sum=0, rating_count=0):
         self.listing_id = listing_id
         self.provider_id = provider_id
         self.category_id = category_id
@@ -33,8 +58,18 @@ class Service:
         self.latitude = latitude
         self.longitude = longitude
         self.created_at = created_at
+        self.rating_sum = rating_sum
+        self.rating_count = rating_count
+
+    @property
+    def avg_rating(self):
+        """Mean review rating, or None if the listing has no ratings yet."""
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
 
     def to_dict(self):
+        # Values are passed through as-is; the app's JSON provider formats dates
         return {
             "listing_id": self.listing_id,
             "provider_id": self.provider_id,
@@ -47,127 +82,304 @@ class Service:
             'location': self.location,
             'latitude': self.latitude,
             'longitude': self.longitude,
-            "created_at": (
-                self.created_at.isoformat()
-                if hasattr(self.created_at, "isoformat")
-                else self.created_at
-            ),
+            "created_at": self.created_at,
+            "avg_rating": self.avg_rating,
+            "review_count": self.rating_count,
         }
 
-    @staticmethod
-    def from_row(row):
-        if row is None:
-            return None
-        return Service(
-            listing_id=row["listing_id"],
-            provider_id=row["provider_id"],
-            category_id=row["category_id"],
-            title=row["title"],
-            description=row["description"],
-            price=row["price"],
-            status=row["status"],
-            image_url=row["image_url"],
-            location=row['location'] if 'location' in row.keys() else None,
-            latitude=row['latitude'] if 'latitude' in row.keys() else None,
-            longitude=row['longitude'] if 'longitude' in row.keys() else None,
-            created_at=row["created_at"],
-        )
-
     @staticmethod
     def create(provider_id, title, price, category_id=None, description=None, image_url=None, location=None, latitude=None, longitude=None, status='pending'):
         db = get_db()
-        db.execute(
-            """INSERT INTO Listings 
-            (provider_id, category_id, title, description, price, status, image_url, location, latitude, longitude, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))""",
-            (provider_id, category_id, title, description, float(price), status, image_url, location, latitude, longitude)
+        service = queries.fetch_one(
+            "Service.insert",
+            (provider_id, category_id, title, description, float(price), status, image_url, location, latitude, longitude),
+            Service.from_row,
+            db=db,
         )
-        db.commit()
-        listing_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
-        return Service.get_by_id(listing_id)
+        commit(db)
+        ANALYTICS.record(provider_id, services=1)
+        return service
 
     @staticmethod
     def get_by_id(listing_id):
         """Get a service by listing_id."""
-        db = get_db()
-        row = db.execute("SELECT * FROM Listings WHERE listing_id = ?", (listing_id,)).fetchone()
-        return Service.from_row(row)
+        return queries.fetch_one("Service.get_by_id", (listing_id,), Service.from_row)
 
     @staticmethod
     def get_by_provider(provider_id):
         """Get all services for a specific provider."""
-        db = get_db()
-        rows = db.execute(
-            "SELECT * FROM Listings WHERE provider_id = ? ORDER BY created_at DESC",
-            (provider_id,),
-        ).fetchall()
-        return [Service.from_row(r) for r in rows]
+        return queries.fetch_all("Service.get_by_provider", (provider_id,), Service.from_row)
 
     @staticmethod
     def list_all(status=None):
         """List all services, optionally filtered by status."""
-        db = get_db()
         if status:
-            rows = db.execute(
-                "SELECT * FROM Listings WHERE status = ? ORDER BY created_at DESC",
-                (status,),
-            ).fetchall()
+            return queries.fetch_all("Service.list_all(status)", (status,), Service.from_row)
+        return queries.fetch_all("Service.list_all", (), Service.from_row)
+
+    @staticmethod
+    def iter_all(status=None, batch_size=500):
+        """
+        Like list_all(), but yields services while reading the cursor in
+        batches instead of loading every row first.
+        """
+        if status:
+            cursor = queries.execute("Service.list_all(status)", (status,))
         else:
-            rows = db.execute(
-                "SELECT * FROM Listings ORDER BY created_at DESC"
-            ).fetchall()
-        return [Service.from_row(r) for r in rows]
+            cursor = queries.execute("Service.list_all")
+        # Plain tuples, mapped by column index
+        cursor.row_factory = None
+        build = Service.from_row.for_cursor(cursor)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield build(row)
 
     @staticmethod
-    def update(listing_id, title=None, description=None, price=None, category_id=None,
-               status=None, image_url=None, location=None, latitude=None, longitude=None):
-        """Update a service listing. Only updates provided fields."""
+    def list_page(status=None, limit=100, after=None, fields=None, sort="newest", category_id=None):
+        """
+        Keyset-paginated listing, newest or best rated first.
+
+        Pages are ordered by (created_at, listing_id), or by
+        (rating_avg, listing_id) for sort="rating", and continue strictly
+        after the given key, so page cost stays the same however deep the
+        client scrolls (no OFFSET).
+
+        Args:
+            status: Optional status filter
+            limit: Maximum number of rows to return, or None for all of them
+                (streamed from the cursor, with no next key)
+            after: (sort value, listing_id) of the last row on the previous page
+            fields: Optional subset of LIST_FIELDS to select
+            sort: A key of SORT_COLUMNS
+            category_id: Optional category filter
+
+        Returns:
+            tuple: (items, next_key). items are Service objects, or dicts with
+            only the requested fields when `fields` is given: a list for a
+            page, or a generator reading the cursor in batches when limit is
+            None. next_key is the key to pass as `after` for the following
+            page, or None at the end.
+        """
         db = get_db()
-        service = Service.get_by_id(listing_id)
-        if not service:
-            return None
 
-        updates = []
-        params = []
+        key_column = Service.SORT_COLUMNS.get(sort)
+        if key_column is None:
+            raise ValueError(f"Unknown sort: {sort}")
+        if after is not None and sort == "rating" and not isinstance(after[0], (int, float)):
+            raise ValueError("Invalid cursor")
+
+        if fields:
+            unknown = [f for f in fields if f not in Service.LIST_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            # The key columns are always selected so the next cursor can be built
+            columns = list(dict.fromkeys(list(fields) + [key_column, "listing_id"]))
+        else:
+            columns = ["*"]
 
-        if title is not None:
-            updates.append("title = ?")
-            params.append(title)
-        if description is not None:
-            updates.append("description = ?")
-            params.append(description)
-        if price is not None:
-            updates.append("price = ?")
-            params.append(float(price))
+        where = []
+        params = []
+        if status:
+            where.append("status = ?")
+            params.append(status)
         if category_id is not None:
-            updates.append("category_id = ?")
+            where.append("category_id = ?")
             params.append(category_id)
-        if status is not None:
-            updates.append("status = ?")
+        if after is not None:
+            where.append(f"({key_column}, listing_id) < (?, ?)")
+            params.extend(after)
+
+        sql = f"SELECT {', '.join(columns)} FROM Listings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {key_column} DESC, listing_id DESC"
+        if limit is None:
+            # No page: map rows as they are read, so memory stays flat
+            # however many listings match
+            cursor = queries.execute("Service.list_page", params, db=db, sql=sql)
+            if fields:
+                return iter_cursor(cursor, lambda row: {f: row[f] for f in fields}), None
+            # Plain tuples, mapped by column index
+            cursor.row_factory = None
+            return iter_cursor(cursor, Service.from_row.for_cursor(cursor)), None
+
+        # One extra row tells us whether another page exists
+        sql += " LIMIT ?"
+        params.append(limit + 1)
+
+        rows = queries.fetch_all("Service.list_page", params, db=db, sql=sql)
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1][key_column], rows[-1]["listing_id"])
+
+        if fields:
+            items = [{f: row[f] for f in fields} for row in rows]
+        else:
+            items = [Service.from_row(r) for r in rows]
+        return items, next_key
+
+    @staticmethod
+    def build_match_query(text):
+        """
+        Turn free text into an FTS5 MATCH expression.
+
+        Each word becomes a quoted term, so user input can never inject FTS5
+        syntax. Only the last word is a prefix term ("home" "tut"*): that is
+        the one still being typed, and prefix expansion on every word makes
+        common queries several times slower. Returns None when the text
+        contains no searchable words.
+        """
+        words = re.findall(r"\w+", text or "")
+        if not words:
+            return None
+        terms = [f'"{w}"' for w in words[:-1]]
+        terms.append(f'"{words[-1]}"*')
+        return " ".join(terms)
+
+    @staticmethod
+    def search(text, status='approved', limit=20):
+        """
+        Full-text search over title, description, business name and category.
+
+        Results are ranked by BM25 (best match first) and carry a highlighted
+        snippet of the best-matching column.
+
+        Returns:
+            list[dict]: Service fields plus 'rank', 'snippet' and 'title_highlight'
+        """
+        match = Service.build_match_query(text)
+        if match is None:
+            return []
+
+        # Rank, filter and cut to `limit` inside the FTS index first, so the
+        # snippet/highlight functions and the Listings join only see the page
+        where = "Listings_fts MATCH ?"
+        params = [match]
+        if status:
+            where += " AND status = ?"
+            params.append(status)
+        params.append(limit)
+
+        db = get_db()
+        sql = f"""
+            SELECT l.*, hit.rank, hit.snippet, hit.title_highlight
+            FROM (
+                SELECT rowid,
+                       rank,
+                       snippet(Listings_fts, -1, '<mark>', '</mark>', '...', 12) AS snippet,
+                       highlight(Listings_fts, 0, '<mark>', '</mark>') AS title_highlight
+                FROM Listings_fts
+                WHERE {where}
+                ORDER BY rank
+                LIMIT ?
+            ) AS hit
+            JOIN Listings l ON l.listing_id = hit.rowid
+            ORDER BY hit.rank
+        """
+        results = []
+        for row in queries.fetch_all("Service.search", params, db=db, sql=sql):
+            item = Service.from_row(row).to_dict()
+            item["rank"] = row["rank"]
+            item["snippet"] = row["snippet"]
+            item["title_highlight"] = row["title_highlight"]
+            results.append(item)
+        return results
+
+    @staticmethod
+    def nearby(lat, lng, radius_km, limit=20, status='approved'):
+        """
+        Services within radius_km of (lat, lng), nearest first.
+
+        The Listings_geo R*Tree prunes to the bounding box of the circle,
+        then exact haversine distances drop the box corners and order the
+        rest.
+
+        Returns:
+            list[dict]: Service fields plus 'distance_km'
+        """
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        # R*Tree coordinates are 32-bit floats; pad by ~1 m so rounding
+        # can never drop a point on the edge of the box. CROSS JOIN keeps
+        # the R*Tree as the outer loop; otherwise the planner prefers the
+        # status index and probes the tree once per listing.
+        pad = 1e-5
+        params = [min_lat - pad, max_lat + pad, min_lng - pad, max_lng + pad]
+        sql = """
+            SELECT l.listing_id, l.latitude, l.longitude
+            FROM Listings_geo g
+            CROSS JOIN Listings l ON l.listing_id = g.listing_id
+            WHERE g.max_lat >= ? AND g.min_lat <= ?
+              AND g.max_lng >= ? AND g.min_lng <= ?
+        """
+        if status:
+            sql += " AND l.status = ?"
             params.append(status)
-        if image_url is not None:
-            updates.append("image_url = ?")
-            params.append(image_url)
-        if location is not None:
-            updates.append("location = ?")
-            params.append(location)
-        if latitude is not None:
-            updates.append("latitude = ?")
-            params.append(latitude)
-        if longitude is not None:
-            updates.append("longitude = ?")
-            params.append(longitude)
-        if updates:
-            params.append(listing_id)
-            db.execute(f"UPDATE Listings SET {', '.join(updates)} WHERE listing_id = ?", params)
-            db.commit()
-
-        return Service.get_by_id(listing_id)
+
+        # Rank on (id, lat, lng) only and load full rows for the winners
+        db = get_db()
+        candidates = []
+        for listing_id, row_lat, row_lng in queries.fetch_all("Service.nearby", params, db=db, sql=sql):
+            distance = haversine(lat, lng, row_lat, row_lng)
+            if distance <= radius_km:
+                candidates.append((distance, listing_id))
+        nearest = heapq.nsmallest(limit, candidates)
+        if not nearest:
+            return []
+
+        placeholders = ", ".join("?" for _ in nearest)
+        rows = queries.fetch_all(
+            "Service.get_many",
+            [listing_id for _, listing_id in nearest],
+            db=db,
+            sql=f"SELECT * FROM Listings WHERE listing_id IN ({placeholders})",
+        )
+        by_id = {row["listing_id"]: row for row in rows}
+
+        results = []
+        for distance, listing_id in nearest:
+            item = Service.from_row(by_id[listing_id]).to_dict()
+            item["distance_km"] = round(distance, 3)
+            results.append(item)
+        return results
+
+    @staticmethod
+    def update(listing_id, title=None, description=None, price=None, category_id=None,
+               status=None, image_url=None, location=None, latitude=None, longitude=None):
+        """Update a service listing. Only updates provided fields."""
+        fields = (title, description, price, category_id, status, image_url, location, latitude, longitude)
+        if all(value is None for value in fields):
+            return Service.get_by_id(listing_id)
+
+        db = get_db()
+        # One statement for every combination of fields: None keeps the column
+        service = queries.fetch_one(
+            "Service.update",
+            (title, description, float(price) if price is not None else None, category_id,
+             status, image_url, location, latitude, longitude, listing_id),
+            Service.from_row,
+            db=db,
+        )
+        commit(db)
+        return service
 
     @staticmethod
     def delete(listing_id):
         """Delete a service listing."""
         db = get_db()
-        result = db.execute("DELETE FROM Listings WHERE listing_id = ?", (listing_id,))
-        db.commit()
-        return result.rowcount > 0
+        # Returns what the listing contributed to its provider's analytics
+        row = queries.fetch_one("Service.delete", (listing_id,), db=db)
+        commit(db)
+        if row is None:
+            return False
+        ANALYTICS.record(row["provider_id"], services=-1, bookings=-row["bookings"],
+                         rating_sum=-row["rating_sum"], rating_count=-row["rating_count"])
+        return True
+
+
+# Service.from_row(row): compiled per result shape, see models/rows.py
+Service.from_row = RowMapper(Service, converters={"price": float},
+                             defaults={"rating_sum": 0, "rating_count": 0})
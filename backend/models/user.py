@@ -1,4 +1,7 @@
+from backend import queries
 from backend.db import get_db
+from backend.transactions import transaction
+from backend.models.rows import RowMapper
 from datetime import datetime
 
 
@@ -14,6 +17,8 @@ class User:
       - created_at
     """
 
+    __slots__ = ('user_id', 'email', 'display_name', 'phone', 'role', 'created_at')
+
     def __init__(self, user_id, email, display_name=None, phone=None, role='customer', created_at=None):
         self.user_id = user_id
         self.email = email
@@ -29,22 +34,9 @@ class User:
             'display_name': self.display_name,
             'phone': self.phone,
             'role': self.role,
-            'created_at': self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else self.created_at,
+            'created_at': self.created_at,
         }
 
-    @staticmethod
-    def from_row(row):
-        if row is None:
-            return None
-        return User(
-            user_id=row['user_id'],
-            email=row['email'],
-            display_name=row['display_name'] if 'display_name' in row.keys() else None,
-            phone=row['phone'] if 'phone' in row.keys() else None,
-            role=row['role'] if 'role' in row.keys() else None,
-            created_at=row['created_at'] if 'created_at' in row.keys() else None
-        )
-
     @staticmethod
     def create(email, display_name=None, phone=None, role='customer', user_id=None):
         db = get_db()
@@ -55,36 +47,24 @@ class User:
         """Insert a user row using the provided DB connection. Caller manages commit/rollback."""
         created_at = datetime.utcnow().isoformat()
         if user_id:
-            db.execute(
-                "INSERT INTO Users (user_id, email, display_name, phone, role, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-                (user_id, email, display_name, phone, role, created_at)
-            )
-            row = db.execute("SELECT * FROM Users WHERE user_id = ?", (user_id,)).fetchone()
-        else:
-            db.execute(
-                "INSERT INTO Users (email, display_name, phone, role, created_at) VALUES (?, ?, ?, ?, ?)",
-                (email, display_name, phone, role, created_at)
+            return queries.fetch_one(
+                "User.insert_with_id", (user_id, email, display_name, phone, role, created_at), User.from_row, db=db
             )
-            row = db.execute("SELECT * FROM Users WHERE email = ?", (email,)).fetchone()
-        return User.from_row(row)
+        return queries.fetch_one(
+            "User.insert", (email, display_name, phone, role, created_at), User.from_row, db=db
+        )
 
     @staticmethod
     def get_by_id(user_id):
-        db = get_db()
-        row = db.execute("SELECT * FROM Users WHERE user_id = ?", (user_id,)).fetchone()
-        return User.from_row(row)
+        return queries.fetch_one("User.get_by_id", (user_id,), User.from_row)
 
     @staticmethod
     def get_by_email(email):
-        db = get_db()
-        row = db.execute("SELECT * FROM Users WHERE email = ?", (email,)).fetchone()
-        return User.from_row(row)
+        return queries.fetch_one("User.get_by_email", (email,), User.from_row)
 
     @staticmethod
     def list_all():
-        db = get_db()
-        rows = db.execute("SELECT * FROM Users ORDER BY created_at DESC").fetchall()
-        return [User.from_row(r) for r in rows]
+        return queries.fetch_all("User.list_all", (), User.from_row)
 
     # ----------------------
     # Convenience factories
@@ -95,18 +75,20 @@ class User:
 
     @staticmethod
     def create_provider(email, display_name=None, phone=None, business_name=None, business_description=None, user_id=None):
-        # create base user
-        user = User.create(email=email, display_name=display_name, phone=phone, role='provider', user_id=user_id)
-        # create provider-specific row in Providers table
-        if user:
-            db = get_db()
-            db.execute(
-                "INSERT OR IGNORE INTO Providers (user_id, business_name, description, approved) VALUES (?, ?, ?, 0)",
-                (user.user_id, business_name, business_description)
-            )
-            db.commit()
+        with transaction() as db:
+            # create base user
+            user = User._insert_row(db, email, display_name, phone, role='provider', user_id=user_id)
+            # create provider-specific row in Providers table
+            if user:
+                queries.execute(
+                    "Provider.insert_if_missing", (user.user_id, business_name, business_description), db=db
+                )
         return user
 
     @staticmethod
     def create_consumer(email, display_name=None, phone=None, user_id=None):
         return User.create(email=email, display_name=display_name, phone=phone, role='customer', user_id=user_id)
+
+
+# User.from_row(row): compiled per result shape, see models/rows.py
+User.from_row = RowMapper(User)
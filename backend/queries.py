@@ -0,0 +1,393 @@
+"""
+Named SQL queries and per-query timing.
+
+Every fixed SQL statement the models and controllers run lives in QUERIES
+under a "Model.method" name, and is run through execute(), fetch_one()
+or fetch_all() by that name:
+
+    service = queries.fetch_one("Service.get_by_id", (listing_id,), Service.from_row)
+
+Keeping the text in one place means each statement has exactly one
+spelling, so sqlite3's per-connection statement cache (sized by config
+SQLITE_CACHED_STATEMENTS) compiles it once per connection. Optional
+fields in UPDATEs are written as `col = COALESCE(?, col)` rather than
+built per field combination, for the same reason.
+
+Each call is timed and counted under its name; QUERY_STATS.snapshot()
+reports count, rows, errors and p50/p99 latency per name, and is served
+at GET /api/admin/query-stats. Statements whose shape depends on the
+request (IN lists, optional filters, FTS) pass their text with sql= and
+are still recorded under a fixed name.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+from backend.db import get_db
+from backend.models.rows import RowMapper
+
+
+QUERIES = {
+    # Users
+    "User.insert":
+        "INSERT INTO Users (email, display_name, phone, role, created_at) VALUES (?, ?, ?, ?, ?) RETURNING *",
+    "User.insert_with_id":
+        "INSERT INTO Users (user_id, email, display_name, phone, role, created_at) VALUES (?, ?, ?, ?, ?, ?) RETURNING *",
+    "User.get_by_id":
+        "SELECT * FROM Users WHERE user_id = ?",
+    "User.get_by_email":
+        "SELECT * FROM Users WHERE email = ?",
+    "User.list_all":
+        "SELECT * FROM Users ORDER BY created_at DESC",
+    "User.list_by_role":
+        "SELECT * FROM Users WHERE role = ? ORDER BY created_at DESC",
+    "User.stream_all":
+        "SELECT * FROM Users",
+    "User.delete":
+        "DELETE FROM Users WHERE user_id = ?",
+
+    # Providers
+    "Provider.insert":
+        "INSERT INTO Providers (user_id, business_name, description, approved) VALUES (?, ?, ?, ?) RETURNING *",
+    "Provider.insert_if_missing":
+        "INSERT OR IGNORE INTO Providers (user_id, business_name, description, approved) VALUES (?, ?, ?, 0)",
+    "Provider.get_by_user_id":
+        "SELECT * FROM Providers WHERE user_id = ?",
+    "Provider.list_all":
+        "SELECT * FROM Providers ORDER BY provider_id DESC",
+
+    # Listings
+    "Service.insert":
+        """INSERT INTO Listings
+           (provider_id, category_id, title, description, price, status, image_url, location, latitude, longitude, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+           RETURNING *""",
+    "Service.get_by_id":
+        "SELECT * FROM Listings WHERE listing_id = ?",
+    "Service.get_by_provider":
+        "SELECT * FROM Listings WHERE provider_id = ? ORDER BY created_at DESC",
+    "Service.list_all":
+        "SELECT * FROM Listings ORDER BY created_at DESC",
+    "Service.list_all(status)":
+        "SELECT * FROM Listings WHERE status = ? ORDER BY created_at DESC",
+    "Service.list_by_status":
+        "SELECT * FROM Listings WHERE status = ?",
+    "Service.update":
+        # NULL keeps the current value
+        """UPDATE Listings SET
+               title = COALESCE(?, title),
+               description = COALESCE(?, description),
+               price = COALESCE(?, price),
+               category_id = COALESCE(?, category_id),
+               status = COALESCE(?, status),
+               image_url = COALESCE(?, image_url),
+               location = COALESCE(?, location),
+               latitude = COALESCE(?, latitude),
+               longitude = COALESCE(?, longitude)
+           WHERE listing_id = ?
+           RETURNING *""",
+    "Service.delete":
+        """DELETE FROM Listings WHERE listing_id = ?
+           RETURNING provider_id, rating_sum, rating_count,
+                     (SELECT COUNT(*) FROM Bookings b
+                      WHERE b.listing_id = Listings.listing_id AND b.status != 'cancelled') AS bookings""",
+    "Service.rating_averages":
+        """SELECT
+               listing_id,
+               ROUND(CAST(rating_sum AS REAL) / rating_count, 1) AS avg_rating,
+               rating_count AS review_count
+           FROM Listings
+           WHERE rating_count > 0""",
+
+    # Bookings
+    "Booking.insert":
+        """INSERT INTO Bookings (listing_id, user_id, booking_date, status, created_at)
+           VALUES (?, ?, ?, ?, datetime('now'))
+           RETURNING *""",
+    "Booking.get_by_id":
+        "SELECT * FROM Bookings WHERE booking_id = ?",
+    "Booking.get_by_user":
+        "SELECT * FROM Bookings WHERE user_id = ? ORDER BY booking_date DESC",
+    "Booking.get_by_user(status)":
+        "SELECT * FROM Bookings WHERE user_id = ? AND status = ? ORDER BY booking_date DESC",
+    "Booking.get_by_provider":
+        """SELECT
+               b.*,
+               l.title,
+               l.description as service_description,
+               l.price,
+               l.image_url,
+               l.category_id,
+               u.display_name as customer_name,
+               u.email as customer_email
+           FROM Bookings b
+           JOIN Listings l ON b.listing_id = l.listing_id
+           LEFT JOIN Users u ON b.user_id = u.user_id
+           WHERE l.provider_id = ?
+           ORDER BY b.booking_date DESC""",
+    "Booking.get_by_provider(status)":
+        """SELECT
+               b.*,
+               l.title,
+               l.description as service_description,
+               l.price,
+               l.image_url,
+               l.category_id,
+               u.display_name as customer_name,
+               u.email as customer_email
+           FROM Bookings b
+           JOIN Listings l ON b.listing_id = l.listing_id
+           LEFT JOIN Users u ON b.user_id = u.user_id
+           WHERE l.provider_id = ? AND b.status = ?
+           ORDER BY b.booking_date DESC""",
+    "Booking.get_with_details":
+        """SELECT
+               b.*,
+               l.title,
+               l.description as service_description,
+               l.price,
+               l.image_url,
+               p.business_name,
+               p.description as provider_description,
+               u.display_name as customer_name,
+               u.email as customer_email,
+               pu.display_name as provider_name,
+               pu.email as provider_email
+           FROM Bookings b
+           JOIN Listings l ON b.listing_id = l.listing_id
+           JOIN Providers p ON l.provider_id = p.provider_id
+           JOIN Users u ON b.user_id = u.user_id
+           JOIN Users pu ON p.user_id = pu.user_id
+           WHERE b.booking_id = ?""",
+    "Booking.get_for_review":
+        """SELECT *, (SELECT provider_id FROM Listings l
+                      WHERE l.listing_id = Bookings.listing_id) AS provider_id
+           FROM Bookings WHERE booking_id = ? AND user_id = ? AND listing_id = ?""",
+    "Booking.update_status":
+        """UPDATE Bookings SET status = ? WHERE booking_id = ?
+           RETURNING *, (SELECT provider_id FROM Listings l
+                         WHERE l.listing_id = Bookings.listing_id) AS provider_id""",
+    "Booking.delete":
+        """DELETE FROM Bookings WHERE booking_id = ? AND status = ?
+           RETURNING listing_id, (SELECT provider_id FROM Listings l
+                                  WHERE l.listing_id = Bookings.listing_id) AS provider_id""",
+
+    # Bookmarks
+    "Bookmark.insert":
+        "INSERT INTO Bookmarks (user_id, listing_id) VALUES (?, ?) RETURNING *",
+    "Bookmark.get_by_id":
+        "SELECT * FROM Bookmarks WHERE bookmark_id = ?",
+    "Bookmark.get_by_user_and_listing":
+        "SELECT * FROM Bookmarks WHERE user_id = ? AND listing_id = ?",
+    "Bookmark.get_by_user":
+        "SELECT * FROM Bookmarks WHERE user_id = ? ORDER BY created_at DESC",
+    "Bookmark.count_by_user":
+        "SELECT COUNT(*) as count FROM Bookmarks WHERE user_id = ?",
+    "Bookmark.get_with_service_details":
+        """SELECT
+               b.bookmark_id,
+               b.user_id,
+               b.listing_id,
+               b.created_at as bookmarked_at,
+               l.title,
+               l.description,
+               l.price,
+               l.status,
+               l.image_url,
+               l.category_id,
+               l.provider_id,
+               p.business_name,
+               p.description as provider_description,
+               c.name as category_name
+           FROM Bookmarks b
+           JOIN Listings l ON b.listing_id = l.listing_id
+           JOIN Providers p ON l.provider_id = p.provider_id
+           LEFT JOIN Categories c ON l.category_id = c.category_id
+           WHERE b.user_id = ?
+           ORDER BY b.created_at DESC""",
+    "Bookmark.delete":
+        "DELETE FROM Bookmarks WHERE bookmark_id = ?",
+    "Bookmark.delete_by_user_and_listing":
+        "DELETE FROM Bookmarks WHERE user_id = ? AND listing_id = ?",
+
+    # Reviews
+    "Review.insert":
+        """INSERT INTO Reviews (booking_id, user_id, listing_id, rating, comment)
+           VALUES (?, ?, ?, ?, ?)
+           RETURNING review_id, rating, comment, created_at,
+                     (SELECT display_name FROM Users u WHERE u.user_id = Reviews.user_id) AS reviewer,
+                     user_id""",
+    "Review.get_by_id":
+        """SELECT *, (SELECT provider_id FROM Listings l
+                      WHERE l.listing_id = Reviews.listing_id) AS provider_id
+           FROM Reviews WHERE review_id = ?""",
+    "Review.get_by_listing":
+        "SELECT * FROM Reviews WHERE listing_id = ?",
+    "Review.get_by_listing_with_reviewer":
+        """SELECT r.review_id, r.rating, r.comment, r.created_at, u.display_name AS reviewer
+           FROM Reviews r
+           LEFT JOIN Users u ON r.user_id = u.user_id
+           WHERE r.listing_id = ?
+           ORDER BY r.created_at DESC""",
+    "Review.list_all":
+        """SELECT
+               r.review_id AS id,
+               r.user_id,
+               u.display_name AS reviewer,
+               l.title AS service,
+               r.comment,
+               r.rating,
+               r.created_at
+           FROM Reviews r
+           JOIN Users u ON r.user_id = u.user_id
+           JOIN Listings l ON r.listing_id = l.listing_id
+           ORDER BY r.created_at DESC""",
+    "Review.update":
+        # NULL keeps the current value
+        """UPDATE Reviews SET
+               rating = COALESCE(?, rating),
+               comment = COALESCE(?, comment)
+           WHERE review_id = ?
+           RETURNING *""",
+    "Review.delete":
+        """DELETE FROM Reviews WHERE review_id = ?
+           RETURNING listing_id, rating, (SELECT provider_id FROM Listings l
+                                          WHERE l.listing_id = Reviews.listing_id) AS provider_id""",
+}
+
+# Latency samples kept per query for the percentiles
+SAMPLES = 1024
+
+
+def sql_for(name):
+    """The registered SQL text for name (KeyError if there is none)."""
+    return QUERIES[name]
+
+
+def _percentile(ordered, fraction):
+    # Nearest rank
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class QueryStats:
+    """Call count, rows, errors and recent latencies for each named query."""
+
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self._queries = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, elapsed_ms, rows=0, ok=True):
+        with self._lock:
+            entry = self._queries.get(name)
+            if entry is None:
+                entry = self._queries[name] = {
+                    "count": 0, "errors": 0, "rows": 0, "total_ms": 0.0,
+                    "recent": deque(maxlen=self.samples),
+                }
+            entry["count"] += 1
+            if not ok:
+                entry["errors"] += 1
+            entry["rows"] += rows
+            entry["total_ms"] += elapsed_ms
+            entry["recent"].append(elapsed_ms)
+
+    def snapshot(self):
+        """Per-name counters, with p50/p99 over the last `samples` calls."""
+        with self._lock:
+            entries = [(name, dict(entry, recent=sorted(entry["recent"])))
+                       for name, entry in self._queries.items()]
+        result = {}
+        for name, entry in entries:
+            ordered = entry["recent"]
+            result[name] = {
+                "count": entry["count"],
+                "errors": entry["errors"],
+                "rows": entry["rows"],
+                "total_ms": round(entry["total_ms"], 3),
+                "p50_ms": round(_percentile(ordered, 0.50), 3) if ordered else None,
+                "p99_ms": round(_percentile(ordered, 0.99), 3) if ordered else None,
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+
+
+QUERY_STATS = QueryStats()
+
+
+def _run(name, params, sql, db, fetch, tuples=False):
+    db = db or get_db()
+    started = time.perf_counter()
+    ok = False
+    rows = None
+    try:
+        cursor = db.execute(sql or QUERIES[name], params)
+        if fetch:
+            if tuples:
+                cursor.row_factory = None
+            rows = cursor.fetchall()
+        ok = True
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if rows is not None:
+            count = len(rows)
+        else:
+            count = max(cursor.rowcount, 0) if ok else 0
+        QUERY_STATS.observe(name, elapsed_ms, count, ok)
+    return cursor, rows
+
+
+def _map(cursor, rows, from_row):
+    if isinstance(from_row, RowMapper):
+        # The rows are plain tuples; map them by column index
+        build = from_row.for_cursor(cursor)
+        return [build(row) for row in rows]
+    return [from_row(row) for row in rows]
+
+
+def execute(name, params=(), db=None, sql=None):
+    """
+    Run a named statement and return its cursor.
+
+    Only the execute step is timed, so use this for writes read through
+    rowcount and for cursors streamed to the client; rows are counted from
+    rowcount (SELECTs record 0).
+    """
+    return _run(name, params, sql, db, fetch=False)[0]
+
+
+def fetch_all(name, params=(), from_row=None, db=None, sql=None):
+    """
+    Run a named query and return all rows, mapped through from_row if given.
+
+    With a RowMapper as from_row the rows are read as plain tuples and
+    never become sqlite3.Row objects.
+    """
+    cursor, rows = _run(name, params, sql, db, fetch=True, tuples=isinstance(from_row, RowMapper))
+    if from_row is not None:
+        return _map(cursor, rows, from_row)
+    return rows
+
+
+def fetch_one(name, params=(), from_row=None, db=None, sql=None):
+    """
+    Run a named query and return its first row (None if there is none).
+
+    Also used for INSERT/UPDATE/DELETE ... RETURNING: the cursor is drained,
+    so the statement is finished before the caller commits.
+    """
+    cursor, rows = _run(name, params, sql, db, fetch=True, tuples=isinstance(from_row, RowMapper))
+    if from_row is None:
+        return rows[0] if rows else None
+    if not rows:
+        return from_row(None)
+    return _map(cursor, rows[:1], from_row)[0]
+
+
+def stats():
+    """Timing per named query, for the admin metrics endpoint."""
+    return QUERY_STATS.snapshot()
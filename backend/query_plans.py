@@ -0,0 +1,92 @@
+"""
+Query plan checks for the hot query paths.
+
+Runs EXPLAIN QUERY PLAN against the lookups issued by models/*.py and the
+controllers, and reports any full SCAN of a table. Run it after changing
+schema.sql, a migration or a model query:
+
+    flask check-query-plans
+"""
+import click
+from flask.cli import with_appcontext
+
+from backend.db import get_db
+from backend.queries import QUERIES
+
+
+# (name, params) of every filtered named query on the request path, checked
+# with the SQL registered in backend/queries.py. Unfiltered whole-table
+# listings read every row by design and are not included.
+NAMED_QUERIES = [
+    # Service
+    ("Service.get_by_id", (1,)),
+    ("Service.get_by_provider", (1,)),
+    ("Service.list_all(status)", ("approved",)),
+    ("Service.list_by_status", ("pending",)),
+
+    # User / Provider
+    ("User.get_by_id", ("uid",)),
+    ("User.get_by_email", ("a@example.com",)),
+    ("User.list_by_role", ("admin",)),
+    ("Provider.get_by_user_id", ("uid",)),
+
+    # Booking
+    ("Booking.get_by_id", (1,)),
+    ("Booking.get_by_user", ("uid",)),
+    ("Booking.get_by_user(status)", ("uid", "pending")),
+    ("Booking.get_by_provider", (1,)),
+    ("Booking.get_by_provider(status)", (1, "pending")),
+    ("Booking.get_with_details", (1,)),
+    ("Booking.get_for_review", (1, "uid", 1)),
+
+    # Bookmark
+    ("Bookmark.get_by_user_and_listing", ("uid", 1)),
+    ("Bookmark.get_by_user", ("uid",)),
+    ("Bookmark.get_with_service_details", ("uid",)),
+
+    # Reviews
+    ("Review.get_by_listing_with_reviewer", (1,)),
+]
+
+# (name, sql, params) for every hot query: the named ones plus sample
+# shapes of the queries built per request
+HOT_QUERIES = [(name, QUERIES[name], params) for name, params in NAMED_QUERIES] + [
+    ("Service.list_page(sort=rating)",
+     """SELECT * FROM Listings WHERE status = ? AND (rating_avg, listing_id) < (?, ?)
+        ORDER BY rating_avg DESC, listing_id DESC LIMIT ?""", ("approved", 4.5, 10, 101)),
+]
+
+# Lookup tables that are small by design; scanning them is fine.
+SMALL_TABLES = {"Categories"}
+
+
+def find_table_scans(db, queries=HOT_QUERIES):
+    """
+    Run EXPLAIN QUERY PLAN for each query.
+
+    Returns:
+        list[tuple[str, str]]: (query name, plan detail) for every full table scan
+    """
+    failures = []
+    for name, sql, params in queries:
+        for row in db.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall():
+            detail = row[3]
+            if not detail.startswith("SCAN "):
+                continue
+            # "SCAN x USING INDEX ..." walks the whole index, so it counts too
+            if detail.split()[1] in SMALL_TABLES:
+                continue
+            failures.append((name, detail))
+    return failures
+
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """Fail if any hot query path does a full table scan."""
+    failures = find_table_scans(get_db())
+    for name, detail in failures:
+        click.echo(f"SCAN  {name}: {detail}")
+    if failures:
+        raise click.ClickException(f"{len(failures)} hot queries scan a table")
+    click.echo(f"All {len(HOT_QUERIES)} hot queries use an index.")
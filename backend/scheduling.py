@@ -0,0 +1,114 @@
+"""
+Slot conflict checks for bookings.
+
+Every booking occupies its listing for SLOT_MINUTES from booking_date.
+SlotIndex keeps the start times of a listing's active (not cancelled)
+bookings in a sorted list, so whether a new booking fits is a couple of
+bisects instead of a scan, and a batch of bookings is checked against
+the database and against each other after one range query:
+
+    index = SlotIndex.load(db, [listing_id], first_start, last_start)
+    for start in starts:
+        if index.conflicts(listing_id, start):
+            ...
+        index.add(listing_id, start)
+
+A listing takes SLOT_CAPACITY bookings at the same time (1 unless
+configured, i.e. one customer per slot).
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+
+from backend import queries
+
+SLOT_MINUTES = 60
+SLOT_CAPACITY = 1
+
+
+def slot_length():
+    """How long one booking occupies its listing (config BOOKING_SLOT_MINUTES)."""
+    minutes = SLOT_MINUTES
+    if has_app_context():
+        minutes = current_app.config.get("BOOKING_SLOT_MINUTES", SLOT_MINUTES)
+    return timedelta(minutes=minutes)
+
+
+def slot_capacity():
+    """Concurrent bookings a listing accepts (config BOOKING_SLOT_CAPACITY)."""
+    if has_app_context():
+        return current_app.config.get("BOOKING_SLOT_CAPACITY", SLOT_CAPACITY)
+    return SLOT_CAPACITY
+
+
+def parse_booking_date(value):
+    """booking_date as stored ('YYYY-MM-DD HH:MM:SS' or ISO 'T' form) to a naive datetime."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class SlotIndex:
+    """Sorted booking start times per listing."""
+
+    def __init__(self, length=None, capacity=None):
+        self.length = length or slot_length()
+        self.capacity = capacity or slot_capacity()
+        self._starts = defaultdict(list)
+
+    @classmethod
+    def load(cls, db, listing_ids, first, last, **kwargs):
+        """
+        Index of the active bookings that could overlap slots starting
+        between first and last on the given listings.
+        """
+        index = cls(**kwargs)
+        listing_ids = list(listing_ids)
+        if not listing_ids:
+            return index
+        # booking_date is stored both as 'YYYY-MM-DD HH:MM:SS' and as ISO
+        # 'YYYY-MM-DDTHH:MM:SS', which do not compare correctly as text
+        # within a day, so bound the range query by whole days
+        low = (first - index.length).date().isoformat()
+        high = (last + index.length + timedelta(days=1)).date().isoformat()
+        placeholders = ",".join("?" * len(listing_ids))
+        rows = queries.fetch_all(
+            "SlotIndex.load",
+            (*listing_ids, low, high),
+            db=db,
+            sql=f"""SELECT listing_id, booking_date FROM Bookings
+                    WHERE listing_id IN ({placeholders})
+                      AND booking_date >= ? AND booking_date < ?
+                      AND status != 'cancelled'""",
+        )
+        for row in rows:
+            index._starts[row["listing_id"]].append(parse_booking_date(row["booking_date"]))
+        for starts in index._starts.values():
+            starts.sort()
+        return index
+
+    def overlapping(self, listing_id, start):
+        """Start times of the bookings whose slot overlaps a slot starting at start."""
+        starts = self._starts.get(listing_id, ())
+        lo = bisect_right(starts, start - self.length)
+        hi = bisect_left(starts, start + self.length)
+        return starts[lo:hi]
+
+    def conflicts(self, listing_id, start):
+        """True if a booking at start would exceed the listing's capacity at some point of its slot."""
+        overlapping = self.overlapping(listing_id, start)
+        if len(overlapping) < self.capacity:
+            return False
+        # The busiest moment of the new slot is its start or the start of
+        # a later overlapping booking; count the bookings running then
+        starts = self._starts[listing_id]
+        for moment in [start] + [s for s in overlapping if s > start]:
+            running = bisect_right(starts, moment) - bisect_right(starts, moment - self.length)
+            if running >= self.capacity:
+                return True
+        return False
+
+    def add(self, listing_id, start):
+        insort(self._starts[listing_id], start)
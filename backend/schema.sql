@@ -1,3 +1,6 @@
+DROP TABLE IF EXISTS Geocode_Cache;
+DROP TABLE IF EXISTS Listings_geo;
+DROP TABLE IF EXISTS Listings_fts;
 DROP TABLE IF EXISTS Provider_Analytics;
 DROP TABLE IF EXISTS Listing_Status;
 DROP TABLE IF EXISTS Admin_Actions;
@@ -0,0 +1,32 @@
+-- 0001: Secondary indexes for the hot query paths in models/ and controllers/.
+-- Every statement is idempotent so the file can be re-applied safely.
+
+-- Listings: Service.list_all / admin listing pages (WHERE status ORDER BY created_at)
+CREATE INDEX IF NOT EXISTS idx_listings_status_created ON Listings(status, created_at);
+-- Listings: Service.list_all without a status filter (ORDER BY created_at)
+CREATE INDEX IF NOT EXISTS idx_listings_created ON Listings(created_at);
+-- Listings: Service.get_by_provider, Booking.get_by_provider join
+CREATE INDEX IF NOT EXISTS idx_listings_provider_created ON Listings(provider_id, created_at);
+
+-- Providers: Provider.get_by_user_id on every provider request
+CREATE INDEX IF NOT EXISTS idx_providers_user ON Providers(user_id);
+
+-- Bookings: Booking.get_by_user (WHERE user_id [AND status] ORDER BY booking_date)
+CREATE INDEX IF NOT EXISTS idx_bookings_user_date ON Bookings(user_id, booking_date);
+CREATE INDEX IF NOT EXISTS idx_bookings_user_status_date ON Bookings(user_id, status, booking_date);
+-- Bookings: provider dashboards join Bookings on listing_id
+CREATE INDEX IF NOT EXISTS idx_bookings_listing_date ON Bookings(listing_id, booking_date);
+
+-- Reviews: per-listing review pages (WHERE listing_id ORDER BY created_at)
+CREATE INDEX IF NOT EXISTS idx_reviews_listing_created ON Reviews(listing_id, created_at);
+-- Reviews: covering index for AVG(rating)/COUNT(*) GROUP BY listing_id
+CREATE INDEX IF NOT EXISTS idx_reviews_listing_rating ON Reviews(listing_id, rating);
+-- Reviews: admin review list (ORDER BY created_at)
+CREATE INDEX IF NOT EXISTS idx_reviews_created ON Reviews(created_at);
+
+-- Bookmarks: Bookmark.get_by_user / get_with_service_details (ORDER BY created_at)
+CREATE INDEX IF NOT EXISTS idx_bookmarks_user_created ON Bookmarks(user_id, created_at);
+
+-- Users: Admin.list_all / Consumer.list_all (WHERE role ORDER BY created_at), User.list_all
+CREATE INDEX IF NOT EXISTS idx_users_role_created ON Users(role, created_at);
+CREATE INDEX IF NOT EXISTS idx_users_created ON Users(created_at);
@@ -0,0 +1,73 @@
+-- 0002: Full-text search over listings.
+-- Listings_fts keeps one row per listing (rowid = listing_id) with the
+-- listing text plus its provider's business name and category name, and an
+-- unindexed copy of the listing status so ranking and the status filter both
+-- run inside the FTS index before anything is joined back to Listings.
+-- Triggers keep it in sync; the backfill at the end makes this file re-runnable.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS Listings_fts USING fts5(
+    title,
+    description,
+    business_name,
+    category_name,
+    status UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- BM25 column weights: title > business name > category > description.
+-- Ordering by the built-in rank column lets FTS5 sort internally, so
+-- snippet() and highlight() only run for the rows that are returned.
+INSERT INTO Listings_fts(Listings_fts, rank) VALUES ('rank', 'bm25(10.0, 2.0, 5.0, 3.0)');
+
+CREATE TRIGGER IF NOT EXISTS trg_listings_fts_insert AFTER INSERT ON Listings
+BEGIN
+    INSERT INTO Listings_fts (rowid, title, description, business_name, category_name, status)
+    VALUES (
+        NEW.listing_id,
+        NEW.title,
+        NEW.description,
+        (SELECT business_name FROM Providers WHERE provider_id = NEW.provider_id),
+        (SELECT name FROM Categories WHERE category_id = NEW.category_id),
+        NEW.status
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_listings_fts_update
+AFTER UPDATE OF title, description, provider_id, category_id, status ON Listings
+BEGIN
+    DELETE FROM Listings_fts WHERE rowid = OLD.listing_id;
+    INSERT INTO Listings_fts (rowid, title, description, business_name, category_name, status)
+    VALUES (
+        NEW.listing_id,
+        NEW.title,
+        NEW.description,
+        (SELECT business_name FROM Providers WHERE provider_id = NEW.provider_id),
+        (SELECT name FROM Categories WHERE category_id = NEW.category_id),
+        NEW.status
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_listings_fts_delete AFTER DELETE ON Listings
+BEGIN
+    DELETE FROM Listings_fts WHERE rowid = OLD.listing_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_providers_fts_update AFTER UPDATE OF business_name ON Providers
+BEGIN
+    UPDATE Listings_fts SET business_name = NEW.business_name
+    WHERE rowid IN (SELECT listing_id FROM Listings WHERE provider_id = NEW.provider_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_categories_fts_update AFTER UPDATE OF name ON Categories
+BEGIN
+    UPDATE Listings_fts SET category_name = NEW.name
+    WHERE rowid IN (SELECT listing_id FROM Listings WHERE category_id = NEW.category_id);
+END;
+
+DELETE FROM Listings_fts;
+INSERT INTO Listings_fts (rowid, title, description, business_name, category_name, status)
+SELECT l.listing_id, l.title, l.description, p.business_name, c.name, l.status
+FROM Listings l
+LEFT JOIN Providers p ON l.provider_id = p.provider_id
+LEFT JOIN Categories c ON l.category_id = c.category_id;
@@ -0,0 +1,37 @@
+-- 0003: Spatial index over listing coordinates.
+-- Listings_geo is an R*Tree holding one zero-area box per listing
+-- (id = listing_id) so radius queries can prune by bounding box before
+-- computing exact distances. Listings without coordinates are left out.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS Listings_geo USING rtree(
+    listing_id,
+    min_lat, max_lat,
+    min_lng, max_lng
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_listings_geo_insert AFTER INSERT ON Listings
+WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+BEGIN
+    INSERT INTO Listings_geo (listing_id, min_lat, max_lat, min_lng, max_lng)
+    VALUES (NEW.listing_id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_listings_geo_update
+AFTER UPDATE OF latitude, longitude ON Listings
+BEGIN
+    DELETE FROM Listings_geo WHERE listing_id = OLD.listing_id;
+    INSERT INTO Listings_geo (listing_id, min_lat, max_lat, min_lng, max_lng)
+    SELECT NEW.listing_id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+    WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_listings_geo_delete AFTER DELETE ON Listings
+BEGIN
+    DELETE FROM Listings_geo WHERE listing_id = OLD.listing_id;
+END;
+
+DELETE FROM Listings_geo;
+INSERT INTO Listings_geo (listing_id, min_lat, max_lat, min_lng, max_lng)
+SELECT listing_id, latitude, latitude, longitude, longitude
+FROM Listings
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
@@ -0,0 +1,9 @@
+-- 0004: Persistent tier of the geocode cache (see geocode_cache.py).
+-- address is the normalised address string; updated_at is a Unix timestamp.
+
+CREATE TABLE IF NOT EXISTS Geocode_Cache (
+    address TEXT PRIMARY KEY,
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
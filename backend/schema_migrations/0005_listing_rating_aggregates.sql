@@ -0,0 +1,47 @@
+-- 0005: Per-listing rating aggregates.
+-- rating_sum/rating_count are kept current by triggers on Reviews (so
+-- every write path, including admin deletes, is covered); rating_avg is
+-- derived from them (0 for unrated listings, which therefore sort last).
+-- Reviews without a rating are not counted, like AVG(rating).
+
+ALTER TABLE Listings ADD COLUMN rating_sum INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE Listings ADD COLUMN rating_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE Listings ADD COLUMN rating_avg REAL GENERATED ALWAYS AS (
+    CASE WHEN rating_count > 0 THEN CAST(rating_sum AS REAL) / rating_count ELSE 0 END
+) VIRTUAL;
+
+CREATE TRIGGER IF NOT EXISTS trg_reviews_rating_insert AFTER INSERT ON Reviews
+WHEN NEW.rating IS NOT NULL
+BEGIN
+    UPDATE Listings
+    SET rating_sum = rating_sum + NEW.rating, rating_count = rating_count + 1
+    WHERE listing_id = NEW.listing_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_reviews_rating_update
+AFTER UPDATE OF rating, listing_id ON Reviews
+BEGIN
+    UPDATE Listings
+    SET rating_sum = rating_sum - OLD.rating, rating_count = rating_count - 1
+    WHERE listing_id = OLD.listing_id AND OLD.rating IS NOT NULL;
+    UPDATE Listings
+    SET rating_sum = rating_sum + NEW.rating, rating_count = rating_count + 1
+    WHERE listing_id = NEW.listing_id AND NEW.rating IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_reviews_rating_delete AFTER DELETE ON Reviews
+WHEN OLD.rating IS NOT NULL
+BEGIN
+    UPDATE Listings
+    SET rating_sum = rating_sum - OLD.rating, rating_count = rating_count - 1
+    WHERE listing_id = OLD.listing_id;
+END;
+
+UPDATE Listings SET
+    rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM Reviews r WHERE r.listing_id = Listings.listing_id),
+    rating_count = (SELECT COUNT(rating) FROM Reviews r WHERE r.listing_id = Listings.listing_id);
+
+-- "Best rated first" pages, and /reviews/averages (rated listings only)
+CREATE INDEX IF NOT EXISTS idx_listings_status_rating ON Listings(status, rating_avg);
+CREATE INDEX IF NOT EXISTS idx_listings_rated
+    ON Listings(listing_id, rating_sum, rating_count) WHERE rating_count > 0;
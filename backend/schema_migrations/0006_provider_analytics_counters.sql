@@ -0,0 +1,26 @@
+-- 0006: Provider_Analytics becomes a live, incrementally updated table.
+-- One row per provider (unique provider_id, so deltas can be upserted),
+-- plus the rating sum/count that average_rating is derived from. Rows are
+-- rebuilt from the source tables; seeded values are discarded.
+
+ALTER TABLE Provider_Analytics ADD COLUMN rating_sum INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE Provider_Analytics ADD COLUMN rating_count INTEGER NOT NULL DEFAULT 0;
+
+DELETE FROM Provider_Analytics;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_provider_analytics_provider ON Provider_Analytics(provider_id);
+
+INSERT INTO Provider_Analytics
+    (provider_id, total_services, total_bookings, rating_sum, rating_count, average_rating)
+SELECT provider_id, total_services, total_bookings, rating_sum, rating_count,
+       CASE WHEN rating_count > 0 THEN CAST(rating_sum AS REAL) / rating_count ELSE 0 END
+FROM (
+    SELECT p.provider_id,
+           COUNT(l.listing_id) AS total_services,
+           COALESCE(SUM(l.rating_sum), 0) AS rating_sum,
+           COALESCE(SUM(l.rating_count), 0) AS rating_count,
+           (SELECT COUNT(*) FROM Bookings b JOIN Listings bl ON bl.listing_id = b.listing_id
+            WHERE bl.provider_id = p.provider_id AND b.status != 'cancelled') AS total_bookings
+    FROM Providers p
+    LEFT JOIN Listings l ON l.provider_id = p.provider_id
+    GROUP BY p.provider_id
+);
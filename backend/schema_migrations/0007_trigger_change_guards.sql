@@ -0,0 +1,51 @@
+-- 0007: Only re-sync derived tables when a watched column actually changes.
+-- Service.update and the review update are single fixed-shape statements
+-- (col = COALESCE(?, col)), so every column they list counts as updated
+-- and "AFTER UPDATE OF" fires even for values that stayed the same. The
+-- WHEN guards skip the FTS re-index, R*Tree rewrite and rating re-count
+-- in that case.
+
+DROP TRIGGER IF EXISTS trg_listings_fts_update;
+CREATE TRIGGER trg_listings_fts_update
+AFTER UPDATE OF title, description, provider_id, category_id, status ON Listings
+WHEN OLD.title IS NOT NEW.title
+  OR OLD.description IS NOT NEW.description
+  OR OLD.provider_id IS NOT NEW.provider_id
+  OR OLD.category_id IS NOT NEW.category_id
+  OR OLD.status IS NOT NEW.status
+BEGIN
+    DELETE FROM Listings_fts WHERE rowid = OLD.listing_id;
+    INSERT INTO Listings_fts (rowid, title, description, business_name, category_name, status)
+    VALUES (
+        NEW.listing_id,
+        NEW.title,
+        NEW.description,
+        (SELECT business_name FROM Providers WHERE provider_id = NEW.provider_id),
+        (SELECT name FROM Categories WHERE category_id = NEW.category_id),
+        NEW.status
+    );
+END;
+
+DROP TRIGGER IF EXISTS trg_listings_geo_update;
+CREATE TRIGGER trg_listings_geo_update
+AFTER UPDATE OF latitude, longitude ON Listings
+WHEN OLD.latitude IS NOT NEW.latitude OR OLD.longitude IS NOT NEW.longitude
+BEGIN
+    DELETE FROM Listings_geo WHERE listing_id = OLD.listing_id;
+    INSERT INTO Listings_geo (listing_id, min_lat, max_lat, min_lng, max_lng)
+    SELECT NEW.listing_id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+    WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+END;
+
+DROP TRIGGER IF EXISTS trg_reviews_rating_update;
+CREATE TRIGGER trg_reviews_rating_update
+AFTER UPDATE OF rating, listing_id ON Reviews
+WHEN OLD.rating IS NOT NEW.rating OR OLD.listing_id IS NOT NEW.listing_id
+BEGIN
+    UPDATE Listings
+    SET rating_sum = rating_sum - OLD.rating, rating_count = rating_count - 1
+    WHERE listing_id = OLD.listing_id AND OLD.rating IS NOT NULL;
+    UPDATE Listings
+    SET rating_sum = rating_sum + NEW.rating, rating_count = rating_count + 1
+    WHERE listing_id = NEW.listing_id AND NEW.rating IS NOT NULL;
+END;
@@ -0,0 +1,242 @@
+"""
+Background-refreshed snapshots of large upstream datasets.
+
+Each registered dataset has a fetch function that downloads and
+preprocesses it (e.g. reprojects coordinates) into a JSON-serialisable
+payload. A background thread re-fetches every dataset on its own interval
+and writes the result to disk, so a restarted worker starts serving from
+the file straight away. Requests only ever read the in-memory copy:
+
+    SNAPSHOTS.register("hdb-carpark-info", fetch_hdb_carparks, interval=6 * 60 * 60)
+    snapshot = SNAPSHOTS.get("hdb-carpark-info")
+    snapshot.data, snapshot.version, snapshot.body
+
+A dataset can also have a build function for in-memory structures derived
+from the payload (such as a PointIndex); it runs whenever a new version is
+loaded and its result is kept on snapshot.extra.
+
+Each worker process refreshes on its own; writes are atomic renames, so
+processes sharing a snapshot directory never see a half-written file.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from flask import Response, current_app, request
+
+DEFAULT_INTERVAL = 60 * 60  # 1 hour
+RETRY_INTERVAL = 5 * 60     # after a failed refresh
+WORKER_TICK = 30            # seconds between due-checks
+
+
+class Snapshot:
+    """One immutable version of a dataset."""
+
+    def __init__(self, name, data, fetched_at, body=None, extra=None):
+        self.name = name
+        self.data = data
+        self.fetched_at = fetched_at
+        # Pre-serialised JSON, so whole-dataset responses skip encoding
+        self.body = body if body is not None else json.dumps(data, separators=(",", ":")).encode("utf8")
+        self.version = hashlib.sha1(self.body).hexdigest()[:16]
+        self.extra = extra
+
+
+class _Dataset:
+    def __init__(self, name, fetch, interval, build):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.build = build
+        self.snapshot = None
+        self.next_refresh = 0.0
+        self.last_error = None
+        self.lock = threading.Lock()
+
+
+class SnapshotStore:
+    """Registry of datasets, their current snapshots and the refresh worker."""
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._datasets = {}
+        self._worker = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        """
+        Configure the snapshot directory and start the refresh worker.
+
+        Config:
+            SNAPSHOT_DIR: Where snapshots are stored (default: <instance>/snapshots)
+            SNAPSHOT_REFRESH: Set False to skip the background worker
+        """
+        self.directory = app.config.get("SNAPSHOT_DIR") or os.path.join(app.instance_path, "snapshots")
+        os.makedirs(self.directory, exist_ok=True)
+        if app.config.get("SNAPSHOT_REFRESH", True):
+            self.start()
+
+    def register(self, name, fetch, interval=DEFAULT_INTERVAL, build=None):
+        """Register a dataset. fetch() returns the preprocessed payload."""
+        self._datasets[name] = _Dataset(name, fetch, interval, build)
+
+    def get(self, name):
+        """
+        Current snapshot of a dataset.
+
+        Loads it from disk, or fetches it in this thread, only when the
+        process has never had a copy.
+
+        Raises:
+            KeyError: If the dataset is not registered
+            Exception: Whatever fetch() raised, when there is no copy at all
+        """
+        dataset = self._datasets[name]
+        if dataset.snapshot is None:
+            with dataset.lock:
+                if dataset.snapshot is None and not self._load_from_disk(dataset):
+                    self._refresh(dataset)
+        return dataset.snapshot
+
+    def refresh(self, name):
+        """Fetch a dataset now, replacing its snapshot. Returns the new snapshot."""
+        dataset = self._datasets[name]
+        with dataset.lock:
+            self._refresh(dataset)
+        return dataset.snapshot
+
+    def _install(self, dataset, snapshot):
+        if dataset.build is not None:
+            snapshot.extra = dataset.build(snapshot.data)
+        dataset.snapshot = snapshot
+
+    def _refresh(self, dataset):
+        start = time.perf_counter()
+        data = dataset.fetch()
+        snapshot = Snapshot(dataset.name, data, time.time())
+        if dataset.snapshot is None or snapshot.version != dataset.snapshot.version:
+            self._install(dataset, snapshot)
+            self._save(snapshot)
+        else:
+            dataset.snapshot.fetched_at = snapshot.fetched_at
+            self._save(dataset.snapshot, meta_only=True)
+        dataset.next_refresh = time.time() + dataset.interval
+        dataset.last_error = None
+        print(f"[Snapshots] Refreshed {dataset.name} (version {dataset.snapshot.version}, "
+              f"{len(dataset.snapshot.body):,} bytes) in {time.perf_counter() - start:.1f}s")
+
+    def _paths(self, name):
+        return (os.path.join(self.directory, f"{name}.json"),
+                os.path.join(self.directory, f"{name}.meta.json"))
+
+    def _save(self, snapshot, meta_only=False):
+        if not self.directory:
+            return
+        data_path, meta_path = self._paths(snapshot.name)
+        files = [(meta_path, json.dumps({"fetched_at": snapshot.fetched_at}).encode("utf8"))]
+        if not meta_only:
+            # Data first, so a meta file never points at a missing payload
+            files.insert(0, (data_path, snapshot.body))
+        for path, content in files:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+
+    def _load_from_disk(self, dataset):
+        if not self.directory:
+            return False
+        data_path, meta_path = self._paths(dataset.name)
+        try:
+            with open(data_path, "rb") as f:
+                body = f.read()
+            with open(meta_path, encoding="utf8") as f:
+                fetched_at = json.load(f)["fetched_at"]
+            data = json.loads(body)
+        except (OSError, ValueError, KeyError):
+            return False
+        self._install(dataset, Snapshot(dataset.name, data, fetched_at, body=body))
+        dataset.next_refresh = fetched_at + dataset.interval
+        return True
+
+    def start(self):
+        """Start the background refresh thread (once per process)."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="snapshot-refresh", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for dataset in list(self._datasets.values()):
+                if self._stop.is_set():
+                    break
+                if dataset.snapshot is None:
+                    with dataset.lock:
+                        if dataset.snapshot is None:
+                            self._load_from_disk(dataset)
+                if time.time() < dataset.next_refresh:
+                    continue
+                try:
+                    with dataset.lock:
+                        self._refresh(dataset)
+                except Exception as e:
+                    dataset.last_error = str(e)
+                    dataset.next_refresh = time.time() + RETRY_INTERVAL
+                    print(f"[Snapshots] Refresh of {dataset.name} failed: {e}")
+            self._stop.wait(WORKER_TICK)
+
+    def status(self):
+        """Version, age and last error per dataset."""
+        now = time.time()
+        result = {}
+        for name, dataset in self._datasets.items():
+            snapshot = dataset.snapshot
+            result[name] = {
+                "version": snapshot.version if snapshot else None,
+                "age_seconds": round(now - snapshot.fetched_at) if snapshot else None,
+                "bytes": len(snapshot.body) if snapshot else None,
+                "next_refresh_in": max(0, round(dataset.next_refresh - now)),
+                "last_error": dataset.last_error,
+            }
+        return result
+
+
+def snapshot_response(snapshot, payload=None):
+    """
+    Response for a snapshot, with ETag and version headers.
+
+    payload is a view derived from the snapshot (e.g. a filtered subset),
+    either as an object or as already-encoded JSON bytes; leave it out to
+    send the whole pre-serialised dataset. The ETag covers
+    the snapshot version and the query string, so a conditional request
+    gets a 304 until the dataset changes.
+    """
+    etag = hashlib.sha1(f"{snapshot.version}?{request.query_string.decode()}".encode()).hexdigest()[:20]
+    headers = {
+        "X-Dataset-Version": snapshot.version,
+        "Last-Modified": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(snapshot.fetched_at)),
+        "Cache-Control": "no-cache",
+    }
+    if etag in request.if_none_match:
+        response = Response(status=304, headers=headers)
+    else:
+        if payload is None:
+            body = snapshot.body
+        elif isinstance(payload, bytes):
+            body = payload
+        else:
+            body = current_app.json.dumps(payload)
+        response = Response(body, mimetype="application/json", headers=headers)
+    response.set_etag(etag)
+    return response
+
+
+SNAPSHOTS = SnapshotStore()
@@ -0,0 +1,81 @@
+"""
+Streaming JSON responses for large collections.
+
+stream_json() encodes items one at a time and sends them in ~64 KB
+chunks, so neither the full result set nor the full encoded body is ever
+held in memory. Feed it a generator (e.g. iter_cursor() over a DB cursor)
+to keep memory per request constant however many rows there are.
+
+The format follows the Accept header: a JSON array by default (or an
+object holding the array under one key, with wrap=), or newline-delimited
+JSON (one item per line) for application/x-ndjson.
+"""
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson")
+CHUNK_SIZE = 64 * 1024
+FETCH_BATCH = 500
+
+
+def wants_ndjson():
+    """True if the client prefers NDJSON over a JSON array."""
+    accept = request.accept_mimetypes
+    best = accept.best_match(("application/json",) + NDJSON_MIMETYPES)
+    return best in NDJSON_MIMETYPES
+
+
+def iter_cursor(cursor, convert=dict, batch_size=FETCH_BATCH):
+    """Yield convert(row) for every row of a cursor, fetching in batches."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        for row in rows:
+            yield convert(row)
+
+
+def _chunks(pieces, chunk_size):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_json(items, status=200, headers=None, chunk_size=CHUNK_SIZE, wrap=None):
+    """
+    Stream an iterable of JSON-serialisable items as the response body.
+
+    Items are encoded with the app's JSON provider, so they may contain
+    anything jsonify() accepts. The request context (and its pooled DB
+    connection) stays open until the last chunk is sent.
+
+    With wrap="key" the array is sent as {"key": [...]}; NDJSON output is
+    the bare items either way.
+    """
+    dumps = current_app.json.dumps
+    ndjson = wants_ndjson()
+
+    def pieces():
+        if ndjson:
+            for item in items:
+                yield dumps(item) + "\n"
+            return
+        yield "[" if wrap is None else "{" + dumps(wrap) + ":["
+        first = True
+        for item in items:
+            yield dumps(item) if first else "," + dumps(item)
+            first = False
+        yield "]" if wrap is None else "]}"
+
+    mimetype = NDJSON_MIMETYPES[0] if ndjson else "application/json"
+    return Response(
+        stream_with_context(_chunks(pieces(), chunk_size)),
+        status=status,
+        mimetype=mimetype,
+        headers=headers,
+    )
@@ -0,0 +1,100 @@
+"""
+Review Analytics Test Suite
+Checks that review writes keep Provider_Analytics in step with the
+Listings rating counters, which the database triggers maintain.
+
+    python -m pytest backend/tests/test_review_analytics.py
+"""
+import os
+import sys
+import tempfile
+
+# Add the repository root to the path to import the backend package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import pytest
+from flask import Flask
+
+from backend import auth, transactions
+from backend.analytics import ANALYTICS
+from backend.controllers.review_controller import review_bp
+from backend.db import get_db, init_app, init_db
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client with the review routes, one unit of work per request and inline analytics."""
+    backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    app = Flask('backend.app', root_path=backend_dir)
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    os.close(db_fd)
+    app.config.update({
+        'TESTING': True,
+        'DATABASE': db_path,
+        'ANALYTICS_ASYNC': False,
+    })
+    init_app(app)
+    transactions.init_app(app)
+    ANALYTICS.init_app(app)
+    app.register_blueprint(review_bp, url_prefix='/api')
+    # The bearer token is the user id
+    monkeypatch.setattr(auth.VERIFIER, 'verify', lambda token: {'uid': token})
+
+    with app.app_context():
+        init_db()
+        db = get_db()
+        db.execute("INSERT INTO Users (user_id, email, role) VALUES ('p1', 'p1@test.com', 'provider')")
+        db.execute("INSERT INTO Users (user_id, email, role) VALUES ('c1', 'c1@test.com', 'customer')")
+        db.execute("INSERT INTO Providers (user_id, business_name, approved) VALUES ('p1', 'Test Business', 1)")
+        db.execute("INSERT INTO Listings (provider_id, title, price, status) VALUES (1, 'House Cleaning', 50, 'approved')")
+        db.execute(
+            "INSERT INTO Bookings (listing_id, user_id, booking_date, status) "
+            "VALUES (1, 'c1', '2024-01-08 10:00:00', 'completed')"
+        )
+        db.commit()
+
+    yield app.test_client(), app
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.unlink(db_path + suffix)
+
+
+def rating_counters(app):
+    """(Listings counters, Provider_Analytics counters) as (rating_sum, rating_count) pairs."""
+    with app.app_context():
+        db = get_db()
+        listing = db.execute("SELECT rating_sum, rating_count FROM Listings WHERE listing_id = 1").fetchone()
+        provider = db.execute(
+            "SELECT rating_sum, rating_count FROM Provider_Analytics WHERE provider_id = 1"
+        ).fetchone()
+        return tuple(listing), tuple(provider) if provider else None
+
+
+AUTH = {'Authorization': 'Bearer c1'}
+
+
+def test_add_then_rerate_keeps_analytics_in_step(client):
+    client, app = client
+    r = client.post('/api/services/1/reviews', json={'booking_id': 1, 'rating': '4'}, headers=AUTH)
+    assert r.status_code == 201
+    assert rating_counters(app) == ((4, 1), (4, 1))
+
+    r = client.put(f"/api/reviews/{r.get_json()['review_id']}", json={'rating': 2}, headers=AUTH)
+    assert r.status_code == 200
+    assert r.get_json()['review']['rating'] == 2
+    assert rating_counters(app) == ((2, 1), (2, 1))
+
+
+@pytest.mark.parametrize('rating', [4.5, 0, 6, True, 'four', [5]])
+def test_non_integer_ratings_are_rejected(client, rating):
+    client, app = client
+    r = client.post('/api/services/1/reviews', json={'booking_id': 1, 'rating': rating}, headers=AUTH)
+    assert r.status_code == 400
+    assert rating_counters(app) == ((0, 0), None)
+
+    r = client.post('/api/services/1/reviews', json={'booking_id': 1, 'rating': 5}, headers=AUTH)
+    review_id = r.get_json()['review_id']
+    r = client.put(f'/api/reviews/{review_id}', json={'rating': rating}, headers=AUTH)
+    assert r.status_code == 400
+    assert rating_counters(app) == ((5, 1), (5, 1))
@@ -0,0 +1,145 @@
+"""
+Unit of work: one durable commit per request.
+
+Each request runs inside a unit of work (config UNIT_OF_WORK, on by
+default). Model code calls commit() where it used to call db.commit();
+inside the unit that only marks the end of the model's own work, and the
+request's writes are committed once after the view returns a response
+below 400, or rolled back otherwise. On SQLite every commit is an fsync,
+so a sign-up that writes Users and Providers pays for one instead of
+several.
+
+Writes that must succeed or fail together go in transaction(). At the
+outermost level it commits on exit and rolls back on error; nested in
+another transaction or in a request it becomes a SAVEPOINT, so a failing
+call undoes only its own writes:
+
+    with transaction() as db:
+        user = User._insert_row(db, ...)
+        db.execute("INSERT INTO Providers ...")
+
+Side effects that must wait until the data is durable (cache
+invalidation, analytics deltas) go through after_commit(). They are
+dropped if the surrounding transaction rolls back.
+"""
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context
+
+from backend.db import get_db
+
+
+def in_transaction():
+    """True inside transaction() or a request's unit of work."""
+    return has_app_context() and g.get('_tx_depth', 0) > 0
+
+
+@contextmanager
+def transaction(db=None):
+    """Make the writes in the block atomic; see the module docstring."""
+    db = db or get_db()
+    depth = g.get('_tx_depth', 0)
+    if depth == 0:
+        g._after_commit = []
+    callbacks = len(g._after_commit)
+    g._tx_depth = depth + 1
+    try:
+        if depth == 0:
+            try:
+                yield db
+            except BaseException:
+                _rollback(db)
+                raise
+            _commit(db)
+        else:
+            name = f"sp_{depth}"
+            # Open the outer transaction first: a SAVEPOINT outside one
+            # would commit on RELEASE
+            if not db.in_transaction:
+                db.execute("BEGIN")
+            db.execute(f"SAVEPOINT {name}")
+            try:
+                yield db
+            except BaseException:
+                db.execute(f"ROLLBACK TO {name}")
+                db.execute(f"RELEASE {name}")
+                del g._after_commit[callbacks:]
+                raise
+            db.execute(f"RELEASE {name}")
+    finally:
+        g._tx_depth = depth
+
+
+def commit(db=None):
+    """Commit now, unless a transaction or the request's unit of work will."""
+    if in_transaction():
+        return
+    _commit(db or get_db())
+
+
+def after_commit(callback):
+    """Call callback() once the current writes are committed (now, if none are pending)."""
+    if in_transaction():
+        g._after_commit.append(callback)
+    else:
+        callback()
+
+
+def _commit(db):
+    try:
+        db.commit()
+    except BaseException:
+        _rollback(db)
+        raise
+    _run_after_commit()
+
+
+def _rollback(db):
+    db.rollback()
+    g._after_commit = []
+
+
+def _run_after_commit():
+    callbacks, g._after_commit = g.get('_after_commit', []), []
+    for callback in callbacks:
+        callback()
+
+
+def _begin_request():
+    if current_app.config.get('UNIT_OF_WORK', True):
+        g._tx_depth = 1
+        g._after_commit = []
+        g._tx_request = True
+
+
+def _end_request(success):
+    if not g.pop('_tx_request', False):
+        return
+    g._tx_depth = 0
+    db = g.get('db')
+    if db is None or not db.in_transaction:
+        # Nothing was written; still honour after_commit() on success
+        if success:
+            _run_after_commit()
+        g._after_commit = []
+    elif success:
+        _commit(db)
+    else:
+        _rollback(db)
+
+
+def _commit_response(response):
+    _end_request(response.status_code < 400)
+    return response
+
+
+def _rollback_on_error(exc):
+    # Only still open when the view raised (after_request did not run)
+    _end_request(False)
+
+
+def init_app(app):
+    """Wrap every request of app in a unit of work."""
+    app.before_request(_begin_request)
+    app.after_request(_commit_response)
+    app.teardown_request(_rollback_on_error)